@@ -12,4 +12,7 @@ python manage.py create_default_superuser
 echo "====== Collecting static files ======"
 python manage.py collectstatic --noinput --clear
 
+echo "====== Warming page cache ======"
+python manage.py warm_cache
+
 echo "====== Build complete ======"
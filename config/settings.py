@@ -48,6 +48,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-route latency, query, serializer and response size histograms,
+# exposed at /metrics (portfolio.metrics)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.environ.get('METRICS_DIR', BASE_DIR / 'metrics')
+# How often each worker saves its histograms for the others' /metrics (seconds)
+METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+# Bearer token the scraper sends to /metrics; staff users may always read it
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+if METRICS_ENABLED:
+    # First, so the wall time covers every other middleware
+    MIDDLEWARE.insert(0, 'portfolio.middleware.MetricsMiddleware')
+
+if DEBUG:
+    # Must stay last: it calls the view itself to count its queries
+    MIDDLEWARE.append('portfolio.middleware.QueryBudgetMiddleware')
+
+# Fail instead of warning when a view goes over its query_budget
+QUERY_BUDGET_RAISE = os.environ.get('QUERY_BUDGET_RAISE', 'False') == 'True'
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -73,11 +93,103 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
 
+# Cache
+# File-based so that every gunicorn worker shares the same cached pages
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+    }
+}
+
+# Rendered homepage lifetime in seconds (None = until the next content edit)
+HOMEPAGE_CACHE_TIMEOUT = None
+# Cache every homepage section on its own ({% cached_section %}), so that a
+# content edit re-renders only the sections showing the edited model
+HOMEPAGE_SECTION_CACHE = os.environ.get('HOMEPAGE_SECTION_CACHE', 'True') == 'True'
+# Stream the homepage part by part when it has to be rendered, so the <head>
+# and the sidebar are sent before the queries of the sections below them
+HOMEPAGE_STREAMING = os.environ.get('HOMEPAGE_STREAMING', 'False') == 'True'
+
+# Blog post views are buffered per worker and saved once this many are
+# pending, or every VIEW_COUNT_FLUSH_INTERVAL seconds
+VIEW_COUNT_FLUSH_THRESHOLD = int(os.environ.get('VIEW_COUNT_FLUSH_THRESHOLD', 100))
+VIEW_COUNT_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', 10))
+
+# Static export of the site (manage.py export_static). Once exported, content
+# edits re-export the affected pages unless EXPORT_ON_SAVE is off.
+EXPORT_DIR = os.environ.get('EXPORT_DIR', BASE_DIR / 'export')
+# Origin the export is served from; absolute URLs in it point here
+EXPORT_BASE_URL = os.environ.get('EXPORT_BASE_URL', 'http://localhost:8000')
+EXPORT_ON_SAVE = os.environ.get('EXPORT_ON_SAVE', 'True') == 'True'
+
+# Serve the read-only API and the homepage from async views (set by
+# config/asgi.py, so that WSGI workers keep the sync views)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
+# Tuned SQLite (portfolio.sqlite): these pragmas on every new connection,
+# persistent connections and retried writes when the database is locked
+SQLITE_TUNED = os.environ.get('SQLITE_TUNED', 'True') == 'True'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # KiB
+    'busy_timeout': 5000,  # ms
+}
+SQLITE_WRITE_RETRIES = 5
+# First retry delay in seconds; doubles on every further attempt
+SQLITE_RETRY_DELAY = 0.02
+
+if SQLITE_TUNED:
+    # Django closes connections at the end of async requests anyway, and
+    # persistent connections aren't safe under ASGI
+    DATABASES['default']['CONN_MAX_AGE'] = 0 if ASYNC_VIEWS else 600
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replicas (portfolio.replicas): the read-only API and the homepage read
+# from one of these aliases, everything else uses the primary 'default'.
+# DATABASE_REPLICAS lists SQLite files refreshed from the primary with
+# `manage.py sync_replica`; PostgreSQL replicas can be added to DATABASES
+# and REPLICA_DATABASES directly.
+REPLICA_DATABASES = []
+for index, path in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'NAME': path, 'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append(f'replica{index}')
+# Reads stay on the primary this long after a visitor's POST (seconds)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 30))
+# How often `manage.py sync_replica --watch` copies the primary (seconds)
+REPLICA_SYNC_INTERVAL = int(os.environ.get('REPLICA_SYNC_INTERVAL', 5))
+
+if REPLICA_DATABASES:
+    DATABASE_ROUTERS = ['portfolio.replicas.ReplicaRouter']
+    MIDDLEWARE.insert(MIDDLEWARE.index('corsheaders.middleware.CorsMiddleware'), 'portfolio.middleware.ReplicaMiddleware')
+
+# Rows fetched per database round trip by the bulk exports (portfolio.bulkexport)
+DATA_EXPORT_CHUNK_SIZE = int(os.environ.get('DATA_EXPORT_CHUNK_SIZE', 2000))
+
+# Opt-in: contact form submissions are appended to a spool file and saved in
+# batches by a background drainer (portfolio.spool) instead of inside the
+# request. POST /api/contact/ then answers 202 Accepted instead of 201 Created.
+CONTACT_SPOOL = os.environ.get('CONTACT_SPOOL', 'False') == 'True'
+CONTACT_SPOOL_DIR = os.environ.get('CONTACT_SPOOL_DIR', BASE_DIR / 'spool')
+CONTACT_SPOOL_INTERVAL = int(os.environ.get('CONTACT_SPOOL_INTERVAL', 2))
+CONTACT_SPOOL_BATCH_SIZE = 500
+
+# Contact form token buckets (see DEFAULT_THROTTLE_RATES) and recent message
+# digests, shared by the workers through their own SQLite file
+THROTTLE_DB = os.environ.get('THROTTLE_DB', BASE_DIR / 'throttle.sqlite3')
+# Buckets idle this long are full again and get pruned (seconds)
+THROTTLE_IDLE_TIMEOUT = 24 * 60 * 60
+# Identical messages from the same address within this many seconds are dropped
+CONTACT_DUPLICATE_WINDOW = 24 * 60 * 60
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,16 +224,43 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Whitenoise configuration for static files
 STORAGES = {
     "default": {
-        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        # Uploads are saved under content-hashed names
+        "BACKEND": "portfolio.storage.HashedMediaStorage",
     },
     "staticfiles": {
-        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+        # Hashed, gzip/Brotli-compressed, with images recompressed losslessly
+        "BACKEND": "portfolio.storage.OptimizedStaticFilesStorage",
     },
 }
 
+# Homepage asset pipeline (portfolio.assets), built by collectstatic.
+# JS bundles: {bundle: [source scripts]}, minified into one fingerprinted file
+ASSET_BUNDLES = {
+    'portfolio/js/site.js': ['portfolio/js/script.js', 'portfolio/js/contact.js'],
+}
+# Critical CSS: {output: (stylesheet, template)}, the stylesheet's rules for the
+# template's {# critical #} block, inlined so the stylesheet can load later
+CRITICAL_CSS = {
+    'portfolio/css/critical.css': ('portfolio/css/style.css', 'portfolio/index.html'),
+}
+
 # Media files
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+# Serve MEDIA_ROOT from Django (portfolio.media) when no other server does
+MEDIA_SERVE = os.environ.get('MEDIA_SERVE', 'True') == 'True'
+# Cache lifetime of content-hashed media files (seconds)
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Responsive renditions generated for uploaded images (widths in pixels)
+IMAGE_RENDITION_WIDTHS = (80, 160, 320, 640, 1280)
+IMAGE_RENDITION_WORKERS = 2
+# Generate renditions in a background thread pool instead of after the request
+IMAGE_RENDITIONS_ASYNC = True
+
+# Serve read-only list endpoints from precompiled .values() plans
+# (portfolio.fastserializers) instead of full DRF serializers
+FAST_SERIALIZERS = os.environ.get('FAST_SERIALIZERS', 'True') == 'True'
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -136,6 +275,14 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'contact_ip': '10/hour',
+        'contact_email': '5/hour',
+    },
+    # Proxies in front of the app appending to X-Forwarded-For (1 on Railway, set
+    # by the start commands in railway.json and the Procfile);
+    # with 0 the throttles key on REMOTE_ADDR and ignore the header
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
 }
 
 # CORS settings
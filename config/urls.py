@@ -2,18 +2,29 @@
 URL configuration for portfolio project.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from portfolio.views import PortfolioHomeView
+from portfolio.media import serve_media
+from portfolio.views import MetricsView, PortfolioHomeView
+
+if settings.ASYNC_VIEWS:
+    from portfolio.async_views import AsyncPortfolioHomeView as PortfolioHomeView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', PortfolioHomeView.as_view(), name='home'),  # Frontend homepage
+    path('metrics', MetricsView.as_view(), name='metrics'),  # Prometheus scrape endpoint
     path('', include('portfolio.urls')),  # Portfolio app URLs (API and templates)
 ]
 
-# Serve media files in development
-if settings.DEBUG:
+# Serve media files (with long-lived caching and byte ranges in production)
+if settings.MEDIA_SERVE:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+    ]
+elif settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
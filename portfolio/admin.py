@@ -1,9 +1,21 @@
 from django.contrib import admin
 from .models import (
     Profile, Service, TimelineEntry, Skill,
-    ProjectCategory, Project, Testimonial, Client,
-    BlogPost, ContactMessage
+    ProjectCategory, Project, Technology, Testimonial, Client,
+    BlogPost, BlogPostDailyViews, ContactMessage
 )
+from .search import search_ids
+
+
+class FullTextSearchMixin:
+    """Use the full-text index for admin searches instead of LIKE scans"""
+    search_type = None
+
+    def get_search_results(self, request, queryset, search_term):
+        ids = search_ids(self.search_type, search_term) if search_term else None
+        if ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=ids), False
 
 
 @admin.register(Profile)
@@ -62,7 +74,8 @@ class ProjectCategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_type = 'project'
     list_display = ['title', 'category', 'created_date', 'featured', 'order', 'is_active']
     list_filter = ['category', 'featured', 'is_active', 'created_date']
     search_fields = ['title', 'description', 'technologies']
@@ -82,6 +95,17 @@ class ProjectAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'created_at']
+    search_fields = ['name', 'slug']
+    # Tags are created from Project.technologies
+    readonly_fields = ['slug']
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(Testimonial)
 class TestimonialAdmin(admin.ModelAdmin):
     list_display = ['client_name', 'date', 'order', 'is_active']
@@ -102,7 +126,8 @@ class ClientAdmin(admin.ModelAdmin):
 
 
 @admin.register(BlogPost)
-class BlogPostAdmin(admin.ModelAdmin):
+class BlogPostAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_type = 'blog'
     list_display = ['title', 'category', 'published_date', 'featured', 'is_published', 'view_count']
     list_filter = ['category', 'featured', 'is_published', 'published_date']
     search_fields = ['title', 'content', 'excerpt']
@@ -127,6 +152,20 @@ class BlogPostAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(BlogPostDailyViews)
+class BlogPostDailyViewsAdmin(admin.ModelAdmin):
+    list_display = ['post', 'date', 'views']
+    list_filter = ['date']
+    search_fields = ['post__title']
+    ordering = ['-date', '-views']
+    date_hierarchy = 'date'
+    readonly_fields = ['post', 'date', 'views']
+
+    def has_add_permission(self, request):
+        # Recorded by the view counter only
+        return False
+
+
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'email', 'submitted_date', 'is_read']
@@ -0,0 +1,292 @@
+"""
+Asset pipeline of the homepage template, built by collectstatic
+(portfolio.storage.OptimizedStaticFilesStorage) so that the manifest
+fingerprints its output:
+
+- ASSET_BUNDLES: every bundle is its source scripts concatenated and
+  minified into one file, loaded with ``{% bundle %}``;
+- CRITICAL_CSS: the rules of a stylesheet that apply to the part of a
+  template between ``{# critical #}`` and ``{# endcritical #}`` (the
+  above-the-fold markup), minified and inlined with ``{% critical_css %}``
+  while the full stylesheet loads without blocking the first paint.
+
+With DEBUG on, or before collectstatic has run, the tags fall back to the
+sources: the bundle's scripts one by one, the critical CSS built on the fly.
+"""
+import functools
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template.loader import get_template
+
+CRITICAL_START = '{# critical #}'
+CRITICAL_END = '{# endcritical #}'
+
+# Characters after which a "/" starts a regular expression, not a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^\n')
+
+_CLASS_ATTR_RE = re.compile(r'\bclass="([^"]*)"')
+_ID_ATTR_RE = re.compile(r'\bid="([^"]*)"')
+_ATTR_RE = re.compile(r'\s([a-z][\w-]*)(?==|[\s>/])')
+_TAG_RE = re.compile(r'<([a-z][a-z0-9]*)')
+_TEMPLATE_SYNTAX_RE = re.compile(r'{%.*?%}|{{.*?}}|{#.*?#}', re.S)
+_INCLUDE_RE = re.compile(r'{%\s*include\s+["\']([^"\']+)["\'].*?%}')
+
+_SELECTOR_CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+_SELECTOR_ID_RE = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+_SELECTOR_ATTR_RE = re.compile(r'\[\s*([\w-]+)')
+_SELECTOR_PSEUDO_RE = re.compile(r'::?[\w-]+(\([^)]*\))?')
+_SELECTOR_TAG_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+_ANIMATION_RE = re.compile(r'animation(?:-name)?\s*:\s*([\w-]+)')
+_KEYFRAMES_RE = re.compile(r'@(?:-\w+-)?keyframes\s+([\w-]+)')
+
+# Selectors that match the document whatever the markup
+ALWAYS_CRITICAL = {'html', 'body', ':root', '*'}
+
+
+def read_source(name):
+    """Return the text of static file ``name`` from the app static directories."""
+    path = finders.find(name)
+    if path is None:
+        raise FileNotFoundError(f'Static file {name!r} not found')
+    with open(path, encoding='utf-8') as file:
+        return file.read()
+
+
+def _skip_string(text, index):
+    """Return the index just after the string or template literal starting at ``index``."""
+    quote = text[index]
+    index += 1
+    while index < len(text) and text[index] != quote:
+        index += 2 if text[index] == '\\' else 1
+    return index + 1
+
+
+def minify_js(source):
+    """
+    Remove comments, indentation and blank lines from JavaScript. Line breaks
+    are kept so that automatic semicolon insertion still applies.
+    """
+    out = []
+    index, length = 0, len(source)
+    last = '\n'
+    while index < length:
+        char = source[index]
+        if char in '\'"`':
+            end = _skip_string(source, index)
+            out.append(source[index:end])
+            index, last = end, char
+        elif source.startswith('//', index):
+            index = source.find('\n', index)
+            index = length if index == -1 else index
+        elif source.startswith('/*', index):
+            end = source.find('*/', index + 2)
+            index = length if end == -1 else end + 2
+        elif char == '/' and last in _REGEX_PRECEDERS:
+            # Regular expression literal, possibly with a class holding "/"
+            end, in_class = index + 1, False
+            while end < length and (source[end] != '/' or in_class):
+                if source[end] == '\\':
+                    end += 1
+                elif source[end] == '[':
+                    in_class = True
+                elif source[end] == ']':
+                    in_class = False
+                end += 1
+            out.append(source[index:end + 1])
+            index, last = end + 1, '/'
+        else:
+            out.append(char)
+            index += 1
+            if not char.isspace():
+                last = char
+            elif char == '\n':
+                last = '\n'
+    lines = (line.strip() for line in ''.join(out).split('\n'))
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+def minify_css(source):
+    """Remove comments and collapse whitespace in CSS."""
+    punctuation = '{};,>'
+    out = []
+    index, length = 0, len(source)
+    while index < length:
+        char = source[index]
+        if char in '\'"':
+            end = _skip_string(source, index)
+            out.append(source[index:end])
+            index = end
+        elif source.startswith('/*', index):
+            end = source.find('*/', index + 2)
+            index = length if end == -1 else end + 2
+        elif char.isspace():
+            while index < length and source[index].isspace():
+                index += 1
+            if out and out[-1] not in punctuation and index < length and source[index] not in punctuation:
+                out.append(' ')
+        else:
+            if char in punctuation and out and out[-1] == ' ':
+                out.pop()
+            if char == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(char)
+            index += 1
+    return ''.join(out).strip()
+
+
+def parse_css(source):
+    """
+    Split a stylesheet into [(prelude, body)]; the body of a block at-rule
+    (@media, @supports) is itself parsed, other bodies stay text.
+    """
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    rules = []
+    index, length = 0, len(source)
+    while index < length:
+        start = source.find('{', index)
+        semicolon = source.find(';', index)
+        if start == -1:
+            break
+        if semicolon != -1 and semicolon < start:
+            # Statement at-rule such as @import or @charset
+            rules.append((source[index:semicolon].strip(), None))
+            index = semicolon + 1
+            continue
+        depth, end = 1, start + 1
+        while end < length and depth:
+            if source[end] in '\'"':
+                end = _skip_string(source, end)
+                continue
+            depth += {'{': 1, '}': -1}.get(source[end], 0)
+            end += 1
+        prelude, body = source[index:start].strip(), source[start + 1:end - 1]
+        if prelude.startswith(('@media', '@supports')):
+            body = parse_css(body)
+        rules.append((prelude, body))
+        index = end
+    return rules
+
+
+def markup_tokens(markup):
+    """Return the (classes, ids, attributes, tags) used in HTML ``markup``."""
+    markup = _TEMPLATE_SYNTAX_RE.sub(' ', markup)
+    classes = {name for value in _CLASS_ATTR_RE.findall(markup) for name in value.split()}
+    ids = set(_ID_ATTR_RE.findall(markup))
+    attributes = set(_ATTR_RE.findall(markup))
+    tags = set(_TAG_RE.findall(markup)) | {'html', 'body'}
+    return classes, ids, attributes, tags
+
+
+def selector_matches(selector, tokens):
+    """Whether every class, id, attribute and tag of ``selector`` appears in ``tokens``."""
+    classes, ids, attributes, tags = tokens
+    selector = selector.strip()
+    if selector in ALWAYS_CRITICAL:
+        return True
+    bare = _SELECTOR_PSEUDO_RE.sub('', selector)
+    return (
+        all(name in classes for name in _SELECTOR_CLASS_RE.findall(bare))
+        and all(name in ids for name in _SELECTOR_ID_RE.findall(bare))
+        and all(name in attributes for name in _SELECTOR_ATTR_RE.findall(bare))
+        and all(name.lower() in tags for name in _SELECTOR_TAG_RE.findall(re.sub(r'\[[^\]]*\]', '', bare)))
+    )
+
+
+def _critical_rules(rules, tokens):
+    kept = []
+    for prelude, body in rules:
+        if prelude.startswith('@'):
+            if isinstance(body, list):
+                inner = _critical_rules(body, tokens)
+                if inner:
+                    kept.append(f'{prelude}{{{inner}}}')
+            elif body is None:
+                kept.append(f'{prelude};')
+            # @keyframes and @font-face are added when used, or left for later
+            continue
+        selectors = [selector for selector in prelude.split(',') if selector_matches(selector, tokens)]
+        if selectors:
+            kept.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(kept)
+
+
+def extract_critical_css(stylesheet, markup):
+    """Return the minified rules of ``stylesheet`` that apply to ``markup``."""
+    rules = parse_css(stylesheet)
+    critical = _critical_rules(rules, markup_tokens(markup))
+    # Animations of the critical rules need their keyframes
+    animations = set(_ANIMATION_RE.findall(critical))
+    for prelude, body in rules:
+        match = _KEYFRAMES_RE.match(prelude)
+        if match and match.group(1) in animations:
+            critical += f'{prelude}{{{body}}}'
+    return minify_css(critical)
+
+
+def template_source(template_name):
+    """Return a template's source with the templates it {% include %}s by name inlined."""
+    source = get_template(template_name).template.source
+    return _INCLUDE_RE.sub(lambda match: template_source(match.group(1)), source)
+
+
+def critical_markup(template_name):
+    """Return the part of a template's source between the critical markers."""
+    source = template_source(template_name)
+    start, end = source.find(CRITICAL_START), source.find(CRITICAL_END)
+    if start == -1 or end == -1:
+        raise ValueError(f'{template_name} has no {CRITICAL_START} ... {CRITICAL_END} block')
+    return source[start + len(CRITICAL_START):end]
+
+
+def build_critical_css(name):
+    stylesheet, template_name = settings.CRITICAL_CSS[name]
+    return extract_critical_css(read_source(stylesheet), critical_markup(template_name))
+
+
+def build_bundle(name):
+    sources = settings.ASSET_BUNDLES[name]
+    return ''.join(minify_js(read_source(source)) for source in sources)
+
+
+def build_all():
+    """Return {static name: content} of every bundle and critical stylesheet."""
+    built = {name: build_bundle(name) for name in settings.ASSET_BUNDLES}
+    built.update((name, build_critical_css(name)) for name in settings.CRITICAL_CSS)
+    return built
+
+
+def _collected(name):
+    """Return the collected file ``name`` as text, or None before collectstatic."""
+    if settings.DEBUG:
+        return None
+    try:
+        with staticfiles_storage.open(staticfiles_storage.stored_name(name)) as file:
+            return file.read().decode()
+    except (ValueError, OSError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _critical_css(name):
+    content = _collected(name)
+    return build_critical_css(name) if content is None else content
+
+
+def critical_css(name):
+    """Return the critical CSS ``name`` (rebuilt on every call in DEBUG)."""
+    if settings.DEBUG:
+        return build_critical_css(name)
+    return _critical_css(name)
+
+
+def bundle_urls(name):
+    """Return the script URLs of bundle ``name``: the bundle, or its sources before collectstatic."""
+    if not settings.DEBUG:
+        try:
+            return [staticfiles_storage.url(name)]
+        except ValueError:
+            pass
+    return [staticfiles_storage.url(source) for source in settings.ASSET_BUNDLES[name]]
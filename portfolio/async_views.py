@@ -0,0 +1,303 @@
+"""
+Async versions of the read-only API list endpoints and the homepage.
+
+These are used when the site runs under ASGI (config/asgi.py turns on
+settings.ASYNC_VIEWS), so a worker waiting on the database or the cache can
+serve other requests meanwhile. They fetch rows with the async ORM and
+reuse the sync viewsets for filtering, validators, pagination links and
+serializer plans, so the responses are byte-for-byte the same. Requests the
+async path doesn't cover (keyset cursors, FAST_SERIALIZERS off) are handed
+to the sync viewset.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .bootstrap import get_etag, parse_sections
+from .cache import (
+    fill_csrf_token, get_cached_fragments, get_cached_page, set_cached_page, strip_csrf_token
+)
+from .fastserializers import get_plan
+from .models import (
+    Profile, Service, TimelineEntry, Skill,
+    ProjectCategory, Project, Testimonial, Client,
+    BlogPost
+)
+from .replicas import use_primary
+from .streaming import astream_template
+from .views import (
+    ProfileViewSet, ServiceViewSet, TimelineViewSet, SkillViewSet,
+    ProjectCategoryViewSet, ProjectViewSet, TechnologyViewSet, TestimonialViewSet,
+    ClientViewSet, BlogPostViewSet, PortfolioHomeView
+)
+from . import snapshots
+
+
+def render_json(data, status=200):
+    """A response rendered exactly like DRF's JSONRenderer would."""
+    response = HttpResponse(
+        JSONRenderer().render(data), status=status, content_type='application/json'
+    )
+    response['Allow'] = 'GET, HEAD, OPTIONS'
+    return response
+
+
+async def apaginate_queryset(paginator, queryset, request):
+    """DRF PageNumberPagination.paginate_queryset with an async count and fetch."""
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    # Paginator.count is a cached_property; fill it in without a sync query
+    django_paginator.count = await queryset.acount()
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(
+            page_number=page_number, message=str(exc)
+        ))
+    page.object_list = [row async for row in page.object_list]
+
+    paginator.page = page
+    paginator.request = request
+    return page.object_list
+
+
+class AsyncListView(View):
+    """Async GET of a read-only viewset's list action."""
+    viewset_class = None
+    replica_reads = True
+
+    def get_viewset(self, request):
+        viewset = self.viewset_class(
+            request=Request(request), format_kwarg=None,
+            action='list', args=(), kwargs={},
+        )
+        viewset.headers = {}
+        return viewset
+
+    def use_sync_view(self, viewset):
+        cursor_param = getattr(viewset.paginator, 'cursor_query_param', None)
+        return not settings.FAST_SERIALIZERS or cursor_param in viewset.request.query_params
+
+    async def sync_list(self, request, *args, **kwargs):
+        view = self.viewset_class.as_view({'get': 'list'})
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request)
+        if self.use_sync_view(viewset):
+            return await self.sync_list(request, *args, **kwargs)
+
+        validators = await viewset.aget_list_validators()
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            try:
+                response = render_json(await self.get_data(viewset))
+            except NotFound as exc:
+                return render_json({'detail': exc.detail}, status=exc.status_code)
+        viewset.set_validators(response, validators)
+        patch_cache_control(response, **viewset.cache_control)
+        return response
+
+    async def get_data(self, viewset):
+        plan = get_plan(viewset.get_serializer_class())
+        queryset = plan.values(viewset.filter_queryset(viewset.get_queryset()))
+        context = viewset.get_serializer_context()
+
+        page = await apaginate_queryset(viewset.paginator, queryset, viewset.request)
+        if page is None:
+            return plan.serialize([row async for row in queryset], context)
+        return viewset.get_paginated_response(plan.serialize(page, context)).data
+
+
+class AsyncProfileView(AsyncListView):
+    viewset_class = ProfileViewSet
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request)
+        profile = await Profile.objects.afirst()
+        if profile is None:
+            return render_json({"detail": "Profile not found"}, status=404)
+
+        validators = viewset.get_object_validators(profile)
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render_json(viewset.get_serializer(profile).data)
+        viewset.set_validators(response, validators)
+        patch_cache_control(response, **viewset.cache_control)
+        return response
+
+
+class AsyncServiceList(AsyncListView):
+    viewset_class = ServiceViewSet
+
+
+class AsyncTimelineList(AsyncListView):
+    viewset_class = TimelineViewSet
+
+
+class AsyncSkillList(AsyncListView):
+    viewset_class = SkillViewSet
+
+
+class AsyncProjectCategoryList(AsyncListView):
+    viewset_class = ProjectCategoryViewSet
+
+
+class AsyncProjectList(AsyncListView):
+    viewset_class = ProjectViewSet
+
+
+class AsyncTechnologyList(AsyncListView):
+    viewset_class = TechnologyViewSet
+
+
+class AsyncTestimonialList(AsyncListView):
+    viewset_class = TestimonialViewSet
+
+
+class AsyncClientList(AsyncListView):
+    viewset_class = ClientViewSet
+
+
+class AsyncBlogPostList(AsyncListView):
+    viewset_class = BlogPostViewSet
+
+
+class AsyncBootstrapView(View):
+    """Async BootstrapView; missing sections are serialized concurrently."""
+    replica_reads = True
+
+    async def get(self, request, *args, **kwargs):
+        sections = parse_sections(request.GET.get('include', ''))
+        if not sections:
+            return render_json({"detail": "No known sections in 'include'."}, status=400)
+
+        etag = await sync_to_async(get_etag)(request, sections)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                await snapshots.aget_bootstrap(request, sections), content_type='application/json'
+            )
+            response['Allow'] = 'GET, HEAD, OPTIONS'
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+
+
+# Homepage section ({% cached_section %}) -> context variables it renders
+FRAGMENT_CONTEXT = {
+    'services': ['services'],
+    'testimonials': ['testimonials'],
+    'clients': ['clients'],
+    'timeline': ['education', 'experience'],
+    'skills': ['skills'],
+    'projects': ['categories', 'projects'],
+    'blog': ['blog_posts'],
+}
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset]
+
+
+class AsyncPortfolioHomeView(PortfolioHomeView):
+    """PortfolioHomeView whose sections are fetched with concurrent async queries."""
+
+    # Context variables shown by each partial of the template; a streamed
+    # page sends every partial once its variables are fetched
+    part_context = {
+        'portfolio/home/sidebar.html': ['profile'],
+        'portfolio/home/about.html': ['profile', 'services', 'testimonials', 'clients'],
+        'portfolio/home/resume.html': ['education', 'experience', 'skills'],
+        'portfolio/home/portfolio.html': ['categories', 'projects'],
+        'portfolio/home/blog.html': ['blog_posts'],
+    }
+
+    async def get(self, request, *args, **kwargs):
+        content = await sync_to_async(get_cached_page)(self.cache_name, request)
+        if content is not None:
+            return HttpResponse(content)
+
+        content = await snapshots.aget_page(self.cache_name)
+        if content is None and settings.HOMEPAGE_STREAMING:
+            # The CSRF cookie goes out with the headers, before the form renders
+            get_token(request)
+            return StreamingHttpResponse(self.astream(request, kwargs))
+        if content is None:
+            # From the primary, like the snapshot sections
+            with use_primary():
+                context = await self.aget_context_data(**kwargs)
+                content = strip_csrf_token(
+                    await sync_to_async(render_to_string)(self.template_name, context, request)
+                )
+            await sync_to_async(snapshots.save_page)(self.cache_name, content)
+        await sync_to_async(set_cached_page)(
+            self.cache_name, content, settings.HOMEPAGE_CACHE_TIMEOUT
+        )
+        return HttpResponse(fill_csrf_token(content, request))
+
+    async def astream(self, request, kwargs):
+        """Yield the rendered page part by part, then cache it like get() does."""
+        parts = []
+        with use_primary():
+            fragments = await self.aget_fragments()
+            pending = self.start_queries(fragments)
+            context = {'view': self, **kwargs, 'section_fragments': fragments}
+            async for part in astream_template(self.template_name, context, request, pending, self.part_context):
+                parts.append(part)
+                yield part
+        content = strip_csrf_token(''.join(parts))
+        await sync_to_async(snapshots.save_page)(self.cache_name, content)
+        await sync_to_async(set_cached_page)(
+            self.cache_name, content, settings.HOMEPAGE_CACHE_TIMEOUT
+        )
+
+    async def aget_context_data(self, **kwargs):
+        fragments = await self.aget_fragments()
+        pending = self.start_queries(fragments)
+        results = await asyncio.gather(*pending.values())
+        return {'view': self, **kwargs, **dict(zip(pending, results)), 'section_fragments': fragments}
+
+    async def aget_fragments(self):
+        """Return the cached {% cached_section %} fragments of the page."""
+        if not settings.HOMEPAGE_SECTION_CACHE:
+            return {}
+        return await sync_to_async(get_cached_fragments)(list(FRAGMENT_CONTEXT))
+
+    def start_queries(self, fragments):
+        """Start fetching every context variable; return {name: task}."""
+        # Cached sections are rendered from the cache, without their rows
+        cached = {name for section in fragments for name in FRAGMENT_CONTEXT[section]}
+        querysets = {
+            'services': Service.objects.filter(is_active=True),
+            'education': TimelineEntry.objects.filter(type='education', is_active=True),
+            'experience': TimelineEntry.objects.filter(type='experience', is_active=True),
+            'skills': Skill.objects.filter(is_active=True),
+            'categories': ProjectCategory.objects.all(),
+            'projects': Project.objects.filter(is_active=True).select_related('category'),
+            'testimonials': Testimonial.objects.filter(is_active=True),
+            'clients': Client.objects.filter(is_active=True),
+            'blog_posts': BlogPost.objects.filter(is_published=True)[:6],
+        }
+        tasks = {'profile': asyncio.ensure_future(Profile.objects.afirst())}
+        tasks.update(
+            (name, asyncio.ensure_future(_list(queryset)))
+            for name, queryset in querysets.items() if name not in cached
+        )
+        return tasks
@@ -0,0 +1,349 @@
+"""
+Helpers shared by the benchmark management commands: synthetic content,
+timing, rolled-back scratch transactions and driving a local gunicorn.
+"""
+import asyncio
+import datetime
+import os
+import random
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageDraw
+
+from .images import generate_renditions
+from .models import (
+    Profile, Service, TimelineEntry, Skill,
+    ProjectCategory, Project, Technology, Testimonial, Client,
+    BlogPost, ContactMessage, parse_technologies
+)
+
+BATCH_SIZE = 1000
+EPOCH = datetime.date(2000, 1, 1)
+TECHNOLOGIES = ['Django, React, SQLite', 'Django, Vue, PostgreSQL', 'Flask, React', 'Node.js, React, PostgreSQL']
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def scratch_transaction():
+    """Run the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def _day(i):
+    return EPOCH + datetime.timedelta(days=i % 9000)
+
+
+def _build(model, rows, make):
+    model.objects.bulk_create(
+        (make(i) for i in range(rows)), batch_size=BATCH_SIZE
+    )
+
+
+def _tag_projects():
+    # bulk_create skips the post_save handler that tags projects
+    projects = {
+        pk: parse_technologies(technologies)
+        for pk, technologies in Project.objects.values_list('pk', 'technologies')
+    }
+    names = {slug: name for tags in projects.values() for slug, name in tags.items()}
+    Technology.objects.bulk_create(
+        [Technology(name=name, slug=slug) for slug, name in names.items()], ignore_conflicts=True
+    )
+    ids = dict(Technology.objects.values_list('slug', 'pk'))
+    Tag = Project.tags.through
+    Tag.objects.bulk_create(
+        (Tag(project_id=pk, technology_id=ids[slug]) for pk, tags in projects.items() for slug in tags),
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+
+
+def seed_content(rows):
+    """Insert ``rows`` synthetic rows into every list model."""
+    _build(Service, rows, lambda i: Service(
+        name=f'Service {i}', description='Benchmark service',
+        order=i % 50, is_active=i % 10 != 0,
+    ))
+    _build(TimelineEntry, rows, lambda i: TimelineEntry(
+        type='education' if i % 2 else 'experience', title=f'Entry {i}',
+        institution='Benchmark', start_date=_day(i), description='Benchmark entry',
+        order=i % 50, is_active=i % 10 != 0,
+    ))
+    _build(Skill, rows, lambda i: Skill(
+        name=f'Skill {i}', proficiency=i % 100, order=i % 50, is_active=i % 10 != 0,
+    ))
+    categories = ProjectCategory.objects.bulk_create(
+        ProjectCategory(name=f'Bench category {i}', slug=f'bench-category-{i}')
+        for i in range(10)
+    )
+    _build(Project, rows, lambda i: Project(
+        title=f'Project {i}', description='Benchmark project',
+        image='projects/benchmark.jpg', category=categories[i % len(categories)],
+        technologies=TECHNOLOGIES[i % len(TECHNOLOGIES)], created_date=_day(i),
+        featured=i % 20 == 0, order=i % 50, is_active=i % 10 != 0,
+    ))
+    _tag_projects()
+    _build(Testimonial, rows, lambda i: Testimonial(
+        client_name=f'Client {i}', client_avatar='testimonials/benchmark.jpg',
+        content='Benchmark testimonial', date=_day(i), order=i % 50,
+        is_active=i % 10 != 0,
+    ))
+    _build(Client, rows, lambda i: Client(
+        name=f'Client {i}', logo='clients/benchmark.png', order=i % 50,
+        is_active=i % 10 != 0,
+    ))
+    _build(BlogPost, rows, lambda i: BlogPost(
+        title=f'Benchmark post {i}', slug=f'benchmark-post-{i}',
+        content=f'Benchmark content for post number {i}. ' * 20,
+        excerpt=f'Benchmark excerpt {i}', featured_image='blog/benchmark.jpg',
+        category=('Design', 'Development', 'Django')[i % 3],
+        published_date=_day(i), featured=i % 20 == 0, is_published=i % 10 != 0,
+        view_count=i,
+    ))
+    _build(ContactMessage, rows, lambda i: ContactMessage(
+        full_name=f'Sender {i}', email=f'sender{i}@example.com',
+        message='Benchmark message',
+    ))
+
+
+def measure(func, repeat=5):
+    """Call ``func`` ``repeat`` times; return (median, best) wall time in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), min(timings)
+
+
+
+def generate_images(count, seed=0):
+    """Save ``count`` distinct synthetic JPEGs to the media storage; return their names."""
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        image = Image.new('RGB', (1280, 800), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        # Some detail so the encoder has real work to do
+        for _ in range(40):
+            x, y = rng.randrange(1280), rng.randrange(800)
+            box = (x, y, x + rng.randrange(20, 400), y + rng.randrange(20, 300))
+            draw.rectangle(box, fill=tuple(rng.randrange(256) for _ in range(3)))
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        names.append(default_storage.save(f'bench/image-{i}.jpg', ContentFile(buffer.getvalue())))
+    return names
+
+
+def seed_site(projects, posts, testimonials, clients, images=10, seed=0):
+    """
+    Insert a complete synthetic site: a profile, a few services, timeline
+    entries, skills and categories, and the given number of projects, blog
+    posts, testimonials and clients, sharing ``images`` generated images
+    (with renditions) between them.
+    """
+    names = generate_images(images, seed)
+    renditions = {name: generate_renditions(Project(image=name).image) for name in names}
+
+    def image(i):
+        name = names[i % len(names)]
+        return {'name': name, 'renditions': renditions[name]}
+
+    Profile.objects.create(
+        name='Benchmark Owner', title='Developer', bio='Benchmark profile',
+        email='owner@example.com', phone='000', birthday=EPOCH, location='Benchmark',
+        avatar=image(0)['name'], renditions=image(0)['renditions'],
+    )
+    _build(Service, 6, lambda i: Service(
+        name=f'Service {i}', description='Benchmark service', order=i,
+    ))
+    _build(TimelineEntry, 8, lambda i: TimelineEntry(
+        type='education' if i % 2 else 'experience', title=f'Entry {i}',
+        institution='Benchmark', start_date=_day(i), description='Benchmark entry', order=i,
+    ))
+    _build(Skill, 12, lambda i: Skill(name=f'Skill {i}', proficiency=50 + i * 4, order=i))
+    categories = ProjectCategory.objects.bulk_create(
+        ProjectCategory(name=f'Bench category {i}', slug=f'bench-category-{i}')
+        for i in range(5)
+    )
+    _build(Project, projects, lambda i: Project(
+        title=f'Project {i}', description='Benchmark project',
+        image=image(i)['name'], renditions=image(i)['renditions'],
+        category=categories[i % len(categories)], technologies=TECHNOLOGIES[i % len(TECHNOLOGIES)],
+        created_date=_day(i), featured=i % 5 == 0, order=i,
+    ))
+    _tag_projects()
+    _build(Testimonial, testimonials, lambda i: Testimonial(
+        client_name=f'Client {i}', content='Benchmark testimonial', date=_day(i),
+        client_avatar=image(i)['name'], renditions=image(i)['renditions'], order=i,
+    ))
+    _build(Client, clients, lambda i: Client(
+        name=f'Client {i}', logo=image(i)['name'], renditions=image(i)['renditions'], order=i,
+    ))
+    _build(BlogPost, posts, lambda i: BlogPost(
+        title=f'Benchmark post {i}', slug=f'benchmark-post-{i}',
+        content=f'Benchmark content for post number {i}. ' * 40,
+        excerpt=f'Benchmark excerpt {i}',
+        featured_image=image(i)['name'], renditions=image(i)['renditions'],
+        category=('Design', 'Development', 'Django')[i % 3],
+        published_date=_day(i), featured=i % 10 == 0, view_count=i,
+    ))
+
+
+def site_env(workdir):
+    """Environment of a throwaway benchmark site keeping all its files in ``workdir``."""
+    env = os.environ.copy()
+    env.update({
+        'DEBUG': 'False',
+        'DATABASE_PATH': str(workdir / 'db.sqlite3'),
+        'MEDIA_ROOT': str(workdir / 'media'),
+        'CACHE_DIR': str(workdir / 'cache'),
+        'CONTACT_SPOOL_DIR': str(workdir / 'spool'),
+        'THROTTLE_DB': str(workdir / 'throttle.sqlite3'),
+        # contact_request() spreads the submissions over X-Forwarded-For addresses
+        'NUM_PROXIES': '1',
+        'EXPORT_DIR': str(workdir / 'export'),
+        'METRICS_ENABLED': 'True',
+        'METRICS_DIR': str(workdir / 'metrics'),
+        'METRICS_FLUSH_INTERVAL': '1',
+        'METRICS_TOKEN': secrets.token_hex(16),
+    })
+    return env
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# Gunicorn arguments of each way the site is deployed
+SERVERS = {
+    'wsgi': ['config.wsgi:application'],
+    'asgi': ['config.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+def start_server(name, port, workers, env=None):
+    """Start gunicorn for the ``name`` deployment and wait until it accepts connections."""
+    command = [
+        sys.executable, '-m', 'gunicorn', *SERVERS[name],
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+        '--backlog', '2048', '--log-level', 'warning',
+    ]
+    server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env or os.environ.copy())
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'{name} server exited with code {server.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'{name} server did not start')
+
+
+def process_rss(pid):
+    """Resident memory of process ``pid`` in bytes (0 if unknown)."""
+    try:
+        with open(f'/proc/{pid}/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def child_pids(pid):
+    """Pids of the processes whose parent is ``pid`` (gunicorn workers)."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # The command name may contain spaces; the parent pid follows it
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+class HTTPClient:
+    """One HTTP/1.1 keep-alive connection to a local server."""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        """Send one request; return (status, response headers, body)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        head = [f'{method} {path} HTTP/1.1', 'Host: localhost', 'Connection: keep-alive']
+        head += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        if body:
+            head.append(f'Content-Length: {len(body)}')
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        response_head = await self.reader.readuntil(b'\r\n\r\n')
+        status = int(response_head.split(b' ', 2)[1])
+        response_headers = {}
+        for line in response_head.split(b'\r\n')[1:]:
+            if b':' in line:
+                name, value = line.split(b':', 1)
+                response_headers[name.strip().lower()] = value.strip().lower()
+        if response_headers.get(b'transfer-encoding') == b'chunked':
+            content = await self.read_chunked()
+        else:
+            content = await self.reader.readexactly(int(response_headers.get(b'content-length', 0)))
+        # Sync gunicorn workers close the connection after every response
+        if response_headers.get(b'connection') == b'close':
+            await self.close()
+        return status, response_headers, content
+
+    async def read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            if not size:
+                # No trailers are sent
+                await self.reader.readuntil(b'\r\n')
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    async def get(self, path):
+        status, headers, content = await self.request('GET', path)
+        return status
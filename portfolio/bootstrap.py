@@ -0,0 +1,102 @@
+"""
+Aggregated bootstrap payload for the SPA client.
+
+Defines the homepage sections and how each is serialized. The serialized
+sections are stored in HomepageSnapshot rows (see snapshots.py), so
+/api/bootstrap/ answers from one primary-key lookup and can be revalidated
+as a whole with one ETag.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .cache import get_content_version, get_section_versions
+from .fastserializers import aserialize_queryset, serialize_queryset
+from .models import (
+    Profile, Service, TimelineEntry, Skill,
+    ProjectCategory, Project, Testimonial, Client,
+    BlogPost
+)
+from .serializers import (
+    ProfileSerializer, ServiceSerializer, TimelineEntrySerializer,
+    SkillSerializer, ProjectCategorySerializer, ProjectSerializer,
+    TestimonialSerializer, ClientSerializer, BlogPostListSerializer
+)
+
+# Section name -> (serializer class, queryset)
+SECTIONS = {
+    'profile': (ProfileSerializer, Profile.objects.order_by('pk')[:1]),
+    'services': (ServiceSerializer, Service.objects.filter(is_active=True)),
+    'timeline': (TimelineEntrySerializer, TimelineEntry.objects.filter(is_active=True)),
+    'skills': (SkillSerializer, Skill.objects.filter(is_active=True)),
+    'categories': (ProjectCategorySerializer, ProjectCategory.objects.annotate(
+        projects_count=Count('projects', filter=Q(projects__is_active=True))
+    ).order_by('name')),
+    'projects': (ProjectSerializer, Project.objects.filter(is_active=True).select_related('category')),
+    'testimonials': (TestimonialSerializer, Testimonial.objects.filter(is_active=True)),
+    'clients': (ClientSerializer, Client.objects.filter(is_active=True)),
+    # Same first page as /api/blog/
+    'blog': (BlogPostListSerializer, BlogPost.objects.filter(is_published=True)[:settings.REST_FRAMEWORK['PAGE_SIZE']]),
+}
+
+# Sections holding one object (or null) rather than a list
+SINGLE_SECTIONS = {'profile'}
+
+# Sections whose snapshot is refreshed outside content edits (view counts),
+# each with a version of its own in the ETag
+LIVE_SECTIONS = ['blog']
+
+# Section name -> models whose rows it shows
+SECTION_MODELS = {
+    'profile': [Profile],
+    'services': [Service],
+    'timeline': [TimelineEntry],
+    'skills': [Skill],
+    # Categories carry their active project counts
+    'categories': [ProjectCategory, Project],
+    'projects': [Project, ProjectCategory],
+    'testimonials': [Testimonial],
+    'clients': [Client],
+    'blog': [BlogPost],
+}
+
+
+def sections_for_model(model):
+    """Return the sections showing rows of ``model``."""
+    return [section for section, models in SECTION_MODELS.items() if model in models]
+
+
+def _section_data(section, data):
+    if section in SINGLE_SECTIONS:
+        return data[0] if data else None
+    return data
+
+
+def build_section(section, context):
+    serializer_class, queryset = SECTIONS[section]
+    return _section_data(section, serialize_queryset(serializer_class, queryset.all(), context))
+
+
+async def abuild_section(section, context):
+    serializer_class, queryset = SECTIONS[section]
+    return _section_data(section, await aserialize_queryset(serializer_class, queryset.all(), context))
+
+
+def parse_sections(include):
+    """Return the requested section names in canonical order (all when empty)."""
+    if not include:
+        return list(SECTIONS)
+    requested = {name.strip() for name in include.split(',')}
+    return [name for name in SECTIONS if name in requested]
+
+
+def _origin(request):
+    # Serialized media URLs are absolute, so responses differ per origin
+    return f'{request.scheme}://{request.get_host()}'
+
+
+def get_etag(request, sections):
+    versions = get_section_versions([section for section in LIVE_SECTIONS if section in sections])
+    data = '|'.join([get_content_version(), *versions.values(), _origin(request), *sections])
+    return '"%s"' % hashlib.md5(data.encode(), usedforsecurity=False).hexdigest()
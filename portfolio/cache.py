@@ -0,0 +1,177 @@
+"""
+Content-versioned caching for the rendered portfolio pages.
+
+Every admin edit of a content model bumps a content version (see signals.py).
+Cached pages are keyed by that version, and by the collected static files'
+manifest hash, which changes with the CSS and scripts a page inlines or
+links to, so stale entries are never served and simply age out of the cache
+backend.
+
+The homepage sections are also cached on their own as rendered fragments
+(``{% cached_section %}``), keyed by a version per model they show, so that
+editing one model re-renders only the sections showing it.
+
+Bootstrap sections whose stored snapshot changes outside content edits (the
+blog's view counts) have a version of their own, part of the bootstrap ETag.
+"""
+import re
+import threading
+import uuid
+from collections import Counter
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+
+CONTENT_VERSION_KEY = 'portfolio:content-version'
+PAGE_KEY_TEMPLATE = 'portfolio:page:{name}:{version}:{static_version}'
+MODEL_VERSION_KEY_TEMPLATE = 'portfolio:model-version:{model}'
+SECTION_VERSION_KEY_TEMPLATE = 'portfolio:section-version:{section}'
+FRAGMENT_KEY_TEMPLATE = 'portfolio:section:{section}:{versions}:{static_version}'
+
+# Homepage section -> labels of the models whose rows it shows
+FRAGMENT_MODELS = {
+    'services': ['portfolio.service'],
+    'testimonials': ['portfolio.testimonial'],
+    'clients': ['portfolio.client'],
+    'timeline': ['portfolio.timelineentry'],
+    'skills': ['portfolio.skill'],
+    'projects': ['portfolio.project', 'portfolio.projectcategory'],
+    'blog': ['portfolio.blogpost'],
+}
+
+# The rendered form carries a per-visitor CSRF token; it is swapped for a
+# placeholder before storing and filled in again for every response.
+CSRF_PLACEHOLDER = '__PORTFOLIO_CSRF_TOKEN__'
+_CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+# Page cache hits and misses of this process. Counting them in the cache
+# backend would add a read and a write of a cache file to every page view.
+_page_stats = Counter()
+_page_stats_lock = threading.Lock()
+
+
+def get_content_version():
+    """Return the current content version, creating one if needed."""
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        # A random version (rather than a counter) can never collide with
+        # pages cached before the key was evicted.
+        version = uuid.uuid4().hex
+        if not cache.add(CONTENT_VERSION_KEY, version, None):
+            version = cache.get(CONTENT_VERSION_KEY, version)
+    return version
+
+
+def bump_content_version():
+    """Invalidate every cached page by moving to a new content version."""
+    version = uuid.uuid4().hex
+    cache.set(CONTENT_VERSION_KEY, version, None)
+    return version
+
+
+def _get_versions(keys):
+    """Return {name: version} of the cache ``keys`` ({key: name}), creating missing ones."""
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    for key, name in keys.items():
+        if name not in versions:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[name] = version
+    return versions
+
+
+def get_model_versions(labels):
+    """Return the current version of each model label, creating missing ones."""
+    return _get_versions({MODEL_VERSION_KEY_TEMPLATE.format(model=label): label for label in labels})
+
+
+def bump_model_version(model):
+    """Invalidate the cached sections showing rows of ``model``."""
+    cache.set(MODEL_VERSION_KEY_TEMPLATE.format(model=model._meta.label_lower), uuid.uuid4().hex, None)
+
+
+def get_section_versions(sections):
+    """Return the current version of each bootstrap section, creating missing ones."""
+    return _get_versions({SECTION_VERSION_KEY_TEMPLATE.format(section=section): section for section in sections})
+
+
+def bump_section_version(section):
+    """Change the bootstrap ETags of responses including ``section``."""
+    cache.set(SECTION_VERSION_KEY_TEMPLATE.format(section=section), uuid.uuid4().hex, None)
+
+
+def bump_versions(keys):
+    """Move the version ``keys`` (any of the above) to new values."""
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def get_static_version():
+    """Return the hash of the collected static files' manifest ('' without one)."""
+    return getattr(staticfiles_storage, 'manifest_hash', '')
+
+
+def _page_key(name):
+    return PAGE_KEY_TEMPLATE.format(
+        name=name, version=get_content_version(), static_version=get_static_version()
+    )
+
+
+def fragment_key(section):
+    """Return the cache key of ``section``'s fragment for the current model versions."""
+    labels = FRAGMENT_MODELS[section]
+    versions = get_model_versions(labels)
+    return FRAGMENT_KEY_TEMPLATE.format(
+        section=section,
+        versions='.'.join(versions[label] for label in labels),
+        static_version=get_static_version(),
+    )
+
+
+def get_cached_fragments(sections):
+    """Return {section: rendered HTML} of the ``sections`` that are cached."""
+    keys = {fragment_key(section): section for section in sections}
+    return {keys[key]: content for key, content in cache.get_many(keys).items()}
+
+
+def strip_csrf_token(content, placeholder=CSRF_PLACEHOLDER):
+    """Swap the rendered form's CSRF token for ``placeholder``."""
+    return _CSRF_INPUT_RE.sub(lambda match: match.group(1) + placeholder + match.group(2), content)
+
+
+def fill_csrf_token(content, request):
+    """Put this request's CSRF token in place of the placeholder."""
+    return content.replace(CSRF_PLACEHOLDER, get_token(request))
+
+
+def get_cached_page(name, request):
+    """Return the cached HTML for ``name`` with this request's CSRF token, or None."""
+    content = cache.get(_page_key(name))
+    with _page_stats_lock:
+        _page_stats['misses' if content is None else 'hits'] += 1
+    if content is None:
+        return None
+    return fill_csrf_token(content, request)
+
+
+def set_cached_page(name, content, timeout=None):
+    """Store rendered HTML for ``name`` under the current content version."""
+    cache.set(_page_key(name), strip_csrf_token(content), timeout)
+
+
+def get_page_cache_stats():
+    """Return this process's page cache hit/miss counters."""
+    hits, misses = _page_stats['hits'], _page_stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+        'version': get_content_version(),
+    }
+
+
+def reset_page_cache_stats():
+    with _page_stats_lock:
+        _page_stats.clear()
@@ -0,0 +1,177 @@
+"""
+Buffered blog post view counter.
+
+Reading a blog post used to write its view_count straight away, taking the
+SQLite write lock once per read. Views are now accumulated in process memory
+and applied in batches with atomic F() updates, either when enough views are
+pending or from a background flusher every VIEW_COUNT_FLUSH_INTERVAL seconds.
+Each flush also adds the views to the posts' BlogPostDailyViews row of the
+day, the history the blog analytics export reads.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import snapshots
+from .models import BlogPost, BlogPostDailyViews
+from .sqlite import retry_on_locked
+
+FLUSH_REQUEST_KEY = 'portfolio:view-counts:flush-requested'
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCountBuffer:
+    """Per-process buffer of blog post view increments."""
+
+    # How often the background flusher wakes up, in seconds
+    tick = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._total = 0
+        self._last_flush = time.monotonic()
+        self._flusher_pid = None
+        self._flush_request_seen = None
+
+    @property
+    def threshold(self):
+        return settings.VIEW_COUNT_FLUSH_THRESHOLD
+
+    @property
+    def interval(self):
+        return settings.VIEW_COUNT_FLUSH_INTERVAL
+
+    def record(self, pk, views=1):
+        """
+        Count ``views`` views of the post ``pk``.
+        Returns the views of ``pk`` that were not yet saved before this call
+        plus the new ones, i.e. what to add to the value read from the database.
+        """
+        self._ensure_flusher()
+        with self._lock:
+            self._pending[pk] += views
+            self._total += views
+            unsaved = self._pending[pk]
+            due = self._total >= self.threshold
+        if due:
+            try:
+                self.flush()
+            except Exception:
+                # Kept pending for the next flush; the read itself succeeded
+                logger.exception('Saving blog post view counts failed; retrying later')
+        return unsaved
+
+    def pending(self, pk):
+        """Return the views of ``pk`` recorded in this process but not yet saved."""
+        with self._lock:
+            return self._pending.get(pk, 0)
+
+    def flush(self):
+        """Write every pending increment to the database; return how many were saved."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._total = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        # One UPDATE per distinct delta rather than one per post
+        by_delta = defaultdict(list)
+        for pk, delta in pending.items():
+            by_delta[delta].append(pk)
+
+        try:
+            saved = self._save(by_delta)
+        except Exception:
+            # Put the increments back so the next flush retries them
+            with self._lock:
+                self._pending.update(pending)
+                self._total += sum(pending.values())
+            raise
+        # The blog section shows view counts (the homepage doesn't); it is
+        # only rewritten when the counts of the posts it lists changed
+        if saved:
+            try:
+                snapshots.refresh(['blog'])
+            except Exception:
+                # The counts are saved; the section catches up on its next rebuild
+                logger.exception('Refreshing the blog snapshot after saving view counts failed')
+        return sum(pending.values())
+
+    @staticmethod
+    @retry_on_locked
+    def _save(by_delta):
+        """Apply the increments; return how many posts were updated."""
+        updated = 0
+        today = timezone.now().date()
+        with transaction.atomic():
+            # Create the missing rows of the day first, so every worker's
+            # increment below is an atomic update; posts deleted since are skipped
+            posts = BlogPost.objects.filter(pk__in=[pk for pks in by_delta.values() for pk in pks])
+            BlogPostDailyViews.objects.bulk_create(
+                [BlogPostDailyViews(post_id=pk, date=today) for pk in posts.values_list('pk', flat=True)],
+                ignore_conflicts=True,
+            )
+            for delta, pks in by_delta.items():
+                updated += BlogPost.objects.filter(pk__in=pks).update(
+                    view_count=F('view_count') + delta
+                )
+                BlogPostDailyViews.objects.filter(post_id__in=pks, date=today).update(
+                    views=F('views') + delta
+                )
+        return updated
+
+    def _ensure_flusher(self):
+        # Started lazily so that every forked gunicorn worker gets its own thread
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._pending.clear()
+            self._total = 0
+        thread = threading.Thread(
+            target=self._run_flusher, name='view-count-flusher', daemon=True
+        )
+        thread.start()
+
+    def _flush_requested(self):
+        requested = cache.get(FLUSH_REQUEST_KEY)
+        if requested is None or requested == self._flush_request_seen:
+            return False
+        self._flush_request_seen = requested
+        return True
+
+    def _run_flusher(self):
+        self._flush_request_seen = cache.get(FLUSH_REQUEST_KEY)
+        while True:
+            time.sleep(self.tick)
+            due = time.monotonic() - self._last_flush >= self.interval
+            if self._flush_requested() or due:
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception('Saving blog post view counts failed; retrying on the next tick')
+                finally:
+                    connection.close()
+
+
+def request_flush():
+    """Ask every worker's flusher to write its pending views on its next tick."""
+    cache.set(FLUSH_REQUEST_KEY, time.time(), None)
+
+
+view_counts = ViewCountBuffer()
+atexit.register(view_counts.flush)
@@ -0,0 +1,266 @@
+"""
+Static export of the public site.
+
+``export_static`` renders the homepage, every JSON API list (all pages),
+every published blog post and active project, and the bootstrap payload to
+EXPORT_DIR, next to copies of the collected (hashed) static files and the
+uploaded media, so that any file server can serve the site:
+
+    index.html
+    api/services.json, api/services/page-2.json, ...
+    api/blog/<slug>.json, api/projects/<pk>.json, api/bootstrap.json
+    static/..., media/...
+
+Pages are rendered through the normal views with the host of
+EXPORT_BASE_URL, so absolute URLs point at the exported site; pagination
+links are rewritten to the exported page files.
+
+Once an export exists, saving or deleting content re-exports only the pages
+that show the changed object, in a background thread after the commit.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .cache import strip_csrf_token
+from .models import (
+    Profile, Service, TimelineEntry, Skill,
+    ProjectCategory, Project, Testimonial, Client,
+    BlogPost
+)
+from .replicas import use_primary
+from .serializers import BlogPostDetailSerializer, ProjectSerializer
+
+logger = logging.getLogger(__name__)
+
+# API list name -> models whose rows it shows
+LISTS = {
+    'profile': [Profile],
+    'services': [Service],
+    'timeline': [TimelineEntry],
+    'skills': [Skill],
+    'categories': [ProjectCategory, Project],
+    'projects': [Project, ProjectCategory],
+    'technologies': [Project],
+    'testimonials': [Testimonial],
+    'clients': [Client],
+    'blog': [BlogPost],
+}
+
+_executor = None
+_executor_pid = None
+
+
+def export_dir():
+    return Path(settings.EXPORT_DIR)
+
+
+def is_exported():
+    """True once export_static has written a site to keep up to date."""
+    return (export_dir() / 'index.html').exists()
+
+
+def _write(relative_path, content):
+    """Atomically replace ``relative_path`` under the export directory."""
+    path = export_dir() / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.export-')
+    with os.fdopen(fd, 'wb') as temp_file:
+        temp_file.write(content)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+
+
+def _remove(relative_path):
+    try:
+        (export_dir() / relative_path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+class Exporter:
+    """Renders pages through the site's own views into the export directory."""
+
+    def __init__(self):
+        base = urlsplit(settings.EXPORT_BASE_URL)
+        self.base_url = f'{base.scheme}://{base.netloc}'
+        self.secure = base.scheme == 'https'
+        self.factory = RequestFactory(HTTP_HOST=base.netloc)
+        # Requests go through the middleware and views like served ones
+        self.handler = BaseHandler()
+        self.handler.load_middleware()
+        # Details are serialized directly: the blog detail view counts a view
+        self.context = {'request': Request(self.factory.get('/', secure=self.secure))}
+        self.written = 0
+
+    def get(self, path):
+        # Files outlive the replica lag, so never render them from a replica
+        with use_primary():
+            response = self.handler.get_response(self.factory.get(path, secure=self.secure))
+            try:
+                if response.status_code == 404:
+                    return None
+                if response.status_code != 200:
+                    raise RuntimeError(f'Exporting {path} failed: HTTP {response.status_code}')
+                # Streamed when the homepage is rendered with HOMEPAGE_STREAMING
+                return response.getvalue()
+            finally:
+                response.close()
+
+    def save(self, relative_path, content):
+        _write(relative_path, content)
+        self.written += 1
+
+    def export_home(self):
+        html = self.get('/').decode()
+        # The exported form can't carry a valid CSRF token; anonymous API posts don't need one
+        self.save('index.html', strip_csrf_token(html, '').encode())
+
+    def export_bootstrap(self):
+        self.save('api/bootstrap.json', self.get('/api/bootstrap/'))
+
+    def page_path(self, name, page):
+        return f'api/{name}.json' if page == 1 else f'api/{name}/page-{page}.json'
+
+    def static_link(self, name, url):
+        if url is None:
+            return None
+        page = parse_qs(urlsplit(url).query).get('page', ['1'])[0]
+        return f'{self.base_url}/{self.page_path(name, int(page))}'
+
+    def export_list(self, name):
+        page = 1
+        while True:
+            content = self.get(f'/api/{name}/?page={page}' if page > 1 else f'/api/{name}/')
+            if content is None:
+                break
+            data = json.loads(content)
+            paginated = isinstance(data, dict) and 'results' in data and 'next' in data
+            if paginated:
+                data['next'] = self.static_link(name, data['next'])
+                data['previous'] = self.static_link(name, data['previous'])
+                content = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+            self.save(self.page_path(name, page), content)
+            if not paginated or data['next'] is None:
+                break
+            page += 1
+
+        # Drop pages past the new end of the list
+        for path in (export_dir() / 'api' / name).glob('page-*.json'):
+            if int(path.stem.split('-')[1]) > page:
+                path.unlink()
+
+    def export_detail(self, relative_path, serializer_class, instance):
+        if instance is None:
+            _remove(relative_path)
+        else:
+            data = serializer_class(instance, context=self.context).data
+            self.save(relative_path, JSONRenderer().render(data))
+
+    def export_blog_post(self, slug):
+        post = BlogPost.objects.filter(is_published=True, slug=slug).first()
+        self.export_detail(f'api/blog/{slug}.json', BlogPostDetailSerializer, post)
+
+    def export_project(self, pk):
+        project = Project.objects.filter(is_active=True, pk=pk).select_related('category').first()
+        self.export_detail(f'api/projects/{pk}.json', ProjectSerializer, project)
+
+    def prune_details(self):
+        """Remove detail pages of posts and projects that are no longer public."""
+        slugs = set(BlogPost.objects.filter(is_published=True).values_list('slug', flat=True))
+        pks = {str(pk) for pk in Project.objects.filter(is_active=True).values_list('pk', flat=True)}
+        for name, public in (('blog', slugs), ('projects', pks)):
+            # The list pages (page-<n>.json) share the directory
+            for path in (export_dir() / 'api' / name).glob('*.json'):
+                if path.stem not in public and not path.stem.startswith('page-'):
+                    path.unlink()
+
+    def export_all(self):
+        self.export_home()
+        self.export_bootstrap()
+        for name in LISTS:
+            self.export_list(name)
+        for slug in BlogPost.objects.filter(is_published=True).values_list('slug', flat=True):
+            self.export_blog_post(slug)
+        for pk in Project.objects.filter(is_active=True).values_list('pk', flat=True):
+            self.export_project(pk)
+        self.prune_details()
+
+    def export_changed(self, model, pk):
+        """Re-export the pages showing the ``model`` row ``pk`` (saved or deleted)."""
+        self.export_home()
+        self.export_bootstrap()
+        for name, models in LISTS.items():
+            if model in models:
+                self.export_list(name)
+
+        if model is BlogPost:
+            slug = BlogPost.objects.filter(pk=pk).values_list('slug', flat=True).first()
+            if slug:
+                self.export_blog_post(slug)
+            self.prune_details()
+        elif model is Project:
+            self.export_project(pk)
+        elif model is ProjectCategory:
+            # Project details show the category name
+            for project_pk in Project.objects.filter(category_id=pk, is_active=True).values_list('pk', flat=True):
+                self.export_project(project_pk)
+
+
+def copy_tree(source, target):
+    """Copy new or changed files from ``source`` to ``target``; return how many."""
+    copied = 0
+    source = Path(source)
+    if not source.is_dir():
+        return 0
+    for path in source.rglob('*'):
+        if not path.is_file():
+            continue
+        destination = Path(target) / path.relative_to(source)
+        stat = path.stat()
+        try:
+            current = destination.stat()
+            if current.st_size == stat.st_size and current.st_mtime >= stat.st_mtime:
+                continue
+        except FileNotFoundError:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, destination)
+        copied += 1
+    return copied
+
+
+def _run_in_worker(model, pk):
+    try:
+        Exporter().export_changed(model, pk)
+    except Exception:
+        logger.exception('Failed to re-export pages for %s %s', model.__name__, pk)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    # One worker so exports of consecutive edits never interleave
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='static-export')
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def schedule_export(model, pk):
+    """Re-export the affected pages once the transaction commits, if there is an export."""
+    if not settings.EXPORT_ON_SAVE or not is_exported():
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run_in_worker, model, pk))
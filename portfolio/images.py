@@ -0,0 +1,181 @@
+"""
+Responsive image renditions for uploaded images.
+
+After an image is uploaded, width-bucketed WebP and JPEG copies are written
+next to the original with content-hashed names, e.g.
+``projects/shot.3f2a9c1b7d4e.640w.webp``. The generated names are recorded in
+the model's ``renditions`` field, which serializers expose as a ``srcset``
+map and templates read through the ``srcset`` filter.
+
+Generation runs in a per-process thread pool after the transaction commits,
+so uploads in the admin don't wait for Pillow.
+"""
+import hashlib
+import logging
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .cache import bump_content_version, bump_model_version
+from .models import Profile, Service, Project, Testimonial, Client, BlogPost
+from .storage import HASH_LENGTH
+
+logger = logging.getLogger(__name__)
+
+# Image field of every model with renditions
+IMAGE_FIELDS = {
+    Profile: 'avatar',
+    Service: 'icon',
+    Project: 'image',
+    Testimonial: 'client_avatar',
+    Client: 'logo',
+    BlogPost: 'featured_image',
+}
+
+# Rendition format -> (file extension, Pillow format, save options)
+FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_pid = None
+
+
+def content_hash(field_file):
+    digest = hashlib.sha256()
+    field_file.open('rb')
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def rendition_name(source_name, digest, width, extension):
+    stem = posixpath.splitext(source_name)[0]
+    # Uploads saved by HashedMediaStorage carry the same hash already
+    stem = stem.removesuffix(f'.{digest}')
+    return f'{stem}.{digest}.{width}w.{extension}'
+
+
+def _flatten(image):
+    """Composite a transparent image onto white: JPEG would turn it black."""
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def generate_renditions(field_file):
+    """
+    Write the renditions of ``field_file`` that don't exist yet and return
+    the renditions map: {'source': name, 'webp': {width: name}, 'jpeg': {...}}.
+    Images Pillow can't read (e.g. SVG icons) only get the source entry.
+    """
+    storage = field_file.storage
+    digest = content_hash(field_file)
+
+    field_file.open('rb')
+    try:
+        image = Image.open(field_file)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (UnidentifiedImageError, OSError):
+        logger.info('No renditions for %s: not a raster image', field_file.name)
+        return {'source': field_file.name}
+    finally:
+        field_file.close()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    widths = [width for width in settings.IMAGE_RENDITION_WIDTHS if width < image.width]
+    # Always offer the original size so the largest slot is covered
+    widths.append(image.width)
+
+    renditions = {'source': field_file.name}
+    for image_format, (extension, pillow_format, options) in FORMATS.items():
+        renditions[image_format] = {}
+        for width in widths:
+            name = rendition_name(field_file.name, digest, width, extension)
+            if not storage.exists(name):
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+                if pillow_format == 'JPEG' and has_alpha:
+                    resized = _flatten(resized)
+                elif not has_alpha:
+                    resized = resized.convert('RGB')
+                buffer = BytesIO()
+                resized.save(buffer, pillow_format, **options)
+                # Saved atomically; a concurrent save of the same name is kept
+                storage.save(name, ContentFile(buffer.getvalue()))
+            renditions[image_format][str(width)] = name
+    return renditions
+
+
+def needs_renditions(instance):
+    field_file = getattr(instance, IMAGE_FIELDS[type(instance)])
+    return bool(field_file) and instance.renditions.get('source') != field_file.name
+
+
+def update_renditions(model, pk):
+    """Generate the renditions of one object and store their names on it."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, IMAGE_FIELDS[model])
+    renditions = generate_renditions(field_file) if field_file else {}
+    # update() rather than save() so no signals fire again
+    model.objects.filter(pk=pk).update(renditions=renditions)
+    bump_content_version()
+    bump_model_version(model)
+    # Imported here: export and snapshots need the serializers, which need this module
+    from .export import schedule_export
+    from .snapshots import invalidate_model
+    invalidate_model(model)
+    schedule_export(model, pk)
+
+
+def _run_in_worker(model, pk):
+    try:
+        update_renditions(model, pk)
+    except Exception:
+        logger.exception('Failed to generate renditions for %s %s', model.__name__, pk)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    # A pool inherited through fork has no threads; start a fresh one
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_RENDITION_WORKERS,
+            thread_name_prefix='image-renditions',
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def schedule_renditions(instance):
+    """Generate renditions off the request path once the transaction commits."""
+    model, pk = type(instance), instance.pk
+    if settings.IMAGE_RENDITIONS_ASYNC:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_worker, model, pk))
+    else:
+        transaction.on_commit(lambda: update_renditions(model, pk))
+
+
+def build_srcset(renditions, image_format, url):
+    """Format one format of a renditions map as an HTML srcset string."""
+    candidates = renditions.get(image_format) or {}
+    return ', '.join(
+        f'{url(name)} {width}w'
+        for width, name in sorted(candidates.items(), key=lambda item: int(item[0]))
+    )
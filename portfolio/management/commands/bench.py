@@ -0,0 +1,385 @@
+"""
+Management command running the end-to-end benchmark suite.
+
+It builds a throwaway site in a work directory (own SQLite database, media,
+cache, spool, throttle and metrics files) seeded with --projects projects,
+--posts blog posts, --testimonials testimonials and --clients clients
+sharing generated images, then drives every route in ROUTES through the
+Django test client and through a local gunicorn. For each route it reports
+throughput, p50/p95/p99 latency, SQL queries per request and resident
+memory.
+
+--output saves the results as JSON. --baseline compares a run with a saved
+one and fails when a route's p95 got more than --threshold times slower;
+--diff OLD NEW compares two saved runs without running anything.
+
+    python manage.py bench --output before.json
+    python manage.py bench --baseline before.json --output after.json
+"""
+import asyncio
+import datetime
+import io
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client as TestClient
+from django.urls import resolve
+
+from portfolio.benchmark import (
+    SERVERS, HTTPClient, child_pids, free_port, percentile, process_rss, seed_site, site_env,
+    start_server,
+)
+from portfolio.querybudget import count_queries
+
+# (method, path) of every route; the seeded data makes the slugs and ids stable
+ROUTES = [
+    ('GET', '/'),
+    ('GET', '/home/'),
+    ('GET', '/api/profile/'),
+    ('GET', '/api/services/'),
+    ('GET', '/api/timeline/'),
+    ('GET', '/api/timeline/?type=education'),
+    ('GET', '/api/skills/'),
+    ('GET', '/api/categories/'),
+    ('GET', '/api/projects/'),
+    ('GET', '/api/projects/?category=bench-category-1'),
+    ('GET', '/api/projects/?featured=true'),
+    ('GET', '/api/projects/?tech=django,react'),
+    ('GET', '/api/projects/?tech=vue,flask&tech_match=any'),
+    ('GET', '/api/projects/1/'),
+    ('GET', '/api/technologies/'),
+    ('GET', '/api/testimonials/'),
+    ('GET', '/api/clients/'),
+    ('GET', '/api/blog/'),
+    ('GET', '/api/blog/?page=2'),
+    ('GET', '/api/blog/?featured=true'),
+    ('GET', '/api/blog/benchmark-post-1/'),
+    ('GET', '/api/bootstrap/'),
+    ('GET', '/api/bootstrap/?include=projects,skills'),
+    ('GET', '/api/search/?q=benchmark'),
+    ('POST', '/api/contact/'),
+]
+
+TARGETS = ['client', 'gunicorn']
+
+_METRIC_RE = re.compile(
+    r'^portfolio_request_db_queries_(sum|count)\{route="([^"]*)",method="([^"]*)"\} (\S+)$', re.M
+)
+
+
+def route_name(method, path):
+    return f'{method} {path}'
+
+
+def contact_request(n):
+    """Body and headers of the ``n``-th contact submission; unique so none is throttled or dropped."""
+    body = json.dumps({
+        'full_name': f'Benchmark {n}',
+        'email': f'bench{n}@example.com',
+        'message': f'Benchmark message {n}',
+    }).encode()
+    forwarded_for = f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}'
+    return body, forwarded_for
+
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (ms) of one route."""
+    if not latencies:
+        return {'requests': 0, 'errors': errors}
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50': round(statistics.median(latencies), 3),
+        'p95': round(percentile(latencies, 0.95), 3),
+        'p99': round(percentile(latencies, 0.99), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Seeds a throwaway site and benchmarks every route through the test client and gunicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--testimonials', type=int, default=50)
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--images', type=int, default=10, help='Distinct generated images')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per route first')
+        parser.add_argument('--concurrency', type=int, default=10, help='Connections to gunicorn')
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers')
+        parser.add_argument('--server', choices=list(SERVERS), default='wsgi')
+        parser.add_argument('--targets', nargs='+', choices=TARGETS, default=TARGETS)
+        parser.add_argument('--routes', nargs='+', help='Only paths starting with any of these')
+        parser.add_argument('--workdir', help='Keep the site here instead of a temporary directory')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='Compare with the results in this JSON file')
+        parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), help='Only compare two result files')
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help='Fail when a route p95 exceeds the baseline times this')
+        parser.add_argument('--min-delta', type=float, default=0.5,
+                            help='Ignore p95 increases below this many milliseconds')
+        # Used by the command to run steps inside the benchmark site's settings
+        parser.add_argument('--phase', choices=['seed', 'client'], help='Internal')
+        parser.add_argument('--phase-output', help='Internal')
+
+    def handle(self, *args, **options):
+        if options['phase'] == 'seed':
+            return self.seed(options)
+        if options['phase'] == 'client':
+            return self.run_client(options)
+
+        if options['diff']:
+            old, new = (json.loads(Path(path).read_text()) for path in options['diff'])
+            return self.compare(old, new, options)
+
+        workdir = Path(options['workdir'] or tempfile.mkdtemp(prefix='portfolio-bench-'))
+        workdir.mkdir(parents=True, exist_ok=True)
+        env = site_env(workdir)
+        try:
+            self.stdout.write(f'Seeding the benchmark site in {workdir}...')
+            self.run_phase('seed', options, env)
+
+            results = {
+                'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'commit': self.git_commit(),
+                'dataset': {name: options[name] for name in ('projects', 'posts', 'testimonials', 'clients', 'images')},
+                'load': {name: options[name] for name in ('requests', 'warmup', 'concurrency', 'workers', 'server')},
+                'targets': {},
+            }
+            if 'client' in options['targets']:
+                self.stdout.write(self.style.MIGRATE_HEADING('Test client'))
+                output = workdir / 'client.json'
+                self.run_phase('client', options, env, '--phase-output', str(output))
+                results['targets']['client'] = json.loads(output.read_text())
+                self.report(results['targets']['client'])
+            if 'gunicorn' in options['targets']:
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f'gunicorn {options["server"]} ({options["workers"]} workers, '
+                    f'{options["concurrency"]} connections)'
+                ))
+                results['targets']['gunicorn'] = self.run_gunicorn(options, env)
+                self.report(results['targets']['gunicorn'])
+        finally:
+            if not options['workdir']:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2) + '\n')
+            self.stdout.write(f'Results written to {options["output"]}')
+        if options['baseline']:
+            self.compare(json.loads(Path(options['baseline']).read_text()), results, options)
+
+    def routes(self, options):
+        prefixes = options['routes']
+        return [
+            (method, path) for method, path in ROUTES
+            if not prefixes or any(path.startswith(prefix) for prefix in prefixes)
+        ]
+
+    def run_phase(self, phase, options, env, *extra):
+        command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench', '--phase', phase]
+        for name in ('projects', 'posts', 'testimonials', 'clients', 'images', 'requests', 'warmup'):
+            command += [f'--{name}', str(options[name])]
+        if options['routes']:
+            command += ['--routes', *options['routes']]
+        result = subprocess.run([*command, *extra], env=env, cwd=settings.BASE_DIR)
+        if result.returncode:
+            raise CommandError(f'Benchmark {phase} step failed with code {result.returncode}')
+
+    def git_commit(self):
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=10,
+            )
+        except OSError:
+            return None
+        return result.stdout.strip() or None
+
+    def seed(self, options):
+        call_command('migrate', verbosity=0)
+        if not (Path(settings.STATIC_ROOT) / 'staticfiles.json').exists():
+            # The manifest storage can't render pages without it
+            call_command('collectstatic', interactive=False, verbosity=0)
+        seed_site(
+            options['projects'], options['posts'], options['testimonials'],
+            options['clients'], options['images'],
+        )
+        call_command('rebuild_search_index', stdout=io.StringIO())
+
+    def run_client(self, options):
+        client = TestClient()
+        results = {}
+        contact = 0
+        for method, path in self.routes(options):
+            latencies = []
+            errors = 0
+            queries = 0
+            started = time.perf_counter()
+            for n in range(options['warmup'] + options['requests']):
+                start = time.perf_counter()
+                with count_queries() as counter:
+                    if method == 'POST':
+                        contact += 1
+                        body, forwarded_for = contact_request(contact)
+                        response = client.post(
+                            path, body, content_type='application/json',
+                            HTTP_X_FORWARDED_FOR=forwarded_for,
+                        )
+                    else:
+                        response = client.get(path)
+                    # Streamed responses render while they are read
+                    response.getvalue()
+                elapsed = (time.perf_counter() - start) * 1000
+                if n < options['warmup']:
+                    started = time.perf_counter()
+                    continue
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+                latencies.append(elapsed)
+                queries += len(counter)
+            summary = summarize(latencies, errors, time.perf_counter() - started)
+            summary['queries'] = round(queries / len(latencies), 2) if latencies else None
+            summary['rss_mb'] = round(process_rss(os.getpid()) / 2 ** 20, 1)
+            results[route_name(method, path)] = summary
+        Path(options['phase_output']).write_text(json.dumps(results))
+
+    def run_gunicorn(self, options, env):
+        # Only the server's own workers may feed /metrics
+        shutil.rmtree(env['METRICS_DIR'], ignore_errors=True)
+        port = free_port()
+        try:
+            server = start_server(options['server'], port, options['workers'], env)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        results = {}
+        try:
+            contact = [0]
+            for method, path in self.routes(options):
+                asyncio.run(self.load(port, method, path, options['warmup'], 1, contact))
+                summary = summarize(*asyncio.run(
+                    self.load(port, method, path, options['requests'], options['concurrency'], contact)
+                ))
+                pids = [server.pid, *child_pids(server.pid)]
+                summary['rss_mb'] = round(sum(process_rss(pid) for pid in pids) / 2 ** 20, 1)
+                results[route_name(method, path)] = summary
+
+            # Workers save their metrics every METRICS_FLUSH_INTERVAL seconds
+            time.sleep(float(env['METRICS_FLUSH_INTERVAL']) + 0.5)
+            queries = asyncio.run(self.scrape_queries(port, env['METRICS_TOKEN']))
+            for method, path in self.routes(options):
+                view_name = resolve(path.split('?')[0]).view_name
+                # Per URL name: variants of a route share their average
+                results[route_name(method, path)]['queries'] = queries.get((view_name, method))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        return results
+
+    async def load(self, port, method, path, requests, concurrency, contact):
+        latencies = []
+        errors = 0
+        remaining = requests
+        started = time.perf_counter()
+
+        async def connection():
+            nonlocal errors, remaining
+            client = HTTPClient(port)
+            while remaining > 0:
+                remaining -= 1
+                body, headers = b'', {}
+                if method == 'POST':
+                    contact[0] += 1
+                    body, forwarded_for = contact_request(contact[0])
+                    headers = {'Content-Type': 'application/json', 'X-Forwarded-For': forwarded_for}
+                start = time.perf_counter()
+                try:
+                    status, _, _ = await client.request(method, path, body, headers)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    await client.close()
+                    continue
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append((time.perf_counter() - start) * 1000)
+            await client.close()
+
+        await asyncio.gather(*[connection() for _ in range(concurrency)])
+        return latencies, errors, time.perf_counter() - started
+
+    async def scrape_queries(self, port, token):
+        """Average SQL queries per request by (URL name, method), from /metrics."""
+        client = HTTPClient(port)
+        try:
+            status, _, content = await client.request('GET', '/metrics', headers={'Authorization': f'Bearer {token}'})
+        finally:
+            await client.close()
+        if status != 200:
+            return {}
+        totals = {}
+        for kind, route, method, value in _METRIC_RE.findall(content.decode()):
+            totals.setdefault((route, method), {})[kind] = float(value)
+        return {
+            key: round(values['sum'] / values['count'], 2)
+            for key, values in totals.items() if values.get('count')
+        }
+
+    def report(self, results):
+        for route, summary in results.items():
+            if not summary['requests']:
+                self.stdout.write(self.style.ERROR(f'  {route:<46} no successful requests ({summary["errors"]} errors)'))
+                continue
+            queries = '-' if summary.get('queries') is None else f'{summary["queries"]:g}'
+            self.stdout.write(
+                f'  {route:<46} {summary["throughput"]:8.1f} req/s  '
+                f'p50 {summary["p50"]:7.2f}  p95 {summary["p95"]:7.2f}  p99 {summary["p99"]:7.2f} ms  '
+                f'{queries:>5} queries  {summary["rss_mb"]:6.1f} MB'
+                + (f'  {summary["errors"]} errors' if summary['errors'] else '')
+            )
+
+    def compare(self, old, new, options):
+        """Print p95 changes per route; fail on routes slower than the threshold allows."""
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Compared with {old.get("commit") or "baseline"} ({old.get("created", "?")})'
+        ))
+        regressions = []
+        for target, routes in new['targets'].items():
+            baseline = old.get('targets', {}).get(target, {})
+            for route, summary in routes.items():
+                before = baseline.get(route)
+                if not before or not before.get('requests') or not summary.get('requests'):
+                    continue
+                ratio = summary['p95'] / before['p95'] if before['p95'] else 1
+                slower = ratio > options['threshold'] and summary['p95'] - before['p95'] > options['min_delta']
+                line = (
+                    f'  {target:<8} {route:<46} p95 {before["p95"]:7.2f} -> {summary["p95"]:7.2f} ms '
+                    f'({(ratio - 1) * 100:+.0f}%)'
+                )
+                if before.get('queries') != summary.get('queries'):
+                    line += f', queries {before.get("queries")} -> {summary.get("queries")}'
+                if slower:
+                    regressions.append(f'{target} {route}')
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} routes regressed beyond {options["threshold"]:g}x p95: '
+                + ', '.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('No route regressed'))
@@ -0,0 +1,112 @@
+"""
+Management command measuring what a page needs before its first paint,
+without a browser: the HTML itself plus every render-blocking request
+(stylesheets, and classic scripts without defer or async in the head).
+Blocking files served from STATIC_URL are sized from the collected files
+(or the app static directories before collectstatic); other origins are
+counted but can't be sized offline.
+
+    python manage.py bench_assets
+    git stash && python manage.py bench_assets --save before.html && git stash pop
+    python manage.py bench_assets --html before.html
+"""
+import gzip
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+
+class BlockingResources(HTMLParser):
+    """Collect the render-blocking resources of a page, ignoring <noscript> fallbacks."""
+
+    def __init__(self):
+        super().__init__()
+        self.resources = []
+        self.in_head = True
+        self.noscript = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'noscript':
+            self.noscript += 1
+        elif tag == 'body':
+            self.in_head = False
+        if self.noscript:
+            return
+        if tag == 'link' and 'stylesheet' in (attrs.get('rel') or '').split():
+            if attrs.get('media', 'all') != 'print' and 'disabled' not in attrs:
+                self.resources.append(('stylesheet', attrs.get('href')))
+        elif tag == 'script' and attrs.get('src') and self.in_head:
+            if 'defer' not in attrs and 'async' not in attrs and attrs.get('type') != 'module':
+                self.resources.append(('script', attrs['src']))
+
+    def handle_endtag(self, tag):
+        if tag == 'noscript' and self.noscript:
+            self.noscript -= 1
+        elif tag == 'head':
+            self.in_head = False
+
+
+def static_file(url):
+    """Return the contents of a STATIC_URL file, or None for other origins."""
+    if not url.startswith(settings.STATIC_URL):
+        return None
+    name = url[len(settings.STATIC_URL):].split('?')[0]
+    if staticfiles_storage.exists(name):
+        with staticfiles_storage.open(name) as file:
+            return file.read()
+    path = finders.find(name)
+    if path is None:
+        return None
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+class Command(BaseCommand):
+    help = 'Reports the bytes and blocking requests before the first paint of a page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help='Page to render (default: the homepage)')
+        parser.add_argument('--html', help='Measure this saved HTML file instead of rendering the page')
+        parser.add_argument('--save', help='Also write the rendered HTML to this file')
+
+    def handle(self, *args, **options):
+        if options['html']:
+            with open(options['html'], 'rb') as file:
+                html = file.read()
+            source = options['html']
+        else:
+            response = Client().get(options['path'])
+            if response.status_code != 200:
+                raise CommandError(f'"{options["path"]}": HTTP {response.status_code}')
+            html = response.getvalue()
+            source = options['path']
+        if options['save']:
+            with open(options['save'], 'wb') as file:
+                file.write(html)
+
+        parser = BlockingResources()
+        parser.feed(html.decode())
+        parser.close()
+
+        self.stdout.write(f'{source}')
+        self.stdout.write(f'  {"html":<10} {len(html):>8} B {len(gzip.compress(html)):>8} B gzip  (document)')
+        total, total_gzip, unsized = len(html), len(gzip.compress(html)), 0
+        for kind, url in parser.resources:
+            content = static_file(url)
+            if content is None:
+                unsized += 1
+                self.stdout.write(f'  {kind:<10} {"?":>8}   {"?":>8}        {url}')
+                continue
+            compressed = len(gzip.compress(content))
+            total += len(content)
+            total_gzip += compressed
+            self.stdout.write(f'  {kind:<10} {len(content):>8} B {compressed:>8} B gzip  {url}')
+
+        self.stdout.write(f'Blocking requests: {len(parser.resources)}')
+        suffix = f' (+ {unsized} external, not sized)' if unsized else ''
+        self.stdout.write(f'Bytes before first paint: {total} B, {total_gzip} B gzip{suffix}')
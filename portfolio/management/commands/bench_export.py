@@ -0,0 +1,81 @@
+"""
+Management command checking that the bulk exports (portfolio.bulkexport)
+run in constant memory. It seeds --rows contact messages, exports them
+through /api/admin/export/ as a staff user in each format, sampling this
+process's resident memory after every chunk, and fails if it grows by more
+than --ceiling MB over what it was before the export. Runs in a
+transaction that is rolled back.
+
+    python manage.py bench_export --rows 1000000 --ceiling 64
+"""
+import gc
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from portfolio.benchmark import BATCH_SIZE, process_rss, scratch_transaction
+from portfolio.bulkexport import FORMATS
+from portfolio.models import ContactMessage
+
+
+class Command(BaseCommand):
+    help = 'Exports seeded contact messages and fails if memory use grows past a ceiling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Contact messages seeded')
+        parser.add_argument('--ceiling', type=float, default=64, help='Allowed memory growth in MB')
+        parser.add_argument('--formats', nargs='+', choices=list(FORMATS), default=list(FORMATS))
+
+    def handle(self, *args, **options):
+        with scratch_transaction():
+            self.stdout.write(f"Seeding {options['rows']} contact messages...")
+            # Batch by batch: bulk_create() would hold every object at once
+            for start in range(0, options['rows'], BATCH_SIZE):
+                ContactMessage.objects.bulk_create([
+                    ContactMessage(
+                        full_name=f'Sender {i}', email=f'sender{i}@example.com',
+                        message='Benchmark message, long enough to look like a real one. ' * 4,
+                    )
+                    for i in range(start, min(start + BATCH_SIZE, options['rows']))
+                ])
+            staff = get_user_model().objects.create_user('bench-export', is_staff=True)
+            client = Client()
+            client.force_login(staff)
+
+            failed = []
+            for export_format in options['formats']:
+                growth, rows, size, elapsed = self.export(client, export_format)
+                self.stdout.write(
+                    f'{export_format:<7} {rows:>9} rows {size / 2 ** 20:8.1f} MB in {elapsed:6.2f} s, '
+                    f'memory +{growth / 2 ** 20:.1f} MB'
+                )
+                if rows != options['rows']:
+                    raise CommandError(f'{export_format}: exported {rows} rows, expected {options["rows"]}')
+                if growth > options['ceiling'] * 2 ** 20:
+                    failed.append(export_format)
+        if failed:
+            raise CommandError(f'Memory grew by more than {options["ceiling"]:g} MB: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS(f'Memory stayed within {options["ceiling"]:g} MB'))
+
+    def export(self, client, export_format):
+        """Return (peak memory growth, rows, bytes, seconds) of one export."""
+        url = reverse('data-export', args=['contacts', export_format])
+        gc.collect()
+        baseline = peak = process_rss(os.getpid())
+        start = time.perf_counter()
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: HTTP {response.status_code}')
+        lines = size = 0
+        for chunk in response.streaming_content:
+            lines += chunk.count(b'\n')
+            size += len(chunk)
+            peak = max(peak, process_rss(os.getpid()))
+        elapsed = time.perf_counter() - start
+        # The CSV header is a line too
+        rows = lines - (export_format == 'csv')
+        return peak - baseline, rows, size, elapsed
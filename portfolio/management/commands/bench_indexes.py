@@ -0,0 +1,81 @@
+"""
+Management command to benchmark the list endpoint queries with and without
+the composite indexes. Everything runs in a transaction that is rolled back,
+so the database is left untouched.
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from portfolio.benchmark import measure, scratch_transaction, seed_content
+from portfolio.models import (
+    Service, TimelineEntry, Skill, Project, Testimonial, Client, BlogPost
+)
+
+PAGE_SIZE = 10
+
+# Query shapes of the list endpoints (filter + default ordering)
+CASES = [
+    ('/api/services/', lambda: Service.objects.filter(is_active=True)),
+    ('/api/timeline/', lambda: TimelineEntry.objects.filter(is_active=True)),
+    ('/api/timeline/?type=education', lambda: TimelineEntry.objects.filter(is_active=True, type='education')),
+    ('/api/skills/', lambda: Skill.objects.filter(is_active=True)),
+    ('/api/projects/', lambda: Project.objects.filter(is_active=True).select_related('category')),
+    ('/api/projects/?category=', lambda: Project.objects.filter(
+        is_active=True, category__slug='bench-category-3').select_related('category')),
+    ('/api/projects/?featured=true', lambda: Project.objects.filter(
+        is_active=True, featured=True).select_related('category')),
+    ('/api/testimonials/', lambda: Testimonial.objects.filter(is_active=True)),
+    ('/api/clients/', lambda: Client.objects.filter(is_active=True)),
+    ('/api/blog/', lambda: BlogPost.objects.filter(is_published=True)),
+    ('/api/blog/?featured=true', lambda: BlogPost.objects.filter(is_published=True, featured=True)),
+    ('/api/blog/?category=', lambda: BlogPost.objects.filter(is_published=True, category__icontains='django')),
+]
+
+
+class Command(BaseCommand):
+    help = 'Seeds synthetic rows and compares query plans and latency with and without indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Rows seeded per model')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        with scratch_transaction():
+            self.stdout.write(f"Seeding {options['rows']} rows per model...")
+            seed_content(options['rows'])
+
+            self.set_indexes(create=False)
+            before = self.run_cases(options['repeat'])
+            self.set_indexes(create=True)
+            after = self.run_cases(options['repeat'])
+
+        for name, _ in CASES:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, results in (('without indexes', before), ('with indexes', after)):
+                median, best = results[name]['timing']
+                self.stdout.write(f'  {label}: median {median:.2f} ms, best {best:.2f} ms')
+                for line in results[name]['plan'].splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def set_indexes(self, create):
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in apps.get_app_config('portfolio').get_models():
+                for index in model._meta.indexes:
+                    if create:
+                        sql = index.create_sql(model, schema_editor)
+                    else:
+                        sql = index.remove_sql(model, schema_editor)
+                    cursor.execute(str(sql))
+            cursor.execute('ANALYZE')
+
+    def run_cases(self, repeat):
+        results = {}
+        for name, build in CASES:
+            queryset = build()[:PAGE_SIZE]
+            results[name] = {
+                'plan': queryset.explain(),
+                'timing': measure(lambda: list(build()[:PAGE_SIZE]), repeat),
+            }
+        return results
@@ -0,0 +1,102 @@
+"""
+Management command measuring what the request metrics (portfolio.metrics)
+add to every request: MetricsMiddleware around a view that does nothing,
+the execute wrapper per SQL query and the serializer timer per block. Fails
+when a typical request (--queries queries, one serializer block) costs more
+than --budget microseconds.
+"""
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve
+
+from portfolio import metrics
+from portfolio.middleware import MetricsMiddleware
+
+
+def per_call(func, calls):
+    """Return the best of five runs of ``calls`` calls of ``func``, in microseconds per call."""
+    best = None
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            func()
+        elapsed = (time.perf_counter_ns() - start) / calls / 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Measures the per-request overhead of the request metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100_000, help='Timed calls per measurement')
+        parser.add_argument('--queries', type=int, default=3, help='SQL queries of a typical request')
+        parser.add_argument('--budget', type=float, default=50, help='Allowed overhead in microseconds')
+
+    def handle(self, *args, **options):
+        calls = options['requests']
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            middleware = self.measure_middleware(calls)
+            query = self.measure_query(calls)
+            serializer = self.measure_serializer(calls)
+
+        total = middleware + query * options['queries'] + serializer
+        self.stdout.write(f'Middleware:       {middleware:6.2f} us/request')
+        self.stdout.write(f'Query wrapper:    {query:6.2f} us/query')
+        self.stdout.write(f'Serializer timer: {serializer:6.2f} us/block')
+        self.stdout.write(f'Typical request ({options["queries"]} queries): {total:6.2f} us')
+        if total > options['budget']:
+            raise CommandError(f'Metrics overhead {total:.2f} us is over the {options["budget"]:g} us budget')
+        self.stdout.write(self.style.SUCCESS(f'Within the {options["budget"]:g} us budget'))
+
+    def measure_middleware(self, calls):
+        request = RequestFactory().get('/api/services/')
+        request.resolver_match = resolve('/api/services/')
+        response = HttpResponse(b'x' * 1024)
+
+        def view(request):
+            return response
+
+        wrapped = MetricsMiddleware(view)
+        bare = per_call(lambda: view(request), calls)
+        return per_call(lambda: wrapped(request), calls) - bare
+
+    def measure_query(self, calls):
+        connection.ensure_connection()
+        # connection_created installed the wrapper already when metrics are on
+        installed = metrics.record_query in connection.execute_wrappers
+        if installed:
+            connection.execute_wrappers.remove(metrics.record_query)
+        cursor = connection.cursor()
+
+        def query():
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+        bare = per_call(query, calls)
+        connection.execute_wrappers.insert(0, metrics.record_query)
+        stats, token = metrics.start_request()
+        try:
+            wrapped = per_call(query, calls)
+        finally:
+            metrics.end_request(token)
+            if not installed:
+                connection.execute_wrappers.remove(metrics.record_query)
+        return wrapped - bare
+
+    def measure_serializer(self, calls):
+        def block():
+            with metrics.measure_serialization():
+                pass
+
+        stats, token = metrics.start_request()
+        try:
+            return per_call(block, calls) - per_call(lambda: None, calls)
+        finally:
+            metrics.end_request(token)
@@ -0,0 +1,71 @@
+"""
+Management command comparing page-number and keyset pagination latency at
+increasing depths. Runs in a transaction that is rolled back.
+"""
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from portfolio.benchmark import measure, scratch_transaction, seed_content
+from portfolio.models import BlogPost, Project
+from portfolio.pagination import KeysetPagination
+
+QUERYSETS = {
+    'blog': lambda: BlogPost.objects.filter(is_published=True),
+    'projects': lambda: Project.objects.filter(is_active=True).select_related('category'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks page-number against keyset pagination at several page depths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=120_000, help='Rows seeded per model')
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 100, 10_000])
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per page')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+
+        with scratch_transaction():
+            self.stdout.write(f"Seeding {options['rows']} rows per model...")
+            seed_content(options['rows'])
+
+            for name, build in QUERYSETS.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                for page in options['pages']:
+                    offset_timing = measure(
+                        lambda: self.paginate(factory, build(), {'page': page}),
+                        options['repeat']
+                    )
+                    cursor = self.cursor_for_page(build(), page)
+                    keyset_timing = measure(
+                        lambda: self.paginate(factory, build(), {'cursor': cursor}),
+                        options['repeat']
+                    )
+                    self.stdout.write(
+                        f'  page {page:>6}: page-number {offset_timing[0]:8.2f} ms, '
+                        f'keyset {keyset_timing[0]:8.2f} ms'
+                    )
+
+    def paginate(self, factory, queryset, params):
+        paginator = KeysetPagination()
+        request = Request(factory.get('/', params))
+        page = paginator.paginate_queryset(queryset, request)
+        if page is None:
+            return []
+        # Page-number mode builds its links from the count; include that cost
+        paginator.get_next_link()
+        return page
+
+    def cursor_for_page(self, queryset, page):
+        """Cursor positioned just before ``page`` (computed untimed with OFFSET)."""
+        if page <= 1:
+            return ''
+        paginator = KeysetPagination()
+        paginator.ordering = paginator.get_ordering(queryset)
+        ordered = queryset.order_by(*[
+            f'-{name}' if descending else name for name, descending in paginator.ordering
+        ])
+        last_row = ordered[(page - 1) * paginator.page_size - 1]
+        return paginator.encode_cursor(last_row)
@@ -0,0 +1,96 @@
+"""
+Management command measuring what the per-section fragment cache
+({% cached_section %}) saves when the homepage is rendered again after an
+edit: for every section, one of its rows is saved and the page rendered,
+with the section cache on (only that section re-renders) and off (the whole
+page re-renders). Seeds a synthetic site in a transaction that is rolled
+back, with its own cache and media directory.
+"""
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from portfolio.benchmark import measure, scratch_transaction, seed_site
+from portfolio.cache import FRAGMENT_MODELS, strip_csrf_token
+from portfolio.models import (
+    Service, TimelineEntry, Skill, Project, Testimonial, Client, BlogPost
+)
+from portfolio.views import PortfolioHomeView
+
+# Section -> model of the row edited before rendering
+EDITED_MODELS = {
+    'services': Service,
+    'testimonials': Testimonial,
+    'clients': Client,
+    'timeline': TimelineEntry,
+    'skills': Skill,
+    'projects': Project,
+    'blog': BlogPost,
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks homepage renders after editing one section, with and without the section cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=200)
+        parser.add_argument('--testimonials', type=int, default=50)
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed renders per section')
+
+    def handle(self, *args, **options):
+        missing = set(FRAGMENT_MODELS) - set(EDITED_MODELS)
+        if missing:
+            raise CommandError(f'No model to edit for sections {", ".join(sorted(missing))}')
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': f'{directory}/cache',
+            }},
+            MEDIA_ROOT=f'{directory}/media',
+            EXPORT_ON_SAVE=False,
+            IMAGE_RENDITIONS_ASYNC=False,
+        ), scratch_transaction():
+            self.stdout.write('Seeding the site...')
+            seed_site(
+                options['projects'], options['posts'], options['testimonials'], options['clients'], images=2
+            )
+            request = RequestFactory().get('/')
+
+            with override_settings(HOMEPAGE_SECTION_CACHE=False):
+                uncached = self.render(request)
+            # Fill the section cache
+            cached = self.render(request)
+            if strip_csrf_token(cached) != strip_csrf_token(uncached):
+                raise CommandError('The page renders differently with the section cache')
+
+            self.stdout.write(f'{"edited section":<16} {"cache off":>18} {"cache on":>18}  {"saved":>6}')
+            for section, model in EDITED_MODELS.items():
+                instance = model.objects.order_by('pk').first()
+                off = self.measure_edit(instance, request, options['repeat'], cache=False)
+                on = self.measure_edit(instance, request, options['repeat'], cache=True)
+                self.stdout.write(
+                    f'{section:<16} {off[0]:7.2f} ms {off[1]:3d} q {on[0]:7.2f} ms {on[1]:3d} q  '
+                    f'{(1 - on[0] / off[0]) * 100:5.1f}%'
+                )
+
+    def render(self, request):
+        view = PortfolioHomeView()
+        view.setup(request)
+        return render_to_string(view.template_name, view.get_context_data(), request)
+
+    def measure_edit(self, instance, request, repeat, cache):
+        """Return the median render time (ms) and queries after saving ``instance``."""
+        timings = []
+        with override_settings(HOMEPAGE_SECTION_CACHE=cache):
+            for _ in range(repeat):
+                instance.save()
+                with CaptureQueriesContext(connection) as queries:
+                    timings.append(measure(lambda: self.render(request), repeat=1)[0])
+        return sorted(timings)[len(timings) // 2], len(queries)
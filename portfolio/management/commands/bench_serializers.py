@@ -0,0 +1,91 @@
+"""
+Management command comparing DRF serializers with the precompiled fast path
+(portfolio.fastserializers) on every read-only serializer. The rendered JSON
+of both paths must match byte for byte; the command fails if it doesn't.
+Runs in a transaction that is rolled back.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from portfolio.benchmark import measure, scratch_transaction, seed_content
+from portfolio.fastserializers import serialize_queryset
+from portfolio.models import (
+    Profile, Service, TimelineEntry, Skill,
+    ProjectCategory, Project, Testimonial, Client,
+    BlogPost
+)
+from portfolio.serializers import (
+    ProfileSerializer, ServiceSerializer, TimelineEntrySerializer,
+    SkillSerializer, ProjectCategorySerializer, ProjectSerializer,
+    TestimonialSerializer, ClientSerializer, BlogPostListSerializer,
+    BlogPostDetailSerializer
+)
+
+# Name -> (serializer class, queryset builder), as the API views use them
+CASES = {
+    'profile': (ProfileSerializer, lambda: Profile.objects.all()),
+    'services': (ServiceSerializer, lambda: Service.objects.filter(is_active=True)),
+    'timeline': (TimelineEntrySerializer, lambda: TimelineEntry.objects.filter(is_active=True)),
+    'skills': (SkillSerializer, lambda: Skill.objects.filter(is_active=True)),
+    'categories': (ProjectCategorySerializer, lambda: ProjectCategory.objects.annotate(
+        projects_count=Count('projects', filter=Q(projects__is_active=True))
+    ).order_by('name')),
+    'projects': (ProjectSerializer, lambda: Project.objects.filter(is_active=True).select_related('category')),
+    'testimonials': (TestimonialSerializer, lambda: Testimonial.objects.filter(is_active=True)),
+    'clients': (ClientSerializer, lambda: Client.objects.filter(is_active=True)),
+    'blog list': (BlogPostListSerializer, lambda: BlogPost.objects.filter(is_published=True)),
+    'blog detail': (BlogPostDetailSerializer, lambda: BlogPost.objects.filter(is_published=True)),
+}
+
+
+class Command(BaseCommand):
+    help = 'Checks fast-path serializer parity with DRF and benchmarks both'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10, 1000, 100_000],
+                            help='Rows seeded per model for each run')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case')
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        context = {'request': Request(APIRequestFactory().get('/'))}
+
+        for rows in options['rows']:
+            with scratch_transaction():
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{rows} rows per model'))
+                seed_content(rows)
+                # Cover the edge cases the synthetic rows don't have
+                Project.objects.filter(pk__in=Project.objects.order_by('pk')[:3]).update(category=None)
+                BlogPost.objects.filter(pk__in=BlogPost.objects.order_by('pk')[:3]).update(
+                    renditions={'source': 'blog/benchmark.jpg',
+                                'webp': {'320': 'blog/benchmark.0.320w.webp'},
+                                'jpeg': {'320': 'blog/benchmark.0.320w.jpg'}}
+                )
+
+                for name, (serializer_class, build) in CASES.items():
+                    def drf():
+                        return renderer.render(serializer_class(build(), many=True, context=context).data)
+
+                    def fast():
+                        return renderer.render(serialize_queryset(serializer_class, build(), context))
+
+                    if drf() != fast():
+                        raise CommandError(f'{name}: fast path output differs from {serializer_class.__name__}')
+
+                    count = build().count()
+                    drf_ms = measure(drf, options['repeat'])[0]
+                    fast_ms = measure(fast, options['repeat'])[0]
+                    self.stdout.write(
+                        f'  {name:<13} {count:>7} objects: '
+                        f'DRF {drf_ms:9.2f} ms ({self.rate(count, drf_ms)}), '
+                        f'fast {fast_ms:9.2f} ms ({self.rate(count, fast_ms)}), '
+                        f'{drf_ms / fast_ms:4.1f}x'
+                    )
+
+        self.stdout.write(self.style.SUCCESS('Fast path output matches DRF for every serializer'))
+
+    def rate(self, count, ms):
+        return f'{count / (ms / 1000):,.0f} obj/s'
@@ -0,0 +1,85 @@
+"""
+Management command comparing the WSGI (sync gunicorn workers) and ASGI
+(uvicorn workers, async views) deployments: it starts each server on a free
+local port, holds N concurrent keep-alive connections against a mix of
+read-only endpoints for a fixed time and reports throughput and latency
+percentiles. Uses the configured database as is.
+"""
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.benchmark import SERVERS, HTTPClient, free_port, percentile, start_server
+
+DEFAULT_PATHS = ['/api/services/', '/api/projects/', '/api/blog/', '/api/bootstrap/', '/']
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks throughput and p99 latency of the WSGI and ASGI servers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 200, 1000])
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers per server')
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+        parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+
+    def handle(self, *args, **options):
+        for name in options['servers']:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} ({options["workers"]} workers)'))
+            port = free_port()
+            try:
+                server = start_server(name, port, options['workers'])
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            try:
+                for concurrency in options['concurrency']:
+                    self.report(concurrency, *asyncio.run(self.load(port, concurrency, options)))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+    async def load(self, port, concurrency, options):
+        paths = options['paths']
+        started = time.monotonic()
+        deadline = started + options['duration']
+        latencies = []
+        errors = 0
+
+        async def connection(index):
+            nonlocal errors
+            client = HTTPClient(port)
+            request = index
+            while time.monotonic() < deadline:
+                path = paths[request % len(paths)]
+                request += 1
+                start = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(client.get(path), options['timeout'])
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    await client.close()
+                    continue
+                if status == 200:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors += 1
+            await client.close()
+
+        await asyncio.gather(*[connection(i) for i in range(concurrency)])
+        # Requests in flight at the deadline still finish; count their time
+        return latencies, errors, time.monotonic() - started
+
+    def report(self, concurrency, latencies, errors, elapsed):
+        if not latencies:
+            self.stdout.write(f'  {concurrency:>5} connections: no successful requests ({errors} errors)')
+            return
+        self.stdout.write(
+            f'  {concurrency:>5} connections: {len(latencies) / elapsed:8.1f} req/s, '
+            f'p50 {statistics.median(latencies):8.1f} ms, '
+            f'p99 {percentile(latencies, 0.99):8.1f} ms, '
+            f'{errors} errors'
+        )
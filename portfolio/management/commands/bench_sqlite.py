@@ -0,0 +1,170 @@
+"""
+Management command measuring SQLite contention under mixed read/write load,
+with and without the tuned mode (portfolio.sqlite, settings.SQLITE_TUNED).
+
+For each mode it creates a fresh database in a temporary directory, seeds
+--rows rows per model, then runs --workers processes for --duration seconds.
+Each process acts like a gunicorn worker: every loop is one "request"
+(connections handled as Django's request signals handle them) that either
+reads a page of blog posts, or writes: a view count increment, a contact
+message, or a read-then-update edit of a post. Reported per mode:
+throughput, read and write p50/p99 latency and the writes that failed with
+"database is locked".
+"""
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, transaction
+from django.db.models import F
+
+from portfolio.benchmark import percentile, seed_content
+from portfolio.models import BlogPost, ContactMessage
+from portfolio.sqlite import is_locked_error, retry_on_locked
+
+MODES = {
+    'default': {'SQLITE_TUNED': 'False'},
+    'tuned': {'SQLITE_TUNED': 'True'},
+}
+
+
+@retry_on_locked
+def record_view(pk):
+    with transaction.atomic():
+        BlogPost.objects.filter(pk=pk).update(view_count=F('view_count') + 1)
+
+
+@retry_on_locked
+def save_message(n):
+    ContactMessage.objects.create(
+        full_name=f'Sender {n}', email=f'sender{n}@example.com', message='Benchmark message',
+    )
+
+
+@retry_on_locked
+def edit_post(pk):
+    # Reads first, so the write lock has to be taken mid-transaction
+    with transaction.atomic():
+        excerpt = BlogPost.objects.filter(pk=pk).values_list('excerpt', flat=True).first()
+        BlogPost.objects.filter(pk=pk).update(excerpt=(excerpt or '')[:200] + '.')
+
+
+class Command(BaseCommand):
+    help = 'Compares SQLite throughput and lock errors with and without the tuned mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent processes')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per mode')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of requests that write')
+        parser.add_argument('--rows', type=int, default=1000, help='Rows seeded per model')
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+        # Used by the command to run steps against the benchmark database
+        parser.add_argument('--phase', choices=['seed', 'worker'], help='Internal')
+        parser.add_argument('--worker-id', type=int, default=0, help='Internal')
+
+    def handle(self, *args, **options):
+        if options['phase'] == 'seed':
+            call_command('migrate', verbosity=0)
+            seed_content(options['rows'])
+            return
+        if options['phase'] == 'worker':
+            return self.work(options)
+
+        for mode in options['modes']:
+            with tempfile.TemporaryDirectory() as directory:
+                env = {
+                    **os.environ, **MODES[mode],
+                    'DATABASE_PATH': os.path.join(directory, 'db.sqlite3'),
+                    'CACHE_DIR': os.path.join(directory, 'cache'),
+                    'METRICS_ENABLED': 'False',
+                }
+                self.run_step(['--phase', 'seed', '--rows', str(options['rows'])], env)
+                self.report(mode, self.run_workers(options, env))
+
+    def command(self, *arguments):
+        return [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_sqlite', *arguments]
+
+    def run_step(self, arguments, env):
+        if subprocess.run(self.command(*arguments), env=env, cwd=settings.BASE_DIR).returncode:
+            raise CommandError('Seeding the benchmark database failed')
+
+    def run_workers(self, options, env):
+        arguments = [
+            '--phase', 'worker', '--duration', str(options['duration']),
+            '--write-ratio', str(options['write_ratio']),
+        ]
+        workers = [
+            subprocess.Popen(
+                self.command(*arguments, '--worker-id', str(i)),
+                env=env, cwd=settings.BASE_DIR, stdout=subprocess.PIPE, text=True,
+            )
+            for i in range(options['workers'])
+        ]
+        results = []
+        for worker in workers:
+            output, _ = worker.communicate()
+            if worker.returncode:
+                raise CommandError(f'A benchmark worker failed with code {worker.returncode}')
+            results.append(json.loads(output))
+        return results
+
+    def work(self, options):
+        rng = random.Random(options['worker_id'])
+        pks = list(BlogPost.objects.values_list('pk', flat=True))
+        writes = [
+            lambda: record_view(rng.choice(pks)),
+            lambda: save_message(rng.randrange(10 ** 9)),
+            lambda: edit_post(rng.choice(pks)),
+        ]
+        reads, written, locked = [], [], 0
+        started = time.perf_counter()
+        deadline = started + options['duration']
+        while time.perf_counter() < deadline:
+            # What request_started and request_finished do around every request
+            close_old_connections()
+            is_write = rng.random() < options['write_ratio']
+            start = time.perf_counter()
+            try:
+                if is_write:
+                    rng.choice(writes)()
+                else:
+                    list(BlogPost.objects.filter(is_published=True).values('pk', 'title', 'view_count')[:10])
+            except OperationalError as exc:
+                if not is_locked_error(exc):
+                    raise
+                locked += 1
+            else:
+                (written if is_write else reads).append((time.perf_counter() - start) * 1000)
+            close_old_connections()
+        self.stdout.write(json.dumps({
+            'reads': reads, 'writes': written, 'locked': locked,
+            'elapsed': time.perf_counter() - started,
+        }))
+
+    def report(self, mode, results):
+        reads = [value for result in results for value in result['reads']]
+        writes = [value for result in results for value in result['writes']]
+        locked = sum(result['locked'] for result in results)
+        elapsed = max(result['elapsed'] for result in results)
+
+        def latency(values):
+            if not values:
+                return 'n/a'
+            return f'p50 {statistics.median(values):6.2f} ms, p99 {percentile(values, 0.99):7.2f} ms'
+
+        self.stdout.write(self.style.MIGRATE_HEADING(mode))
+        self.stdout.write(f'  {(len(reads) + len(writes)) / elapsed:8.1f} requests/s')
+        self.stdout.write(f'  reads:  {len(reads):7} ({latency(reads)})')
+        self.stdout.write(f'  writes: {len(writes):7} ({latency(writes)})')
+        attempts = len(writes) + locked
+        share = locked / attempts * 100 if attempts else 0
+        style = self.style.ERROR if locked else self.style.SUCCESS
+        self.stdout.write(style(f'  "database is locked": {locked} ({share:.1f}% of writes)'))
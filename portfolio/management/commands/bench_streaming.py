@@ -0,0 +1,132 @@
+"""
+Management command comparing the time to first byte of the homepage with
+and without HOMEPAGE_STREAMING, through a local gunicorn (WSGI and ASGI).
+
+It seeds a throwaway site like ``bench`` does and turns the section cache
+off, then empties the page cache and the stored page before every request
+so that each one renders the whole page. For each server and mode it
+reports the time to the first byte of HTML and to the last one, and fails
+if the streamed page differs from the rendered one.
+
+    python manage.py bench_streaming --requests 50
+"""
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.benchmark import SERVERS, free_port, percentile, site_env, start_server
+from portfolio.cache import bump_content_version, strip_csrf_token
+from portfolio.models import HomepageSnapshot
+from portfolio.snapshots import PAGE_KEY_PREFIX
+
+
+def timed_get(port, path):
+    """GET ``path`` over HTTP/1.0; return (ms to the first body byte, ms to the last, body)."""
+    start = time.perf_counter()
+    first = None
+    data = b''
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        sock.sendall(f'GET {path} HTTP/1.0\r\nHost: localhost\r\n\r\n'.encode())
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+            if first is None:
+                head_end = data.find(b'\r\n\r\n')
+                if head_end != -1 and len(data) > head_end + 4:
+                    first = time.perf_counter()
+    end = time.perf_counter()
+    head, _, body = data.partition(b'\r\n\r\n')
+    if not head.startswith((b'HTTP/1.0 200', b'HTTP/1.1 200')):
+        raise CommandError(f'GET {path}: {head.splitlines()[0].decode() if head else "no response"}')
+    return (first - start) * 1000, (end - start) * 1000, body
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the homepage time to first byte with and without streaming'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--testimonials', type=int, default=50)
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--images', type=int, default=10, help='Distinct generated images')
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per server and mode')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per server and mode first')
+        parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+        # Used by the command to measure inside the benchmark site's settings
+        parser.add_argument('--phase', choices=['measure'], help='Internal')
+
+    def handle(self, *args, **options):
+        if options['phase'] == 'measure':
+            return self.measure(options)
+
+        workdir = Path(tempfile.mkdtemp(prefix='portfolio-bench-'))
+        env = site_env(workdir)
+        # Every request renders every section
+        env.update({'METRICS_ENABLED': 'False', 'HOMEPAGE_SECTION_CACHE': 'False'})
+        manage = [sys.executable, str(settings.BASE_DIR / 'manage.py')]
+        try:
+            self.stdout.write(f'Seeding the benchmark site in {workdir}...')
+            seed = [*manage, 'bench', '--phase', 'seed']
+            for name in ('projects', 'posts', 'testimonials', 'clients', 'images'):
+                seed += [f'--{name}', str(options[name])]
+            measure = [*manage, 'bench_streaming', '--phase', 'measure', '--servers', *options['servers']]
+            for name in ('requests', 'warmup'):
+                measure += [f'--{name}', str(options[name])]
+            for command in (seed, measure):
+                if subprocess.run(command, env=env, cwd=settings.BASE_DIR).returncode:
+                    raise CommandError(f'{command[2]} step failed')
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def measure(self, options):
+        self.stdout.write(
+            f'{"server":<6} {"mode":<10} {"TTFB p50":>10} {"p95":>9} {"total p50":>10} {"p95":>9}'
+        )
+        for server in options['servers']:
+            pages = {}
+            for streaming in (False, True):
+                # This process's environment points at the benchmark site already
+                env = {**os.environ, 'HOMEPAGE_STREAMING': str(streaming)}
+                first, total, page = self.run(server, env, options)
+                pages[streaming] = page
+                self.stdout.write(
+                    f'{server:<6} {"streaming" if streaming else "rendered":<10} '
+                    f'{statistics.median(first):7.2f} ms {percentile(first, 0.95):6.2f} ms '
+                    f'{statistics.median(total):7.2f} ms {percentile(total, 0.95):6.2f} ms'
+                )
+            if pages[True] != pages[False]:
+                raise CommandError(f'{server}: the streamed homepage differs from the rendered one')
+        self.stdout.write(self.style.SUCCESS('Streamed and rendered pages are identical'))
+
+    def run(self, server, env, options):
+        port = free_port()
+        try:
+            process = start_server(server, port, 1, env)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        first, total = [], []
+        try:
+            for n in range(options['warmup'] + options['requests']):
+                # Neither the page cache nor the stored page may answer
+                bump_content_version()
+                HomepageSnapshot.objects.filter(key__startswith=PAGE_KEY_PREFIX).delete()
+                ttfb, elapsed, body = timed_get(port, '/')
+                if n >= options['warmup']:
+                    first.append(ttfb)
+                    total.append(elapsed)
+        finally:
+            process.terminate()
+            process.wait()
+        return first, total, strip_csrf_token(body.decode())
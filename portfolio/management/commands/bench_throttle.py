@@ -0,0 +1,74 @@
+"""
+Management command load-testing the contact form throttles: per-request
+overhead of the IP and email token buckets and the duplicate check as the
+number of distinct clients grows. Uses a throwaway throttle database.
+"""
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from portfolio.throttling import ContactEmailThrottle, ContactIPThrottle, claim_message
+
+# High enough that every timed request takes the full (writing) path
+BENCH_RATE = '1000000/hour'
+
+
+class BenchIPThrottle(ContactIPThrottle):
+    rate = BENCH_RATE
+
+
+class BenchEmailThrottle(ContactEmailThrottle):
+    rate = BENCH_RATE
+
+
+class Command(BaseCommand):
+    help = 'Measures contact throttle overhead per request at increasing client counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[100, 1000, 10_000])
+        parser.add_argument('--requests', type=int, default=5000, help='Timed requests per run')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+
+        for clients in options['clients']:
+            with tempfile.TemporaryDirectory() as directory, \
+                    override_settings(THROTTLE_DB=Path(directory) / 'throttle.sqlite3'):
+                requests = [self.make_request(factory, i) for i in range(clients)]
+                # Every client has a bucket and a message digest before timing
+                for request in requests:
+                    self.submit(request, 0)
+
+                sample = random.choices(requests, k=options['requests'])
+                start = time.perf_counter()
+                accepted = sum(self.submit(request, n) for n, request in enumerate(sample, 1))
+                elapsed = time.perf_counter() - start
+
+                self.stdout.write(
+                    f'{clients:>7} clients: {elapsed / len(sample) * 1e6:7.1f} us/request '
+                    f'({accepted} of {len(sample)} accepted)'
+                )
+
+    def make_request(self, factory, i):
+        data = {'full_name': f'Client {i}', 'email': f'client{i}@example.com', 'message': f'Hello {i}'}
+        request = factory.post(
+            '/api/contact/', data, format='json',
+            REMOTE_ADDR=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}',
+        )
+        return Request(request, parsers=[JSONParser()])
+
+    def submit(self, request, n):
+        """What the view does per submission: both throttles, then the duplicate check."""
+        for throttle_class in (BenchIPThrottle, BenchEmailThrottle):
+            if not throttle_class().allow_request(request, None):
+                return False
+        # A new message each time so the digest is inserted, not just looked up
+        data = {**request.data, 'message': f"{request.data['message']} #{n}"}
+        return claim_message(data)
@@ -0,0 +1,85 @@
+"""
+Management command comparing the homepage snapshots (portfolio.snapshots)
+with live queries: every stored section is diffed against a fresh
+serialization, and the stored homepage against a fresh render. Exits with
+status 1 when anything differs, so it can run from cron or CI.
+"""
+import difflib
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from portfolio import snapshots
+from portfolio.bootstrap import SECTIONS
+from portfolio.cache import bump_content_version, strip_csrf_token
+from portfolio.views import PortfolioHomeView
+
+
+def _pretty(content):
+    if content is None:
+        return []
+    return json.dumps(json.loads(content), indent=2, ensure_ascii=False).splitlines()
+
+
+class Command(BaseCommand):
+    help = 'Diffs the stored homepage snapshots against live queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sections', nargs='*', help='Sections to check (default: all)')
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Rebuild the sections and the homepage that differ'
+        )
+
+    def handle(self, *args, **options):
+        sections = options['sections'] or list(SECTIONS)
+        unknown = set(sections) - set(SECTIONS)
+        if unknown:
+            raise CommandError(f'Unknown sections: {", ".join(sorted(unknown))}')
+
+        mismatches = snapshots.check(sections)
+        for section, (stored, live) in mismatches.items():
+            self.report(f'section {section}', stored, _pretty(stored), _pretty(live))
+        # Missing rows are built by the next read, so they aren't stale
+        stale = [section for section, (stored, live) in mismatches.items() if stored is not None]
+
+        view = PortfolioHomeView()
+        stored_page = snapshots.get_page(view.cache_name)
+        page_differs = False
+        if stored_page is not None:
+            live_page = self.render_home(view)
+            if stored_page != live_page:
+                page_differs = True
+                self.report('page home', stored_page, stored_page.splitlines(), live_page.splitlines())
+
+        if not stale and not page_differs:
+            self.stdout.write(self.style.SUCCESS('Snapshots match live queries'))
+            if mismatches and options['fix']:
+                snapshots.rebuild(list(mismatches))
+            return
+
+        if options['fix']:
+            snapshots.rebuild(list(mismatches))
+            if page_differs:
+                snapshots.save_page(view.cache_name, live_page)
+            # Bootstrap ETags and cached pages were computed from the stale rows
+            bump_content_version()
+            self.stdout.write(self.style.SUCCESS('Rebuilt the differing snapshots'))
+            return
+        raise CommandError('Snapshots differ from live queries (run with --fix to rebuild them)', returncode=1)
+
+    def render_home(self, view):
+        request = RequestFactory().get('/')
+        view.setup(request)
+        content = render_to_string(view.template_name, view.get_context_data(), request)
+        return strip_csrf_token(content)
+
+    def report(self, name, stored, stored_lines, live_lines):
+        if stored is None:
+            self.stdout.write(f'{name}: not built yet')
+            return
+        self.stdout.write(self.style.WARNING(f'{name}: snapshot differs'))
+        for line in difflib.unified_diff(stored_lines, live_lines, 'snapshot', 'live', lineterm=''):
+            self.stdout.write(f'  {line}')
@@ -0,0 +1,31 @@
+"""
+Management command reporting the contact spool depth and optionally draining
+it, e.g. after a restart or to check that the drainer keeps up.
+"""
+from django.core.management.base import BaseCommand
+
+from portfolio.spool import drain, get_spool_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows the contact message spool depth; --drain saves the spooled messages now'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drain', action='store_true', help='Save every spooled message')
+
+    def handle(self, *args, **options):
+        self.report(get_spool_stats())
+        if options['drain']:
+            saved = drain()
+            self.stdout.write(self.style.SUCCESS(f'Saved {saved} spooled messages'))
+            self.report(get_spool_stats())
+
+    def report(self, stats):
+        oldest = f"{stats['oldest_age']}s" if stats['oldest_age'] is not None else '-'
+        self.stdout.write(
+            f"Pending: {stats['pending']} messages in {stats['files']} files, oldest {oldest}"
+        )
+        if stats['failed']:
+            self.stdout.write(self.style.WARNING(
+                f"Failed: {stats['failed']} messages could not be saved (failed-*.jsonl in the spool directory)"
+            ))
@@ -0,0 +1,45 @@
+"""
+Management command streaming a dataset export (portfolio.bulkexport), the
+same as /api/admin/export/<dataset>.<format> returns. The cursor of the
+newest exported row is printed on stderr, to pass as --since next time.
+
+    python manage.py export_dataset contacts --format csv --output contacts.csv
+    python manage.py export_dataset contacts --since 41250 >> contacts.ndjson
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio import bulkexport
+
+
+class Command(BaseCommand):
+    help = 'Exports contact messages or blog views as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(bulkexport.DATASETS))
+        parser.add_argument('--format', dest='export_format', choices=list(bulkexport.FORMATS), default='ndjson')
+        parser.add_argument('--since', help='Cursor printed by a previous export: only export newer rows')
+        parser.add_argument('--output', help='File to write (default: standard output)')
+
+    def handle(self, *args, **options):
+        dataset = bulkexport.DATASETS[options['dataset']]
+        since = None
+        if options['since']:
+            try:
+                since = dataset.parse_since(options['since'])
+            except ValueError:
+                raise CommandError(f'Invalid --since cursor "{options["since"]}"')
+        rows, newest = dataset.queryset(since)
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in bulkexport.stream(dataset, options['export_format'], rows):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if newest is None:
+            self.stderr.write('Nothing to export')
+        else:
+            self.stderr.write(f'Cursor: {bulkexport.cursor_value(newest)}')
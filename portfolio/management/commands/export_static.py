@@ -0,0 +1,30 @@
+"""
+Management command writing the public site to EXPORT_DIR as static files
+(see portfolio.export). Run collectstatic first so hashed assets are copied.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from portfolio.export import Exporter, copy_tree, export_dir
+
+
+class Command(BaseCommand):
+    help = 'Exports the homepage, blog posts and API lists as static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-assets', action='store_true',
+            help='Skip copying collected static files and uploaded media'
+        )
+
+    def handle(self, *args, **options):
+        exporter = Exporter()
+        exporter.export_all()
+        self.stdout.write(f'Rendered {exporter.written} pages')
+
+        if not options['no_assets']:
+            static = copy_tree(settings.STATIC_ROOT, export_dir() / settings.STATIC_URL.strip('/'))
+            media = copy_tree(settings.MEDIA_ROOT, export_dir() / settings.MEDIA_URL.strip('/'))
+            self.stdout.write(f'Copied {static} static and {media} media files')
+
+        self.stdout.write(self.style.SUCCESS(f'Exported the site to {export_dir()}'))
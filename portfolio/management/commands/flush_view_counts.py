@@ -0,0 +1,21 @@
+"""
+Management command to save buffered blog post views.
+Workers buffer views in memory; this asks each of them to write theirs now.
+"""
+from django.core.management.base import BaseCommand
+
+from portfolio.counters import request_flush, view_counts
+
+
+class Command(BaseCommand):
+    help = 'Asks every worker to save its buffered blog post view counts'
+
+    def handle(self, *args, **options):
+        request_flush()
+        saved = view_counts.flush()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Flush requested; workers save pending views within '
+                f'{view_counts.tick:g}s ({saved} saved by this process)'
+            )
+        )
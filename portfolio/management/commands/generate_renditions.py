@@ -0,0 +1,55 @@
+"""
+Management command to backfill responsive image renditions for media that
+was uploaded before renditions existed (or after changing the widths).
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from portfolio.images import IMAGE_FIELDS, needs_renditions, update_renditions
+
+
+class Command(BaseCommand):
+    help = 'Generates missing responsive renditions for every uploaded image'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regenerate renditions even for images that already have them'
+        )
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model, field_name in IMAGE_FIELDS.items():
+            for instance in model.objects.exclude(**{field_name: ''}).iterator():
+                if options['force'] or needs_renditions(instance):
+                    jobs.append((model, instance.pk))
+
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS('All renditions are up to date'))
+            return
+
+        self.stdout.write(f'Generating renditions for {len(jobs)} images...')
+        failed = 0
+        with ThreadPoolExecutor(max_workers=settings.IMAGE_RENDITION_WORKERS) as executor:
+            futures = [executor.submit(self.process, model, pk) for model, pk in jobs]
+            for future in futures:
+                error = future.result()
+                if error:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(error))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Generated renditions for {len(jobs) - failed} images')
+        )
+
+    def process(self, model, pk):
+        try:
+            update_renditions(model, pk)
+        except Exception as e:
+            return f'{model.__name__} {pk}: {e}'
+        finally:
+            connection.close()
+        return None
@@ -0,0 +1,19 @@
+"""
+Management command to rebuild the full-text search index from scratch.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from portfolio.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the blog post and project full-text search index'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        with transaction.atomic():
+            count = backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {count} documents ({backend.name} backend)')
+        )
@@ -0,0 +1,59 @@
+"""
+Management command copying the primary SQLite database over the SQLite read
+replicas (settings.DATABASE_REPLICAS), once or every REPLICA_SYNC_INTERVAL
+seconds with --watch. Server replicas (PostgreSQL) are left to the database
+server's own replication.
+"""
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from portfolio.replicas import sqlite_replicas, sync_sqlite_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary SQLite database to the SQLite read replicas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true', help='Keep copying whenever the primary changes')
+        parser.add_argument(
+            '--interval', type=float, default=settings.REPLICA_SYNC_INTERVAL,
+            help='Seconds between checks with --watch',
+        )
+
+    def handle(self, *args, **options):
+        replicas = sqlite_replicas()
+        if not replicas:
+            raise CommandError('No SQLite replicas configured (set DATABASE_REPLICAS)')
+        if settings.DATABASES[DEFAULT_DB_ALIAS]['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('The primary database is not SQLite')
+
+        if not options['watch']:
+            self.sync()
+            return
+
+        source = sqlite3.connect(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'], uri=True)
+        try:
+            synced_version = None
+            cache_versions = None
+            while True:
+                # Changes whenever another connection commits to the primary
+                version = source.execute('PRAGMA data_version').fetchone()[0]
+                if version != synced_version:
+                    cache_versions = self.sync(source, cache_versions)
+                    synced_version = version
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            source.close()
+
+    def sync(self, source=None, cache_versions=None):
+        start = time.perf_counter()
+        aliases, cache_versions = sync_sqlite_replicas(source, cache_versions)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f'Copied the primary to {", ".join(aliases)} in {elapsed:.0f} ms'))
+        return cache_versions
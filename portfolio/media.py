@@ -0,0 +1,142 @@
+"""
+Production serving of uploaded media (settings.MEDIA_SERVE).
+
+Files whose names carry a content hash (uploads saved by HashedMediaStorage,
+image renditions) never change, so they are cached for a year as
+``immutable``; other files are revalidated against their ETag and
+Last-Modified. Single byte ranges are answered with 206 Partial Content.
+
+Responses are FileResponses over the open file: gunicorn hands them to
+sendfile(2), a range included, without copying the bytes through Python.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import is_hashed_name
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Read-only view of ``length`` bytes of ``file`` from ``start``, keeping fileno() for sendfile."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) of a single-range ``Range`` header, end inclusive;
+    None to send the whole file, ValueError when the range is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.group(1) == match.group(2) == '':
+        # Malformed or multiple ranges: the whole file is a valid answer
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def range_applies(request, etag, mtime):
+    """Whether an ``If-Range`` validator (if any) still matches the file."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid media path')
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404('Media file not found')
+    if not os.path.isfile(fullpath):
+        raise Http404('Media file not found')
+
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = file_response(request, fullpath, stat.st_size, etag, stat.st_mtime)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if is_hashed_name(path):
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    return response
+
+
+def file_response(request, fullpath, size, etag, mtime):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    byte_range = None
+    if 'Range' in request.headers and range_applies(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+        return response
+
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(file, start, end - start + 1), content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        # Also tells gunicorn's sendfile how many bytes to send from the offset
+        response['Content-Length'] = end - start + 1
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,396 @@
+"""
+Per-route request metrics.
+
+MetricsMiddleware records the wall time, the number and total time of SQL
+queries, the time spent in serializers and the response size of every
+request, per route (URL name) and method. Values go into HDR-style
+histograms: log-linear buckets with 16 sub-buckets per power of two, so any
+recorded value is known to within 1/16 (6.25%) whatever its magnitude, in a
+few hundred counters at most.
+
+Every process keeps its histograms in memory and writes them to METRICS_DIR
+every METRICS_FLUSH_INTERVAL seconds, so that /metrics, answered by whichever
+worker gets the scrape, merges the histograms of all workers into one
+Prometheus text exposition. The files of exited workers are folded into one
+cumulative file by the next scrape, so the totals never go down and the
+directory doesn't grow with every worker restart.
+"""
+import atexit
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+
+SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Values below this get a bucket each
+_LINEAR_LIMIT = _SUB_BUCKETS * 2
+
+# Histogram name -> (metric name, help, scale from recorded unit, ``le`` boundaries)
+HISTOGRAMS = {
+    'duration': (
+        'portfolio_request_duration_seconds', 'Wall time of the request.', 1e-6,
+        (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'db_queries': (
+        'portfolio_request_db_queries', 'SQL queries run by the request.', 1,
+        (0, 1, 2, 3, 5, 10, 15, 25, 50, 100),
+    ),
+    'db_time': (
+        'portfolio_request_db_duration_seconds', 'Time spent running SQL queries.', 1e-6,
+        (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+    ),
+    'serializer_time': (
+        'portfolio_request_serializer_duration_seconds', 'Time spent in serializers.', 1e-6,
+        (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+    ),
+    'response_size': (
+        'portfolio_response_size_bytes', 'Size of the response body.', 1,
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+}
+RESPONSES_METRIC = 'portfolio_responses_total'
+# Label values are bounded: any other method is counted as OTHER_METHOD, and
+# requests no URL pattern matched as UNMATCHED_ROUTE
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+OTHER_METHOD = 'other'
+UNMATCHED_ROUTE = 'unmatched'
+# Metrics of the workers that have exited, in METRICS_DIR
+EXITED_FILE = 'exited.json'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def bucket_index(value):
+    """Return the histogram bucket of a non-negative integer ``value``."""
+    if value < _LINEAR_LIMIT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+
+def bucket_upper_bound(index):
+    """Return the largest value that falls in bucket ``index``."""
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    return (((index & (_SUB_BUCKETS - 1)) + _SUB_BUCKETS + 1) << shift) - 1
+
+
+class Histogram:
+    """Counts of non-negative integers in log-linear buckets."""
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+
+    def record(self, value):
+        index = value if value < _LINEAR_LIMIT else bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the ``fraction`` quantile (0 when empty)."""
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return bucket_upper_bound(index)
+        return 0
+
+    def cumulative(self, boundaries):
+        """Yield (boundary, values <= boundary) for ascending ``boundaries``."""
+        indexes = sorted(self.counts)
+        position = seen = 0
+        for boundary in boundaries:
+            while position < len(indexes) and bucket_upper_bound(indexes[position]) <= boundary:
+                seen += self.counts[indexes[position]]
+                position += 1
+            yield boundary, seen
+
+    def to_dict(self):
+        return {'counts': self.counts, 'count': self.count, 'total': self.total}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data['counts'].items()}
+        histogram.count = data['count']
+        histogram.total = data['total']
+        return histogram
+
+
+class RequestStats:
+    """What one request spent, filled in while it runs."""
+    __slots__ = ('queries', 'db_ns', 'serializer_ns', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ns = 0
+        self.serializer_ns = 0
+        self.serializing = False
+
+
+# Stats of the request being handled; sync_to_async copies the context, so
+# queries an async view runs on a worker thread are counted too
+_current = ContextVar('portfolio_request_stats', default=None)
+
+
+def start_request():
+    """Begin collecting stats for the current request; returns (stats, token)."""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding every query to the current request's stats."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter_ns()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_ns += time.perf_counter_ns() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created handler putting record_query on every new connection."""
+    if record_query not in connection.execute_wrappers:
+        # At the bottom: execute_wrapper() blocks pop whatever is on top when they end
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class measure_serialization:
+    """
+    Context manager adding the time spent in the block to the current
+    request's serializer time. Nested blocks are counted once.
+    """
+    __slots__ = ('stats', 'start')
+
+    def __enter__(self):
+        stats = _current.get()
+        if stats is None or stats.serializing:
+            self.stats = None
+            return
+        stats.serializing = True
+        self.stats = stats
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        stats = self.stats
+        if stats is not None:
+            stats.serializer_ns += time.perf_counter_ns() - self.start
+            stats.serializing = False
+
+
+class Registry:
+    """This process's histograms by (route, method), plus response counts by status."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.responses = Counter()
+        self._writer_pid = None
+        self._path = None
+
+    def observe(self, route, method, status, duration_ns, stats, size):
+        self._ensure_writer()
+        key = (route, method)
+        with self._lock:
+            histograms = self.histograms.get(key)
+            if histograms is None:
+                histograms = self.histograms[key] = {name: Histogram() for name in HISTOGRAMS}
+            histograms['duration'].record(duration_ns // 1000)
+            histograms['db_queries'].record(stats.queries)
+            histograms['db_time'].record(stats.db_ns // 1000)
+            histograms['serializer_time'].record(stats.serializer_ns // 1000)
+            if size is not None:
+                histograms['response_size'].record(size)
+            self.responses[(route, method, status)] += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'histograms': [
+                    [route, method, {name: histogram.to_dict() for name, histogram in histograms.items()}]
+                    for (route, method), histograms in self.histograms.items()
+                ],
+                'responses': [[*key, count] for key, count in self.responses.items()],
+            }
+
+    def write(self):
+        """Save this process's metrics for the other workers' /metrics."""
+        if self._path is None:
+            return
+        _write_json(self._path, self.to_dict())
+
+    def _ensure_writer(self):
+        # Started lazily so that every forked gunicorn worker gets its own thread
+        if self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+            self.histograms.clear()
+            self.responses.clear()
+            # A new file per process: pids get reused
+            self._path = Path(settings.METRICS_DIR) / f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        thread = threading.Thread(target=self._run_writer, name='metrics-writer', daemon=True)
+        thread.start()
+
+    def _run_writer(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                self.write()
+            except OSError:
+                pass  # Retried on the next tick
+
+
+registry = Registry()
+
+
+@atexit.register
+def _write_at_exit():
+    try:
+        registry.write()
+    except OSError:
+        pass
+
+
+def _write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.metrics-')
+    with os.fdopen(fd, 'w') as temp_file:
+        json.dump(data, temp_file)
+    os.replace(temp_path, path)
+
+
+def _merge(histograms, responses, data):
+    """Add the metrics ``data`` (as written by Registry.write) to the totals."""
+    for route, method, by_name in data['histograms']:
+        merged = histograms.setdefault((route, method), {name: Histogram() for name in HISTOGRAMS})
+        for name, histogram in by_name.items():
+            merged[name].merge(Histogram.from_dict(histogram))
+    for route, method, status, count in data['responses']:
+        responses[(route, method, status)] += count
+
+
+def _read(paths, histograms, responses):
+    for path in paths:
+        try:
+            _merge(histograms, responses, json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _fold_exited(directory):
+    """Merge the files of workers that are no longer running into EXITED_FILE."""
+    exited = []
+    for path in directory.glob('*-*.json'):
+        try:
+            pid = int(path.stem.split('-')[0])
+        except ValueError:
+            continue
+        if pid != os.getpid() and not _is_running(pid):
+            exited.append(path)
+    if not exited:
+        return
+    histograms, responses = {}, Counter()
+    _read([directory / EXITED_FILE, *exited], histograms, responses)
+    _write_json(directory / EXITED_FILE, {
+        'histograms': [
+            [route, method, {name: histogram.to_dict() for name, histogram in by_name.items()}]
+            for (route, method), by_name in histograms.items()
+        ],
+        'responses': [[*key, count] for key, count in responses.items()],
+    })
+    for path in exited:
+        path.unlink(missing_ok=True)
+
+
+def collect():
+    """Merge the metrics of every worker; returns (histograms, responses)."""
+    histograms = {}
+    responses = Counter()
+    directory = Path(settings.METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    # One scrape at a time, so none sees a folded file both before and after
+    with open(directory / '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            _fold_exited(directory)
+            own = registry._path
+            _read([path for path in directory.glob('*.json') if path != own], histograms, responses)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    _merge(histograms, responses, registry.to_dict())
+    return histograms, responses
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Return every worker's metrics in the Prometheus text format."""
+    histograms, responses = collect()
+    lines = []
+    for name, (metric, help_text, scale, boundaries) in HISTOGRAMS.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        # Boundaries in the recorded unit (microseconds, bytes, queries)
+        recorded = [round(boundary / scale) for boundary in boundaries]
+        for (route, method), by_name in sorted(histograms.items()):
+            histogram = by_name[name]
+            labels = f'route="{_escape(route)}",method="{_escape(method)}"'
+            for boundary, (_, count) in zip(boundaries, histogram.cumulative(recorded)):
+                lines.append(f'{metric}_bucket{{{labels},le="{_number(boundary)}"}} {count}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{{labels}}} {_number(histogram.total * scale)}')
+            lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+
+    lines += [f'# HELP {RESPONSES_METRIC} Responses sent.', f'# TYPE {RESPONSES_METRIC} counter']
+    for (route, method, status), count in sorted(responses.items()):
+        lines.append(
+            f'{RESPONSES_METRIC}{{route="{_escape(route)}",method="{_escape(method)}",status="{status}"}} {count}'
+        )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,136 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics, replicas
+from .querybudget import QueryBudgetExceeded, count_queries, get_view_budget
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """
+    Development middleware enforcing the ``query_budget`` declared on views.
+    Over-budget views are logged as warnings, or fail with
+    QueryBudgetExceeded when QUERY_BUDGET_RAISE is enabled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = get_view_budget(view_func)
+        # Async views can't be run from here; their queries happen on
+        # sync_to_async threads the counter doesn't see anyway
+        if budget is None or iscoroutinefunction(view_func):
+            return None
+
+        with count_queries() as counter:
+            response = view_func(request, *view_args, **view_kwargs)
+            # Template responses run their queries while rendering
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+
+        if len(counter) > budget:
+            error = QueryBudgetExceeded(
+                f'{request.method} {request.path}', budget, counter.queries
+            )
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise error
+            logger.warning(str(error))
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records per-route request metrics (see portfolio.metrics). First in
+    MIDDLEWARE so the wall time covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter_ns()
+        stats, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.observe(request, response, stats, time.perf_counter_ns() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter_ns()
+        stats, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.observe(request, response, stats, time.perf_counter_ns() - start)
+        return response
+
+    def observe(self, request, response, stats, duration_ns):
+        match = request.resolver_match
+        # URL names keep the label set small; static files and 404s never resolve
+        route = match.view_name if match is not None else metrics.UNMATCHED_ROUTE
+        method = request.method if request.method in metrics.METHODS else metrics.OTHER_METHOD
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+        metrics.registry.observe(route, method, response.status_code, duration_ns, stats, size)
+
+
+class ReplicaMiddleware:
+    """
+    Sets up the read replica routing of each request (see
+    portfolio.replicas), and pins visitors who just wrote something to the
+    primary for REPLICA_PIN_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = replicas.start_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.end_request(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = replicas.start_request(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replicas.end_request(token)
+        return self.pin(request, response)
+
+    def pin(self, request, response):
+        if request.method not in replicas.SAFE_METHODS:
+            response.set_cookie(
+                replicas.PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
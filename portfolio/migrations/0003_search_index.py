@@ -0,0 +1,48 @@
+from django.db import migrations
+
+SEARCH_TABLE = 'portfolio_search'
+
+
+def create_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                f"kind UNINDEXED, object_id UNINDEXED, visible UNINDEXED, "
+                f"title, summary, body, "
+                f"tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+        except Exception:
+            # SQLite built without FTS5: search falls back to the Python index
+            return
+        # rowid = object id * 2 + type code (blog 0, project 1)
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, visible, title, summary, body) "
+            f"SELECT id * 2, 'blog', id, is_published, title, excerpt, content FROM portfolio_blogpost"
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, visible, title, summary, body) "
+            f"SELECT id * 2 + 1, 'project', id, is_active, title, technologies, description FROM portfolio_project"
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0002_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
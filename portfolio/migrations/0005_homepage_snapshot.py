@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HomepageSnapshot',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Homepage Snapshot',
+                'verbose_name_plural': 'Homepage Snapshots',
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:20
+
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+def technology_slug(name):
+    # Frozen copy of portfolio.models.technology_slug
+    return slugify(name.replace('+', ' plus ').replace('#', ' sharp '))
+
+
+def backfill_tags(apps, schema_editor):
+    Project = apps.get_model('portfolio', 'Project')
+    Technology = apps.get_model('portfolio', 'Technology')
+    Tag = Project.tags.through
+
+    project_tags = {}
+    names = {}
+    for project_id, technologies in Project.objects.values_list('id', 'technologies'):
+        slugs = project_tags[project_id] = set()
+        for name in technologies.split(','):
+            name = name.strip()
+            slug = technology_slug(name)
+            if slug:
+                names.setdefault(slug, name)
+                slugs.add(slug)
+
+    now = timezone.now()
+    Technology.objects.bulk_create(
+        [Technology(name=name, slug=slug, created_at=now, updated_at=now) for slug, name in names.items()]
+    )
+    ids = dict(Technology.objects.values_list('slug', 'id'))
+    Tag.objects.bulk_create(
+        [
+            Tag(project_id=project_id, technology_id=ids[slug])
+            for project_id, slugs in project_tags.items()
+            for slug in slugs
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_homepage_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Technology',
+                'verbose_name_plural': 'Technologies',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', to='portfolio.technology'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
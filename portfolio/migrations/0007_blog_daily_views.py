@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_technology_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogPostDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='portfolio.blogpost')),
+            ],
+            options={
+                'verbose_name': 'Blog Post Daily Views',
+                'verbose_name_plural': 'Blog Post Daily Views',
+                'ordering': ['date', 'post'],
+                'indexes': [models.Index(fields=['date'], name='blog_daily_views_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='blogpostdailyviews',
+            constraint=models.UniqueConstraint(fields=('post', 'date'), name='blog_daily_views_unique'),
+        ),
+    ]
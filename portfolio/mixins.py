@@ -0,0 +1,181 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .fastserializers import get_plan
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / Last-Modified validators to read-only viewsets and answers
+    conditional GETs with 304 Not Modified before anything is serialized.
+
+    List validators come from a single aggregate query (max of updated_at
+    plus row count); object validators come from the loaded instance.
+    """
+    # Keyword arguments for django.utils.cache.patch_cache_control
+    cache_control = {'public': True, 'max_age': 0, 'must_revalidate': True}
+    # Timestamp field used for Last-Modified
+    last_modified_field = 'updated_at'
+    # Extra fields that change without touching updated_at (summed for lists);
+    # setting any leaves ETag as the only validator
+    validator_fields = ()
+    # The validator_fields that are also part of the object validators
+    # (None: all of them)
+    object_validator_fields = None
+    # Forward relations (select_related) whose fields are serialized too, so
+    # whose timestamps are part of the validators
+    validator_relations = ()
+
+    def get_validator_querysets(self):
+        """Querysets whose changes invalidate the list response."""
+        model = self.get_queryset().model
+        return [self.filter_queryset(self.get_queryset())] + [
+            model._meta.get_field(name).related_model.objects.all()
+            for name in self.validator_relations
+        ]
+
+    def _timestamps(self, instance):
+        """Timestamps of ``instance`` and of its validator_relations."""
+        timestamps = [getattr(instance, self.last_modified_field)]
+        for name in self.validator_relations:
+            related = getattr(instance, name)
+            timestamps.append(getattr(related, self.last_modified_field) if related is not None else None)
+        return timestamps
+
+    def get_list_aggregates(self):
+        aggregates = {
+            'last_modified': Max(self.last_modified_field),
+            'count': Count('pk'),
+        }
+        for field in self.validator_fields:
+            aggregates[field] = Sum(field)
+        return aggregates
+
+    def get_list_validators(self):
+        return self._list_validators([
+            queryset.order_by().aggregate(**self.get_list_aggregates())
+            for queryset in self.get_validator_querysets()
+        ])
+
+    async def aget_list_validators(self):
+        """Async get_list_validators for the ASGI views."""
+        return self._list_validators([
+            await queryset.order_by().aaggregate(**self.get_list_aggregates())
+            for queryset in self.get_validator_querysets()
+        ])
+
+    def _list_validators(self, results):
+        parts = [self.request.get_full_path()]
+        last_modified = None
+        for values in results:
+            parts.append(repr(sorted(values.items())))
+            if values['last_modified'] and (
+                last_modified is None or values['last_modified'] > last_modified
+            ):
+                last_modified = values['last_modified']
+        return self._make_validators(parts, last_modified, self.validator_fields)
+
+    def get_page_validators(self, page):
+        """Validators computed from the rows of an already fetched page."""
+        parts = [self.request.get_full_path()]
+        last_modified = None
+        for instance in page:
+            timestamps = self._timestamps(instance)
+            parts.append((instance.pk, *timestamps, *[getattr(instance, field) for field in self.validator_fields]))
+            for modified in filter(None, timestamps):
+                if last_modified is None or modified > last_modified:
+                    last_modified = modified
+        return self._make_validators(parts, last_modified, self.validator_fields)
+
+    def get_object_validators(self, instance):
+        fields = self.validator_fields if self.object_validator_fields is None else self.object_validator_fields
+        timestamps = self._timestamps(instance)
+        parts = [self.request.get_full_path(), instance.pk, *timestamps]
+        parts.extend(getattr(instance, field) for field in fields)
+        return self._make_validators(parts, max(filter(None, timestamps), default=None), fields)
+
+    def _make_validators(self, parts, last_modified, fields):
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        if fields:
+            # Those fields change without moving the timestamp, so a
+            # Last-Modified would answer If-Modified-Since with stale data
+            last_modified = None
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return quote_etag(digest), timestamp
+
+    def get_not_modified_response(self, validators):
+        """Return a 304 response if the client's copy is current, else None."""
+        etag, last_modified = validators
+        return get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+
+    def set_validators(self, response, validators):
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        cursor_param = getattr(self.paginator, 'cursor_query_param', None)
+        if cursor_param in request.query_params:
+            return self.cursor_list(request)
+
+        validators = self.get_list_validators()
+        response = self.get_not_modified_response(validators)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return self.set_validators(response, validators)
+
+    def cursor_list(self, request):
+        # Keyset pages are cheap to fetch but aggregates over the whole
+        # queryset are not, so validate against the page rows instead
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        validators = self.get_page_validators(page)
+        response = self.get_not_modified_response(validators)
+        if response is None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        return self.set_validators(response, validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.get_object_validators(instance)
+        response = self.get_not_modified_response(validators)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, validators)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+            patch_cache_control(response, **self.cache_control)
+        return response
+
+
+class FastListMixin:
+    """
+    Serializes list responses through a precompiled FieldPlan: rows are read
+    with .values() and converted column by column, so no model instances or
+    per-object serializer fields are built. The output is identical to the
+    viewset's serializer. Disabled with settings.FAST_SERIALIZERS = False.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        plan = get_plan(self.get_serializer_class())
+        queryset = plan.values(self.filter_queryset(self.get_queryset()))
+        context = self.get_serializer_context()
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page, context))
+        return Response(plan.serialize(queryset, context))
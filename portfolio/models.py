@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -7,6 +9,7 @@ class Profile(models.Model):
     name = models.CharField(max_length=100)
     title = models.CharField(max_length=100)
     avatar = models.ImageField(upload_to='profile/', blank=True, null=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField()
     email = models.EmailField()
     phone = models.CharField(max_length=20)
@@ -36,6 +39,7 @@ class Service(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
     icon = models.ImageField(upload_to='services/', blank=True, null=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     order = models.IntegerField(default=0, help_text='Display order')
     is_active = models.BooleanField(default=True)
 
@@ -44,6 +48,9 @@ class Service(models.Model):
 
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], condition=Q(is_active=True), name='service_active_order_idx'),
+        ]
         verbose_name = 'Service'
         verbose_name_plural = 'Services'
 
@@ -72,6 +79,14 @@ class TimelineEntry(models.Model):
 
     class Meta:
         ordering = ['-start_date', 'order']
+        indexes = [
+            models.Index(fields=['-start_date', 'order'], condition=Q(is_active=True), name='timeline_active_start_idx'),
+            models.Index(
+                fields=['type', '-start_date', 'order'],
+                condition=Q(is_active=True),
+                name='timeline_active_type_idx'
+            ),
+        ]
         verbose_name = 'Timeline Entry'
         verbose_name_plural = 'Timeline Entries'
 
@@ -99,6 +114,9 @@ class Skill(models.Model):
 
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], condition=Q(is_active=True), name='skill_active_order_idx'),
+        ]
         verbose_name = 'Skill'
         verbose_name_plural = 'Skills'
 
@@ -129,11 +147,53 @@ class ProjectCategory(models.Model):
         super().save(*args, **kwargs)
 
 
+def technology_slug(name):
+    """Normalized tag of a technology name: "C++" -> "c-plus-plus", "Node.js" -> "nodejs"."""
+    return slugify(name.replace('+', ' plus ').replace('#', ' sharp '))
+
+
+def parse_technologies(technologies):
+    """Return {slug: name} of a comma-separated technologies string, in order."""
+    tags = {}
+    for name in technologies.split(','):
+        name = name.strip()
+        slug = technology_slug(name)
+        if slug:
+            tags.setdefault(slug, name)
+    return tags
+
+
+class Technology(models.Model):
+    """
+    Technology tag of projects, derived from Project.technologies whenever a
+    project is saved (see Project.sync_tags).
+    """
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Technology'
+        verbose_name_plural = 'Technologies'
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = technology_slug(self.name)
+        super().save(*args, **kwargs)
+
+
 class Project(models.Model):
     """Portfolio projects"""
     title = models.CharField(max_length=200)
     description = models.TextField()
     image = models.ImageField(upload_to='projects/')
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     category = models.ForeignKey(
         ProjectCategory,
         on_delete=models.SET_NULL,
@@ -143,6 +203,8 @@ class Project(models.Model):
     link = models.URLField(blank=True, help_text='Project live URL')
     github_url = models.URLField(blank=True, help_text='GitHub repository URL')
     technologies = models.CharField(max_length=500, help_text='Comma-separated technologies used')
+    # Normalized from technologies, for filtering and counting by technology
+    tags = models.ManyToManyField(Technology, related_name='projects', blank=True, editable=False)
     created_date = models.DateField()
     featured = models.BooleanField(default=False)
     order = models.IntegerField(default=0, help_text='Display order')
@@ -153,17 +215,40 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['-featured', 'order', '-created_date']
+        indexes = [
+            models.Index(
+                fields=['-featured', 'order', '-created_date'],
+                condition=Q(is_active=True),
+                name='project_active_order_idx'
+            ),
+            models.Index(
+                fields=['category', '-featured', 'order', '-created_date'],
+                condition=Q(is_active=True),
+                name='project_category_order_idx'
+            ),
+        ]
         verbose_name = 'Project'
         verbose_name_plural = 'Projects'
 
     def __str__(self):
         return self.title
 
+    def sync_tags(self):
+        """Point tags at the technologies currently listed, creating missing ones."""
+        names = parse_technologies(self.technologies)
+        existing = set(Technology.objects.filter(slug__in=names).values_list('slug', flat=True))
+        Technology.objects.bulk_create(
+            [Technology(name=name, slug=slug) for slug, name in names.items() if slug not in existing],
+            ignore_conflicts=True,
+        )
+        self.tags.set(Technology.objects.filter(slug__in=names))
+
 
 class Testimonial(models.Model):
     """Client testimonials"""
     client_name = models.CharField(max_length=100)
     client_avatar = models.ImageField(upload_to='testimonials/')
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     content = models.TextField()
     date = models.DateField()
     order = models.IntegerField(default=0, help_text='Display order')
@@ -174,6 +259,9 @@ class Testimonial(models.Model):
 
     class Meta:
         ordering = ['order', '-date']
+        indexes = [
+            models.Index(fields=['order', '-date'], condition=Q(is_active=True), name='testimonial_active_order_idx'),
+        ]
         verbose_name = 'Testimonial'
         verbose_name_plural = 'Testimonials'
 
@@ -185,6 +273,7 @@ class Client(models.Model):
     """Client logos"""
     name = models.CharField(max_length=100)
     logo = models.ImageField(upload_to='clients/')
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     website = models.URLField(blank=True)
     order = models.IntegerField(default=0, help_text='Display order')
     is_active = models.BooleanField(default=True)
@@ -194,6 +283,9 @@ class Client(models.Model):
 
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], condition=Q(is_active=True), name='client_active_order_idx'),
+        ]
         verbose_name = 'Client'
         verbose_name_plural = 'Clients'
 
@@ -208,6 +300,7 @@ class BlogPost(models.Model):
     content = models.TextField()
     excerpt = models.TextField(help_text='Short preview text')
     featured_image = models.ImageField(upload_to='blog/')
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     category = models.CharField(max_length=100, default='Design')
     published_date = models.DateField()
     updated_date = models.DateField(auto_now=True)
@@ -220,6 +313,14 @@ class BlogPost(models.Model):
 
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            models.Index(fields=['-published_date'], condition=Q(is_published=True), name='blog_published_date_idx'),
+            models.Index(
+                fields=['-published_date'],
+                condition=Q(is_published=True, featured=True),
+                name='blog_featured_date_idx'
+            ),
+        ]
         verbose_name = 'Blog Post'
         verbose_name_plural = 'Blog Posts'
 
@@ -232,18 +333,60 @@ class BlogPost(models.Model):
         super().save(*args, **kwargs)
 
 
+class BlogPostDailyViews(models.Model):
+    """Views of a blog post on one day (UTC), added by the view counter's flushes"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'post']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'date'], name='blog_daily_views_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='blog_daily_views_date_idx'),
+        ]
+        verbose_name = 'Blog Post Daily Views'
+        verbose_name_plural = 'Blog Post Daily Views'
+
+    def __str__(self):
+        return f"{self.post} - {self.date}: {self.views}"
+
+
 class ContactMessage(models.Model):
     """Contact form submissions"""
     full_name = models.CharField(max_length=100)
     email = models.EmailField()
     message = models.TextField()
-    submitted_date = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, which would stamp spooled messages with the time they are saved
+    submitted_date = models.DateTimeField(default=timezone.now, editable=False)
     is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['-submitted_date']
+        indexes = [
+            models.Index(fields=['-submitted_date'], name='contact_submitted_idx'),
+        ]
         verbose_name = 'Contact Message'
         verbose_name_plural = 'Contact Messages'
 
     def __str__(self):
         return f"Message from {self.full_name} - {self.submitted_date.strftime('%Y-%m-%d')}"
+
+
+class HomepageSnapshot(models.Model):
+    """
+    Pre-serialized homepage section (or rendered page), rebuilt whenever the
+    content it shows changes. See portfolio/snapshots.py.
+    """
+    key = models.CharField(max_length=50, primary_key=True)
+    content = models.TextField()
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Homepage Snapshot'
+        verbose_name_plural = 'Homepage Snapshots'
+
+    def __str__(self):
+        return self.key
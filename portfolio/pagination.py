@@ -0,0 +1,109 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Passing ``?cursor=`` (empty for the first page) switches to keyset
+    pagination over the queryset ordering plus an id tiebreaker: each page
+    seeks past the last row of the previous one instead of using OFFSET, so
+    no COUNT query is run, latency doesn't grow with depth, and rows inserted
+    meanwhile don't shift later pages.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    # Set per request by paginate_queryset
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*[
+            f'-{name}' if descending else name for name, descending in self.ordering
+        ])
+
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            queryset = queryset.filter(self.get_seek_filter(queryset.model, cursor))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_ordering(self, queryset):
+        """Return [(field name, descending)] ending with a unique pk tiebreaker."""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        fields = [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in ordering
+        ]
+        if not any(name in ('pk', 'id') for name, _ in fields):
+            # Ascending so that SQLite can walk the rowid-suffixed indexes
+            fields.append(('pk', False))
+        return fields
+
+    def get_seek_filter(self, model, cursor):
+        """Rows strictly after the cursor position in the current ordering."""
+        values = self.decode_cursor(model, cursor)
+        seek = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending else 'gt'
+            seek |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        # Redundant bound on the leading column so the index range can be seeked
+        name, descending = self.ordering[0]
+        bound = Q(**{f"{name}__{'lte' if descending else 'gte'}": values[0]})
+        return bound & seek
+
+    def encode_cursor(self, row):
+        values = [getattr(row, name) for name, _ in self.ordering]
+        data = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, model, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.pk.to_python(raw) if name == 'pk'
+                else model._meta.get_field(name).to_python(raw)
+                for (name, _), raw in zip(self.ordering, raw_values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.keyset:
+            if not self.has_next:
+                return None
+            url = self.request.build_absolute_uri()
+            return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+        return super().get_next_link()
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,69 @@
+"""
+Query budgets: declare how many SQL queries a view may run and get told
+when it goes over.
+
+Views declare their budget with a ``query_budget`` class attribute. The
+``query_budget`` context manager enforces a budget around any block of code
+(handy in tests and the shell), and ``QueryBudgetMiddleware`` checks every
+view that declares one while DEBUG is on.
+"""
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a block of code runs more queries than its budget."""
+
+    def __init__(self, label, budget, queries):
+        self.label = label
+        self.budget = budget
+        self.queries = queries
+        sql = '\n'.join(f'  {i}. {query}' for i, query in enumerate(queries, 1))
+        super().__init__(
+            f'{label} ran {len(queries)} queries, budget is {budget}:\n{sql}'
+        )
+
+
+class QueryCounter:
+    """Execute wrapper recording the SQL of every query it sees."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+
+@contextmanager
+def count_queries():
+    """Count the queries run on every configured database inside the block."""
+    counter = QueryCounter()
+    wrapped = []
+    try:
+        for connection in connections.all():
+            wrapped.append(connection.execute_wrapper(counter))
+            wrapped[-1].__enter__()
+        yield counter
+    finally:
+        for wrapper in reversed(wrapped):
+            wrapper.__exit__(None, None, None)
+
+
+@contextmanager
+def query_budget(budget, label='Block'):
+    """Raise QueryBudgetExceeded if the block runs more than ``budget`` queries."""
+    with count_queries() as counter:
+        yield counter
+    if len(counter) > budget:
+        raise QueryBudgetExceeded(label, budget, counter.queries)
+
+
+def get_view_budget(view_func):
+    """Return the ``query_budget`` declared by a view function's class, if any."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    return getattr(view_class, 'query_budget', None)
@@ -0,0 +1,179 @@
+"""
+Read replicas (settings.REPLICA_DATABASES).
+
+Views declaring ``replica_reads = True`` (the read-only API and the
+homepage) read from a replica picked at random for the whole request.
+Everything else, including the admin, contact submissions, background
+threads and management commands, stays on the primary ``default`` alias,
+and so do all writes, reads inside a transaction and the session and auth
+tables (a visitor who just logged in must not look logged out). Work that
+saves what it reads, like the static export rendering pages through the
+views, runs under ``use_primary()``.
+
+Replicas lag behind the primary, so a visitor who wrote something reads
+their own writes from the primary: unsafe requests (POST, PUT, ...) set a
+cookie pinning the visitor to the primary for REPLICA_PIN_SECONDS, and once
+a request has written, its remaining reads go to the primary as well.
+
+SQLite replicas are plain copies of the primary file refreshed by
+``manage.py sync_replica``; server replicas (PostgreSQL streaming
+replication) are kept in sync by the database server. Pages and sections
+cached while a replica lagged behind an edit are invalidated by the copy
+following the edit.
+"""
+import contextlib
+import contextvars
+import random
+import sqlite3
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .cache import (
+    CONTENT_VERSION_KEY, FRAGMENT_MODELS, MODEL_VERSION_KEY_TEMPLATE, SECTION_VERSION_KEY_TEMPLATE,
+    bump_versions
+)
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Apps whose tables are always read from the primary
+PRIMARY_APPS = {'auth', 'sessions'}
+
+_current = contextvars.ContextVar('replica_state', default=None)
+_primary = contextvars.ContextVar('force_primary', default=False)
+
+
+class ReplicaState:
+    """Replica choice of the current request."""
+    __slots__ = ('request', 'pinned', 'wrote', '_alias')
+
+    def __init__(self, request, pinned):
+        self.request = request
+        self.pinned = pinned
+        self.wrote = False
+        self._alias = None
+
+    @property
+    def alias(self):
+        """The replica to read from, or None for the primary."""
+        if self.pinned or self.wrote:
+            return None
+        if self._alias is None:
+            # Decided once the URL is resolved, then kept for the whole request
+            match = self.request.resolver_match
+            if match is None:
+                return None
+            view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+            replicas = settings.REPLICA_DATABASES
+            self._alias = random.choice(replicas) if replicas and getattr(view_class, 'replica_reads', False) else ''
+        return self._alias or None
+
+
+def start_request(request):
+    pinned = request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+    return _current.set(ReplicaState(request, pinned))
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextlib.contextmanager
+def use_primary():
+    """
+    Read from the primary inside the block, e.g. to build data that is
+    saved, including in requests handled within it (test client renders).
+    """
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+class ReplicaRouter:
+    """Routes the reads of ``replica_reads`` views to REPLICA_DATABASES."""
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or _primary.get() or model._meta.app_label in PRIMARY_APPS:
+            return None
+        # Reads in a transaction usually decide what it writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+def sqlite_replicas():
+    """Return {alias: path} of the SQLite replicas."""
+    return {
+        alias: connections[alias].settings_dict['NAME']
+        for alias in settings.REPLICA_DATABASES
+        if connections[alias].settings_dict['ENGINE'] == 'django.db.backends.sqlite3'
+    }
+
+
+def _version_keys():
+    """Cache keys of every version that an edit bumps (see portfolio.cache)."""
+    from .bootstrap import LIVE_SECTIONS
+
+    labels = sorted({label for labels in FRAGMENT_MODELS.values() for label in labels})
+    return [
+        CONTENT_VERSION_KEY,
+        *[MODEL_VERSION_KEY_TEMPLATE.format(model=label) for label in labels],
+        *[SECTION_VERSION_KEY_TEMPLATE.format(section=section) for section in LIVE_SECTIONS],
+    ]
+
+
+def sync_sqlite_replicas(source=None, synced_versions=None):
+    """
+    Copy the primary SQLite database over every SQLite replica with the
+    online backup API, so that replica connections stay open and see the
+    new contents from their next transaction. ``source`` is an open
+    connection to the primary to reuse.
+
+    Pages and sections cached from a lagging replica are stale, so the
+    versions that edits moved since ``synced_versions`` (returned by the
+    previous call; None bumps them all) are bumped again once copied.
+    Returns (aliases copied, versions to pass to the next call).
+    """
+    replicas = sqlite_replicas()
+    keys = _version_keys()
+    # Read before copying: edits committed during the copy are caught next time
+    versions = cache.get_many(keys)
+    close = source is None
+    if source is None:
+        source = sqlite3.connect(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'], uri=True)
+    try:
+        for path in replicas.values():
+            target = sqlite3.connect(
+                path, timeout=settings.SQLITE_PRAGMAS.get('busy_timeout', 5000) / 1000, uri=True
+            )
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+    finally:
+        if close:
+            source.close()
+    if replicas:
+        bump_versions([
+            key for key in keys if synced_versions is None or synced_versions.get(key) != versions.get(key)
+        ])
+    return list(replicas), cache.get_many(keys)
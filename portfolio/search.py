@@ -0,0 +1,325 @@
+"""
+Full-text search over blog posts and projects.
+
+Documents live in an SQLite FTS5 virtual table (created by migration 0003)
+and are ranked with BM25. Signal handlers keep the table in sync on save and
+delete. When FTS5 isn't compiled into SQLite, or another database is used, a
+plain-Python inverted index built from the database is used instead.
+"""
+import math
+import re
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import connection
+from django.urls import reverse
+from django.utils.html import escape
+
+from .cache import get_content_version
+from .models import BlogPost, Project
+
+SEARCH_TABLE = 'portfolio_search'
+
+# Per-column weights for BM25: title, summary, body
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0)
+
+# Highlight markers; swapped for <mark> tags after HTML-escaping the snippet
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+SNIPPET_TOKENS = 16
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SearchType = namedtuple('SearchType', ['name', 'model', 'code', 'columns', 'visible_field', 'url_name', 'lookup_field'])
+
+# rowid = object id * len(SEARCH_TYPES) + code, so one row per object;
+# url_name and lookup_field give the API detail URL of a result
+SEARCH_TYPES = {
+    'blog': SearchType(
+        'blog', BlogPost, 0, ('title', 'excerpt', 'content'), 'is_published', 'blog-detail', 'slug',
+    ),
+    'project': SearchType(
+        'project', Project, 1, ('title', 'technologies', 'description'), 'is_active', 'project-detail', 'pk',
+    ),
+}
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def get_search_type(model):
+    for search_type in SEARCH_TYPES.values():
+        if search_type.model is model:
+            return search_type
+    return None
+
+
+def _rowid(search_type, pk):
+    return pk * len(SEARCH_TYPES) + search_type.code
+
+
+def _row(search_type, instance):
+    return [
+        _rowid(search_type, instance.pk),
+        search_type.name,
+        instance.pk,
+        getattr(instance, search_type.visible_field),
+    ] + [getattr(instance, column) or '' for column in search_type.columns]
+
+
+def _highlight(snippet):
+    return escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+class FTS5Backend:
+    """Search backed by the portfolio_search FTS5 table."""
+
+    name = 'fts5'
+
+    def index(self, instance):
+        search_type = get_search_type(type(instance))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [_rowid(search_type, instance.pk)])
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} '
+                f'(rowid, kind, object_id, visible, title, summary, body) '
+                f'VALUES (%s, %s, %s, %s, %s, %s, %s)',
+                _row(search_type, instance)
+            )
+
+    def remove(self, instance):
+        search_type = get_search_type(type(instance))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [_rowid(search_type, instance.pk)])
+
+    def rebuild(self):
+        count = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+            for search_type in SEARCH_TYPES.values():
+                for instance in search_type.model.objects.iterator():
+                    self.index(instance)
+                    count += 1
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        return count
+
+    def search(self, query, kinds, limit, visible_only=True):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Quote every token so user input can't inject FTS5 query syntax
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        placeholders = ', '.join(['%s'] * len(kinds))
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+        sql = (
+            f'SELECT kind, object_id, bm25({SEARCH_TABLE}, 0, 0, 0, {weights}) AS score, '
+            f'highlight({SEARCH_TABLE}, 3, %s, %s), '
+            f'snippet({SEARCH_TABLE}, -1, %s, %s, %s, {SNIPPET_TOKENS}) '
+            f'FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND kind IN ({placeholders})'
+        )
+        params = [_MARK_START, _MARK_END, _MARK_START, _MARK_END, '…', match, *kinds]
+        if visible_only:
+            sql += ' AND visible = 1'
+        sql += ' ORDER BY score LIMIT %s'
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            {
+                'type': kind,
+                'id': object_id,
+                'score': round(-score, 4),
+                'title': _highlight(title),
+                'snippet': _highlight(snippet),
+            }
+            for kind, object_id, score, title, snippet in rows
+        ]
+
+
+class PythonBackend:
+    """
+    In-memory BM25 index used when FTS5 is unavailable.
+    Rebuilt from the database whenever the content version changes.
+    """
+
+    name = 'python'
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._version = None
+        self._documents = {}
+        self._postings = defaultdict(dict)
+        self._avg_lengths = [0.0] * len(COLUMN_WEIGHTS)
+
+    def index(self, instance):
+        pass  # Content signals bump the version, which triggers a rebuild
+
+    def remove(self, instance):
+        pass
+
+    def rebuild(self):
+        version = get_content_version()
+        documents = {}
+        postings = defaultdict(dict)
+        totals = [0] * len(COLUMN_WEIGHTS)
+        for search_type in SEARCH_TYPES.values():
+            for instance in search_type.model.objects.iterator():
+                key = (search_type.name, instance.pk)
+                texts = [getattr(instance, column) or '' for column in search_type.columns]
+                columns = [tokenize(text) for text in texts]
+                documents[key] = {
+                    'visible': getattr(instance, search_type.visible_field),
+                    'texts': texts,
+                    'lengths': [len(tokens) for tokens in columns],
+                }
+                for position, tokens in enumerate(columns):
+                    totals[position] += len(tokens)
+                    for term, frequency in Counter(tokens).items():
+                        postings[term].setdefault(key, [0] * len(COLUMN_WEIGHTS))[position] = frequency
+
+        self._documents = documents
+        self._postings = postings
+        self._avg_lengths = [total / len(documents) if documents else 0.0 for total in totals]
+        self._version = version
+        return len(documents)
+
+    def _ensure_current(self):
+        if self._version != get_content_version():
+            self.rebuild()
+
+    def search(self, query, kinds, limit, visible_only=True):
+        self._ensure_current()
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        total = len(self._documents)
+        scores = defaultdict(float)
+        candidates = None
+        matched_terms = set()
+        for token in tokens:
+            # Prefix match, like the "token"* queries of the FTS5 backend
+            terms = [term for term in self._postings if term.startswith(token)]
+            matched = set()
+            for term in terms:
+                matched_terms.add(term)
+                postings = self._postings[term]
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequencies in postings.items():
+                    matched.add(key)
+                    lengths = self._documents[key]['lengths']
+                    for position, frequency in enumerate(frequencies):
+                        if not frequency:
+                            continue
+                        norm = 1 - self.b + self.b * lengths[position] / (self._avg_lengths[position] or 1)
+                        scores[key] += COLUMN_WEIGHTS[position] * idf * (
+                            frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+                        )
+            # Every query token must match, as with FTS5's implicit AND
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+
+        ranked = sorted(candidates, key=lambda key: -scores[key])
+        results = []
+        for key in ranked:
+            score = scores[key]
+            document = self._documents[key]
+            if key[0] not in kinds or (visible_only and not document['visible']):
+                continue
+            results.append({
+                'type': key[0],
+                'id': key[1],
+                'score': round(score, 4),
+                'title': self._mark(document['texts'][0], matched_terms),
+                'snippet': self._snippet(document['texts'], matched_terms),
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def _mark(self, text, terms):
+        def replace(match):
+            word = match.group(0)
+            if word.lower() in terms:
+                return f'{_MARK_START}{word}{_MARK_END}'
+            return word
+        return _highlight(_TOKEN_RE.sub(replace, text))
+
+    def _snippet(self, texts, terms):
+        # Window of SNIPPET_TOKENS words around the first match of the best column
+        for text in reversed(texts):
+            words = text.split()
+            for position, word in enumerate(words):
+                if any(token in terms for token in tokenize(word)):
+                    start = max(0, position - SNIPPET_TOKENS // 4)
+                    window = words[start:start + SNIPPET_TOKENS]
+                    snippet = ' '.join(window)
+                    if start > 0:
+                        snippet = '…' + snippet
+                    if start + SNIPPET_TOKENS < len(words):
+                        snippet += '…'
+                    return self._mark(snippet, terms)
+        return escape(' '.join(texts[-1].split()[:SNIPPET_TOKENS]))
+
+
+def fts5_table_exists():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SEARCH_TABLE])
+        return cursor.fetchone() is not None
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the FTS5 backend when its table exists, else the Python fallback."""
+    global _backend
+    if _backend is None:
+        _backend = FTS5Backend() if fts5_table_exists() else PythonBackend()
+    return _backend
+
+
+def add_urls(results):
+    """Add the API detail URL of each result, looking up slugs in one query per type."""
+    ids = defaultdict(list)
+    for result in results:
+        ids[result['type']].append(result['id'])
+    lookups = {}
+    for name, pks in ids.items():
+        search_type = SEARCH_TYPES[name]
+        if search_type.lookup_field == 'pk':
+            lookups[name] = {pk: pk for pk in pks}
+        else:
+            lookups[name] = dict(
+                search_type.model.objects.filter(pk__in=pks).values_list('pk', search_type.lookup_field)
+            )
+    for result in results:
+        value = lookups[result['type']].get(result['id'])
+        result['url'] = reverse(SEARCH_TYPES[result['type']].url_name, args=[value]) if value is not None else None
+    return results
+
+
+def search(query, kinds=None, limit=20):
+    """Search published posts and active projects, best matches first."""
+    return add_urls(get_backend().search(query, kinds or list(SEARCH_TYPES), limit))
+
+
+def search_ids(search_type, query):
+    """
+    Return the ids of every object of ``search_type`` matching ``query``,
+    including hidden ones (for the admin), or None without FTS5.
+    """
+    backend = get_backend()
+    if backend.name != 'fts5':
+        return None
+    return [
+        result['id']
+        for result in backend.search(query, [search_type], limit=-1, visible_only=False)
+    ]
@@ -1,24 +1,73 @@
+from functools import lru_cache
+
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from .images import build_srcset, FORMATS
+from .metrics import measure_serialization
 from .models import (
     Profile, Service, TimelineEntry, Skill,
-    ProjectCategory, Project, Testimonial, Client,
+    ProjectCategory, Project, Technology, Testimonial, Client,
     BlogPost, ContactMessage
 )
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+def srcset_map(renditions, request=None):
+    """Build the {format: srcset string} map of a renditions field value"""
+    def url(name):
+        url = default_storage.url(name)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    return {
+        image_format: build_srcset(renditions, image_format, url)
+        for image_format in FORMATS
+        if renditions.get(image_format)
+    }
+
+
+@lru_cache(maxsize=1024)
+def split_technologies(technologies):
+    """Split a comma-separated technologies string (cached per distinct value)"""
+    return tuple(tech.strip() for tech in technologies.split(','))
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """Responsive image renditions as a {format: srcset string} map"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'renditions'
+        super().__init__(**kwargs)
+
+    def to_representation(self, renditions):
+        return srcset_map(renditions, self.context.get('request', None))
+
+
+class MeasuredModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose time is added to the request metrics"""
+
+    def to_representation(self, instance):
+        with measure_serialization():
+            return super().to_representation(instance)
+
+
+class ProfileSerializer(MeasuredModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = Profile
-        fields = '__all__'
+        exclude = ['renditions']
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(MeasuredModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = Service
-        fields = '__all__'
+        exclude = ['renditions']
 
 
-class TimelineEntrySerializer(serializers.ModelSerializer):
+class TimelineEntrySerializer(MeasuredModelSerializer):
     is_current = serializers.ReadOnlyField()
 
     class Meta:
@@ -26,13 +75,13 @@ class TimelineEntrySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class SkillSerializer(serializers.ModelSerializer):
+class SkillSerializer(MeasuredModelSerializer):
     class Meta:
         model = Skill
         fields = '__all__'
 
 
-class ProjectCategorySerializer(serializers.ModelSerializer):
+class ProjectCategorySerializer(MeasuredModelSerializer):
     projects_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -40,53 +89,81 @@ class ProjectCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'projects_count']
 
     def get_projects_count(self, obj):
+        # Use the count annotated by the viewset queryset when available
+        count = getattr(obj, 'projects_count', None)
+        if count is not None:
+            return count
         return obj.projects.filter(is_active=True).count()
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(MeasuredModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     technologies_list = serializers.SerializerMethodField()
+    srcset = SrcsetField()
 
     class Meta:
         model = Project
-        fields = '__all__'
+        exclude = ['renditions', 'tags']
 
     def get_technologies_list(self, obj):
         if obj.technologies:
-            return [tech.strip() for tech in obj.technologies.split(',')]
+            return list(split_technologies(obj.technologies))
         return []
 
 
-class TestimonialSerializer(serializers.ModelSerializer):
+class TechnologySerializer(MeasuredModelSerializer):
+    projects_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Technology
+        fields = ['id', 'name', 'slug', 'projects_count']
+
+    def get_projects_count(self, obj):
+        # Use the count annotated by the viewset queryset when available
+        count = getattr(obj, 'projects_count', None)
+        if count is not None:
+            return count
+        return obj.projects.filter(is_active=True).count()
+
+
+class TestimonialSerializer(MeasuredModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = Testimonial
-        fields = '__all__'
+        exclude = ['renditions']
+
 
+class ClientSerializer(MeasuredModelSerializer):
+    srcset = SrcsetField()
 
-class ClientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Client
-        fields = '__all__'
+        exclude = ['renditions']
 
 
-class BlogPostListSerializer(serializers.ModelSerializer):
+class BlogPostListSerializer(MeasuredModelSerializer):
     """Serializer for blog post list view"""
+    srcset = SrcsetField()
+
     class Meta:
         model = BlogPost
         fields = [
-            'id', 'title', 'slug', 'excerpt', 'featured_image',
+            'id', 'title', 'slug', 'excerpt', 'featured_image', 'srcset',
             'category', 'published_date', 'view_count', 'featured'
         ]
 
 
-class BlogPostDetailSerializer(serializers.ModelSerializer):
+class BlogPostDetailSerializer(MeasuredModelSerializer):
     """Serializer for blog post detail view"""
+    srcset = SrcsetField()
+
     class Meta:
         model = BlogPost
-        fields = '__all__'
+        exclude = ['renditions']
 
 
-class ContactMessageSerializer(serializers.ModelSerializer):
+class ContactMessageSerializer(MeasuredModelSerializer):
     class Meta:
         model = ContactMessage
         fields = ['id', 'full_name', 'email', 'message', 'submitted_date']
@@ -0,0 +1,83 @@
+"""
+Signal handlers keeping derived data in sync with content edits.
+"""
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+
+from .cache import bump_content_version, bump_model_version
+from . import export, images, metrics, search, snapshots, spool, sqlite
+from .models import (
+    Profile, Service, TimelineEntry, Skill,
+    ProjectCategory, Project, Testimonial, Client,
+    BlogPost
+)
+
+# Models rendered on the homepage. ContactMessage is deliberately left out:
+# submissions never change what visitors see.
+CONTENT_MODELS = [
+    Profile, Service, TimelineEntry, Skill,
+    ProjectCategory, Project, Testimonial, Client,
+    BlogPost,
+]
+
+
+def invalidate_content(sender, instance, **kwargs):
+    bump_content_version()
+    bump_model_version(sender)
+    # Again once committed: sections rendered meanwhile may show the old rows
+    transaction.on_commit(lambda: bump_model_version(sender))
+    snapshots.invalidate_model(sender)
+    export.schedule_export(sender, instance.pk)
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(invalidate_content, sender=model, dispatch_uid=f'invalidate_content_save_{model.__name__}')
+    post_delete.connect(invalidate_content, sender=model, dispatch_uid=f'invalidate_content_delete_{model.__name__}')
+
+
+def update_search_index(sender, instance, **kwargs):
+    search.get_backend().index(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    search.get_backend().remove(instance)
+
+
+for search_type in search.SEARCH_TYPES.values():
+    post_save.connect(update_search_index, sender=search_type.model, dispatch_uid=f'search_index_{search_type.name}')
+    post_delete.connect(remove_from_search_index, sender=search_type.model, dispatch_uid=f'search_remove_{search_type.name}')
+
+
+def update_technology_tags(sender, instance, raw=False, **kwargs):
+    # Fixtures carry their own tags
+    if not raw:
+        instance.sync_tags()
+
+
+post_save.connect(update_technology_tags, sender=Project, dispatch_uid='update_technology_tags')
+
+
+def create_image_renditions(sender, instance, **kwargs):
+    if images.needs_renditions(instance):
+        images.schedule_renditions(instance)
+
+
+for model in images.IMAGE_FIELDS:
+    post_save.connect(create_image_renditions, sender=model, dispatch_uid=f'image_renditions_{model.__name__}')
+
+
+if settings.CONTACT_SPOOL:
+    # Start the drainer with the first request so that messages spooled
+    # before a restart are saved without waiting for a new submission
+    request_started.connect(spool.drainer.ensure_started, dispatch_uid='contact_spool_drainer')
+
+
+connection_created.connect(sqlite.configure_connection, dispatch_uid='sqlite_configure_connection')
+
+
+if settings.METRICS_ENABLED:
+    # Count the queries of every request, on every database connection
+    connection_created.connect(metrics.install_query_recorder, dispatch_uid='metrics_query_recorder')
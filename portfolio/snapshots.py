@@ -0,0 +1,210 @@
+"""
+Materialized homepage sections.
+
+Every bootstrap section (see bootstrap.SECTIONS) is stored pre-serialized in
+a HomepageSnapshot row, and the rendered homepage in one more row, so that
+reads are a single primary-key lookup instead of a query per table.
+
+Saving or deleting content drops the rows of the sections showing that model
+in the same transaction, and rebuilds them once it commits; only the affected
+sections are recomputed. Rows that are missing (first request, failed
+rebuild) are built on read, from the primary database when the request
+reads from a replica (see portfolio.replicas).
+
+Serialized media URLs are absolute. Sections are serialized against a
+placeholder origin that is swapped for the requesting one on read, so one
+row serves every host.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .bootstrap import (
+    SECTIONS, abuild_section, build_section, sections_for_model, _origin
+)
+from .cache import bump_content_version, bump_section_version, get_static_version
+from .models import HomepageSnapshot
+from .replicas import use_primary
+from .sqlite import retry_on_locked
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_HOST = 'snapshot.invalid'
+SNAPSHOT_ORIGIN = f'http://{SNAPSHOT_HOST}'
+SECTION_KEY_TEMPLATE = 'section:{section}'
+PAGE_KEY_PREFIX = 'page:'
+# Pages link to fingerprinted assets, so they are stored per static version
+PAGE_KEY_TEMPLATE = PAGE_KEY_PREFIX + '{name}:{static_version}'
+
+
+class SnapshotRequest(HttpRequest):
+    """A bare request whose absolute URLs start with SNAPSHOT_ORIGIN."""
+
+    def get_host(self):
+        return SNAPSHOT_HOST
+
+
+def section_key(section):
+    return SECTION_KEY_TEMPLATE.format(section=section)
+
+
+def page_key(name):
+    return PAGE_KEY_TEMPLATE.format(name=name, static_version=get_static_version())
+
+
+def _context():
+    return {'request': SnapshotRequest()}
+
+
+def _render(data):
+    # JSONRenderer renders None as an empty body, which would break the payload
+    if data is None:
+        return 'null'
+    return JSONRenderer().render(data).decode()
+
+
+def build(section):
+    """Serialize ``section`` from live queries, as stored in its snapshot."""
+    return _render(build_section(section, _context()))
+
+
+async def abuild(section):
+    return _render(await abuild_section(section, _context()))
+
+
+@retry_on_locked
+def _store(contents):
+    now = timezone.now()
+    HomepageSnapshot.objects.bulk_create(
+        [HomepageSnapshot(key=key, content=content, built_at=now) for key, content in contents.items()],
+        update_conflicts=True, unique_fields=['key'], update_fields=['content', 'built_at'],
+    )
+
+
+def rebuild(sections):
+    """Recompute and store ``sections``; return {section: serialized JSON}."""
+    # Never from a replica, which may not have the latest edits yet
+    with use_primary():
+        built = {section: build(section) for section in sections}
+    _store({section_key(section): content for section, content in built.items()})
+    return built
+
+
+def refresh(sections):
+    """
+    Rebuild ``sections`` from live queries, storing only those whose content
+    changed and bumping their section version (see bootstrap.get_etag).
+    Returns the changed sections.
+    """
+    with use_primary():
+        built = {section: build(section) for section in sections}
+        stored = dict(
+            HomepageSnapshot.objects.filter(key__in=[section_key(section) for section in sections])
+            .values_list('key', 'content')
+        )
+    changed = {section: content for section, content in built.items() if stored.get(section_key(section)) != content}
+    if changed:
+        _store({section_key(section): content for section, content in changed.items()})
+        for section in changed:
+            bump_section_version(section)
+    return list(changed)
+
+
+def localize(content, request):
+    """Point the snapshot's absolute URLs at the requesting origin."""
+    return content.replace(SNAPSHOT_ORIGIN, _origin(request))
+
+
+def _payload(request, sections, stored):
+    # Sections are already rendered JSON; join them without parsing them again
+    parts = [f'{json.dumps(section)}:{stored[section]}' for section in sections]
+    return localize('{%s}' % ','.join(parts), request).encode()
+
+
+def get_bootstrap(request, sections):
+    """Return the rendered JSON object of ``sections``, building missing snapshots."""
+    keys = {section_key(section): section for section in sections}
+    stored = {
+        keys[key]: content
+        for key, content in HomepageSnapshot.objects.filter(key__in=keys).values_list('key', 'content')
+    }
+    missing = [section for section in sections if section not in stored]
+    if missing:
+        stored.update(rebuild(missing))
+    return _payload(request, sections, stored)
+
+
+async def aget_bootstrap(request, sections):
+    """get_bootstrap for async views; missing sections are built concurrently."""
+    keys = {section_key(section): section for section in sections}
+    stored = {
+        keys[key]: content
+        async for key, content in HomepageSnapshot.objects.filter(key__in=keys).values_list('key', 'content')
+    }
+    missing = [section for section in sections if section not in stored]
+    if missing:
+        with use_primary():
+            built = dict(zip(missing, await asyncio.gather(*[abuild(section) for section in missing])))
+        await sync_to_async(_store)({section_key(section): content for section, content in built.items()})
+        stored.update(built)
+    return _payload(request, sections, stored)
+
+
+def get_page(name):
+    """Return the stored HTML of page ``name`` (CSRF token stripped), or None."""
+    return HomepageSnapshot.objects.filter(key=page_key(name)).values_list('content', flat=True).first()
+
+
+async def aget_page(name):
+    return await HomepageSnapshot.objects.filter(key=page_key(name)).values_list('content', flat=True).afirst()
+
+
+def save_page(name, content):
+    _store({page_key(name): content})
+
+
+def _rebuild_on_commit(sections):
+    try:
+        rebuild(sections)
+    except Exception:
+        # The rows stay deleted and are built by the next read
+        logger.exception('Failed to rebuild homepage snapshots %s', ', '.join(sections))
+    # Pages rendered between the edit and the rebuild may hold stale sections
+    bump_content_version()
+
+
+def invalidate(sections):
+    """Drop the snapshots of ``sections`` and the stored pages, rebuilding the sections after commit."""
+    keys = [section_key(section) for section in sections]
+    HomepageSnapshot.objects.filter(key__in=keys).delete()
+    # Pages show every section
+    HomepageSnapshot.objects.filter(key__startswith=PAGE_KEY_PREFIX).delete()
+    if sections:
+        transaction.on_commit(lambda: _rebuild_on_commit(sections))
+
+
+def invalidate_model(model):
+    """invalidate() the sections showing rows of ``model``."""
+    invalidate(sections_for_model(model))
+
+
+def check(sections=None):
+    """Return {section: (stored, live)} for every section whose snapshot differs from live queries."""
+    sections = list(SECTIONS) if sections is None else sections
+    keys = {section_key(section): section for section in sections}
+    stored = {
+        keys[key]: content
+        for key, content in HomepageSnapshot.objects.filter(key__in=keys).values_list('key', 'content')
+    }
+    mismatches = {}
+    for section in sections:
+        live = build(section)
+        if stored.get(section) != live:
+            mismatches[section] = (stored.get(section), live)
+    return mismatches
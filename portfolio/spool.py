@@ -0,0 +1,250 @@
+"""
+Write-behind spool for contact form submissions.
+
+Instead of inserting every submission while the request waits for the
+SQLite write lock, validated messages are appended (and fsynced) to a spool
+file and the view answers 202 Accepted straight away. A background drainer
+in each worker claims the spool and saves it with bulk_create every
+CONTACT_SPOOL_INTERVAL seconds, CONTACT_SPOOL_BATCH_SIZE rows per INSERT.
+
+Spool layout in CONTACT_SPOOL_DIR:
+    incoming.jsonl      messages appended by the workers
+    batch-<ns>.jsonl    claimed by a drainer, deleted once saved
+    failed-<ns>.jsonl   records that can't be saved, kept for inspection
+    spool.lock          held briefly while appending or claiming
+    drain.lock          held by the one process draining at a time
+
+Files survive a crash or restart: the next drainer picks up both the
+incoming file and any batch a dead process had claimed. A crash between the
+commit and the unlink of a batch saves that batch twice, so delivery is at
+least once. Messages keep the time they were spooled as their submitted
+date. A record the database rejects is moved to a failed file rather than
+holding up the batches after it.
+"""
+import datetime
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, connection, transaction
+
+from .models import ContactMessage
+from .sqlite import retry_on_locked
+
+logger = logging.getLogger(__name__)
+
+INCOMING = 'incoming.jsonl'
+BATCH_GLOB = 'batch-*.jsonl'
+FAILED_GLOB = 'failed-*.jsonl'
+
+
+def spool_dir():
+    path = Path(settings.CONTACT_SPOOL_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def _locked(name, blocking=True):
+    """Hold an exclusive flock on ``name``; yields False if it is busy."""
+    with open(spool_dir() / name, 'a') as lock_file:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def enqueue(data):
+    """Durably append one validated message (a dict of model fields)."""
+    line = json.dumps({**data, 'spooled_at': time.time()}, separators=(',', ':')) + '\n'
+    with _locked('spool.lock'):
+        with open(spool_dir() / INCOMING, 'ab+') as spool:
+            # Terminate a line torn by a crash so it doesn't swallow this one
+            if spool.seek(0, os.SEEK_END):
+                spool.seek(-1, os.SEEK_END)
+                if spool.read(1) != b'\n':
+                    line = '\n' + line
+            spool.write(line.encode())
+            spool.flush()
+            os.fsync(spool.fileno())
+    drainer.ensure_started()
+
+
+def _claim():
+    """Move the incoming file aside as a new batch so appends start afresh."""
+    incoming = spool_dir() / INCOMING
+    with _locked('spool.lock'):
+        if incoming.exists() and incoming.stat().st_size:
+            incoming.rename(spool_dir() / f'batch-{time.time_ns()}.jsonl')
+
+
+def _message(record):
+    message = ContactMessage(
+        full_name=record['full_name'],
+        email=record['email'],
+        message=record['message'],
+    )
+    if 'spooled_at' in record:
+        message.submitted_date = datetime.datetime.fromtimestamp(record['spooled_at'], datetime.timezone.utc)
+    return message
+
+
+def _read(path):
+    """Return ([(line, message)], lines that aren't messages) of a batch file."""
+    messages = []
+    rejected = []
+    with open(path, encoding='utf-8') as batch:
+        for number, line in enumerate(batch, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-append
+                logger.warning('Skipping unreadable line %s of %s', number, path.name)
+                continue
+            try:
+                messages.append((line, _message(record)))
+            except (KeyError, TypeError, ValueError, OverflowError):
+                rejected.append(line)
+    return messages, rejected
+
+
+@retry_on_locked
+def _save(messages):
+    with transaction.atomic():
+        ContactMessage.objects.bulk_create(
+            messages, batch_size=settings.CONTACT_SPOOL_BATCH_SIZE
+        )
+
+
+def _save_batch(messages):
+    """Save [(line, message)]; return the lines of the messages the database rejected."""
+    try:
+        _save([message for line, message in messages])
+        return []
+    except (DataError, IntegrityError):
+        pass
+    # One bad row fails the whole INSERT; save the others one by one
+    rejected = []
+    for line, message in messages:
+        try:
+            _save([message])
+        except (DataError, IntegrityError):
+            rejected.append(line)
+    return rejected
+
+
+def _quarantine(lines):
+    path = spool_dir() / f'failed-{time.time_ns()}.jsonl'
+    with open(path, 'w', encoding='utf-8') as failed:
+        failed.writelines(line if line.endswith('\n') else line + '\n' for line in lines)
+        failed.flush()
+        os.fsync(failed.fileno())
+    logger.error('Moved %s contact messages that could not be saved to %s', len(lines), path.name)
+
+
+def drain():
+    """
+    Save every spooled message; return how many were saved. Returns 0 without
+    waiting if another process is draining.
+    """
+    saved = 0
+    with _locked('drain.lock', blocking=False) as acquired:
+        if not acquired:
+            return 0
+        _claim()
+        for path in sorted(spool_dir().glob(BATCH_GLOB)):
+            messages, rejected = _read(path)
+            # Other errors (e.g. the database being unavailable) keep the
+            # batch for the next drain
+            failed = _save_batch(messages)
+            if rejected or failed:
+                _quarantine(rejected + failed)
+            path.unlink()
+            saved += len(messages) - len(failed)
+    if saved:
+        logger.info('Saved %s spooled contact messages', saved)
+    return saved
+
+
+def get_spool_stats():
+    """
+    Queue depth: pending messages, spool files and age of the oldest message,
+    plus the messages moved to failed files.
+    """
+    pending = 0
+    files = 0
+    oldest = None
+    paths = sorted(spool_dir().glob(BATCH_GLOB)) + [spool_dir() / INCOMING]
+    for path in paths:
+        try:
+            with open(path, encoding='utf-8') as spool:
+                lines = spool.readlines()
+        except FileNotFoundError:
+            continue
+        if not lines:
+            continue
+        files += 1
+        pending += len(lines)
+        if oldest is None:
+            try:
+                oldest = json.loads(lines[0])['spooled_at']
+            except (ValueError, KeyError):
+                pass
+    failed = 0
+    for path in spool_dir().glob(FAILED_GLOB):
+        with open(path, encoding='utf-8') as spool:
+            failed += sum(1 for line in spool)
+    return {
+        'pending': pending,
+        'files': files,
+        'failed': failed,
+        'oldest_age': round(time.time() - oldest, 1) if oldest is not None else None,
+    }
+
+
+class SpoolDrainer:
+    """Per-process background thread draining the spool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+
+    @property
+    def interval(self):
+        return settings.CONTACT_SPOOL_INTERVAL
+
+    def ensure_started(self, **kwargs):
+        # Started lazily so that every forked gunicorn worker gets its own thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        thread = threading.Thread(target=self._run, name='contact-spool-drainer', daemon=True)
+        thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                drain()
+            except Exception:
+                logger.exception('Draining the contact spool failed; retrying')
+            finally:
+                connection.close()
+            time.sleep(self.interval)
+
+
+drainer = SpoolDrainer()
@@ -0,0 +1,67 @@
+"""
+Tuned SQLite for production (settings.SQLITE_TUNED).
+
+Every new connection gets SQLITE_PRAGMAS: WAL so that readers never block
+the writer, synchronous=NORMAL (safe with WAL, fsyncs only at checkpoints),
+a larger page cache and memory-mapped reads, and a busy timeout so that
+writers queue for the lock instead of failing at once. settings.py keeps
+connections open between requests (CONN_MAX_AGE), so this happens once per
+worker rather than on every request.
+
+WAL can still refuse a write straight away: a transaction that read before
+another process committed can't upgrade to a write lock. Writes made
+outside a transaction are wrapped in retry_on_locked, which retries them
+with exponential backoff.
+"""
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+_LOCKED_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created handler applying SQLITE_PRAGMAS to new SQLite connections."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNED:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked_error(exc):
+    return isinstance(exc, OperationalError) and any(
+        message in str(exc).lower() for message in _LOCKED_MESSAGES
+    )
+
+
+def retry_on_locked(func=None, *, using='default'):
+    """
+    Decorator retrying ``func`` with exponential backoff (SQLITE_RETRY_DELAY,
+    doubling, with jitter) up to SQLITE_WRITE_RETRIES times while the
+    database is locked. Inside an outer transaction the error is raised
+    as is: only the outermost block can be retried.
+    """
+    if func is None:
+        return functools.partial(retry_on_locked, using=using)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = settings.SQLITE_WRITE_RETRIES if settings.SQLITE_TUNED else 0
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == retries or not is_locked_error(exc) or connections[using].in_atomic_block:
+                    raise
+                delay = settings.SQLITE_RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5)
+                logger.info('Database locked in %s, retrying in %.3fs', func.__qualname__, delay)
+                time.sleep(delay)
+
+    return wrapper
@@ -48,6 +48,17 @@ async function postAPI(endpoint, data) {
  * Portfolio API Class
  */
 class PortfolioAPI {
+  /**
+   * Barcha bo'limlarni bitta so'rov bilan olish
+   * ETag tufayli brauzer o'zgarmagan javobni qayta yuklamaydi (304)
+   * @param {string[]} include - Bo'limlar ro'yxati (optional), masalan ['projects', 'skills']
+   */
+  static async getBootstrap(include = null) {
+    let endpoint = '/bootstrap/';
+    if (include && include.length > 0) endpoint += `?include=${include.join(',')}`;
+    return await fetchAPI(endpoint);
+  }
+
   /**
    * Profil ma'lumotlarini olish
    */
@@ -160,24 +171,18 @@ async function initializePortfolio() {
     // Loading holati
     console.log('Loading portfolio data...');
 
-    // Barcha ma'lumotlarni parallel yuklash
-    const [profile, services, timeline, skills, projects, testimonials, clients, blogPosts] =
-      await Promise.all([
-        PortfolioAPI.getProfile(),
-        PortfolioAPI.getServices(),
-        PortfolioAPI.getTimeline(),
-        PortfolioAPI.getSkills(),
-        PortfolioAPI.getProjects(),
-        PortfolioAPI.getTestimonials(),
-        PortfolioAPI.getClients(),
-        PortfolioAPI.getBlogPosts()
-      ]);
+    // Barcha ma'lumotlarni bitta so'rov bilan yuklash
+    const {
+      profile, services, timeline, skills, categories,
+      projects, testimonials, clients, blog: blogPosts
+    } = await PortfolioAPI.getBootstrap();
 
     // Ma'lumotlarni UI ga ko'rsatish
     console.log('Profile:', profile);
     console.log('Services:', services);
     console.log('Timeline:', timeline);
     console.log('Skills:', skills);
+    console.log('Categories:', categories);
     console.log('Projects:', projects);
     console.log('Testimonials:', testimonials);
     console.log('Clients:', clients);
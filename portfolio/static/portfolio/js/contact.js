@@ -0,0 +1,72 @@
+'use strict';
+
+// first message of an API error body: {"detail": "..."} (e.g. throttled)
+// or {"field": ["..."]} from validation
+function errorMessage(data) {
+  if (data && typeof data.detail === 'string') {
+    return data.detail;
+  }
+  for (const field in data) {
+    const messages = [].concat(data[field]);
+    if (messages.length) {
+      return field === 'non_field_errors' ? messages[0] : field.replace(/_/g, ' ') + ': ' + messages[0];
+    }
+  }
+  return '';
+}
+
+// contact form submission handler
+document.addEventListener('DOMContentLoaded', function() {
+  const contactForm = document.getElementById('contact-form');
+  const formMessage = document.getElementById('form-message');
+
+  if (contactForm) {
+    contactForm.addEventListener('submit', function(e) {
+      e.preventDefault();
+
+      const formData = new FormData(contactForm);
+      const submitBtn = contactForm.querySelector('[data-form-btn]');
+      const btnText = submitBtn.querySelector('span');
+      const originalText = btnText.textContent;
+
+      // Disable button and show loading state
+      submitBtn.disabled = true;
+      btnText.textContent = 'Sending...';
+
+      fetch(contactForm.action, {
+        method: 'POST',
+        body: formData,
+        headers: {
+          'X-Requested-With': 'XMLHttpRequest',
+        }
+      })
+      .then(response => response.json().catch(() => ({})).then(data => {
+        if (!response.ok) {
+          throw new Error(errorMessage(data));
+        }
+        return data;
+      }))
+      .then(data => {
+        formMessage.style.display = 'block';
+        formMessage.style.color = '#4CAF50';
+        formMessage.textContent = data.message || 'Thank you! Your message has been sent successfully.';
+        contactForm.reset();
+
+        // Hide message after 5 seconds
+        setTimeout(() => {
+          formMessage.style.display = 'none';
+        }, 5000);
+      })
+      .catch(error => {
+        formMessage.style.display = 'block';
+        formMessage.style.color = '#f44336';
+        formMessage.textContent = error.message || 'Sorry, there was an error sending your message. Please try again.';
+        console.error('Error:', error);
+      })
+      .finally(() => {
+        submitBtn.disabled = false;
+        btnText.textContent = originalText;
+      });
+    });
+  }
+});
@@ -0,0 +1,207 @@
+"""
+File storages.
+
+OptimizedStaticFilesStorage is WhiteNoise's compressed manifest storage
+(hashed names, gzip siblings, Brotli ones when the brotli package is
+installed) that first builds the homepage asset pipeline (portfolio.assets)
+and recompresses the collected PNG and JPEG files without changing a pixel,
+so that the hashed copies and their manifest entries point at the built and
+smaller files.
+
+HashedMediaStorage saves uploads under content-hashed names
+(``projects/shot.3f2a9c1b7d4e.png``), which portfolio.media serves with
+immutable caching. A hashed name always holds the same content, so files
+are written atomically under it, and a file that is already there (saved
+by a concurrent request) is simply reused. Stems are shortened so that the
+hashed name still fits the field's max_length.
+"""
+import hashlib
+import logging
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, UnidentifiedImageError
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .assets import build_all
+
+logger = logging.getLogger(__name__)
+
+HASH_LENGTH = 12
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}(?:\.|$)' % HASH_LENGTH)
+
+# PNG info keys that change how the pixels are shown, kept on re-encoding
+PNG_KEEP_INFO = ('transparency', 'icc_profile', 'gamma', 'dpi')
+
+
+def is_hashed_name(name):
+    """Whether ``name`` carries a content hash (uploads and image renditions)."""
+    return HASHED_NAME_RE.search(posixpath.basename(name)) is not None
+
+
+def _pixels(image):
+    return image.mode, image.size, image.tobytes(), image.getpalette()
+
+
+def optimize_png(data):
+    """Return the smallest lossless re-encoding of PNG ``data`` (or ``data`` itself)."""
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError):
+        return data
+    options = {key: image.info[key] for key in PNG_KEEP_INFO if key in image.info}
+
+    candidates = [image]
+    # Few colours fit a palette without losing any of them
+    if image.mode in ('RGB', 'L') and 'transparency' not in image.info and image.getcolors(256):
+        candidates.append(image.convert('P', palette=Image.Palette.ADAPTIVE, colors=256))
+
+    best = data
+    original = _pixels(image)
+    for candidate in candidates:
+        buffer = BytesIO()
+        candidate.save(buffer, 'PNG', optimize=True, **options)
+        encoded = buffer.getvalue()
+        if len(encoded) >= len(best):
+            continue
+        decoded = Image.open(BytesIO(encoded))
+        if decoded.mode != image.mode:
+            decoded = decoded.convert(image.mode)
+        if _pixels(decoded) == original:
+            best = encoded
+    return best
+
+
+def optimize_jpeg(data):
+    """Losslessly recompress JPEG ``data`` with jpegtran when it is installed."""
+    jpegtran = shutil.which('jpegtran')
+    if jpegtran is None:
+        return data
+    result = subprocess.run(
+        [jpegtran, '-copy', 'none', '-optimize', '-progressive'],
+        input=data, capture_output=True,
+    )
+    if result.returncode or not result.stdout or len(result.stdout) >= len(data):
+        return data
+    return result.stdout
+
+
+OPTIMIZERS = {
+    '.png': optimize_png,
+    '.jpg': optimize_jpeg,
+    '.jpeg': optimize_jpeg,
+}
+
+
+class OptimizedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """CompressedManifestStaticFilesStorage that builds bundles and recompresses images losslessly first."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name, content in build_all().items():
+                if self.exists(name):
+                    self.delete(name)
+                self.save(name, ContentFile(content.encode()))
+                paths[name] = (self, name)
+            saved = 0
+            for name in paths:
+                optimizer = OPTIMIZERS.get(os.path.splitext(name)[1].lower())
+                if optimizer is None or not self.exists(name):
+                    continue
+                saved += self.optimize(name, optimizer)
+                # Hash the optimized copy, not the app's original
+                paths[name] = (self, name)
+            if saved:
+                logger.info('Recompressed static images, %d bytes saved', saved)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def optimize(self, name, optimizer):
+        """Recompress the collected file ``name`` in place; return the bytes saved."""
+        with self.open(name) as file:
+            data = file.read()
+        optimized = optimizer(data)
+        if len(optimized) >= len(data):
+            return 0
+        with open(self.path(name), 'wb') as file:
+            file.write(optimized)
+        return len(data) - len(optimized)
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """FileSystemStorage saving files as ``<stem>.<content hash>.<ext>``."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not is_hashed_name(name):
+            name = self.hashed_name(name, content, max_length)
+        return super().save(name, content, max_length)
+
+    def _save(self, name, content):
+        if not is_hashed_name(name):
+            name = self.hashed_name(name, content)
+        return self._save_hashed(name, content)
+
+    def hashed_name(self, name, content, max_length=None):
+        """Return ``name`` with the hash of ``content``, its stem cut to fit ``max_length``."""
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        stem, extension = posixpath.splitext(name)
+        suffix = f'.{digest.hexdigest()[:HASH_LENGTH]}{extension}'
+        if max_length is not None and len(stem) + len(suffix) > max_length:
+            directory, base = posixpath.split(stem)
+            base = base[:len(base) - (len(stem) + len(suffix) - max_length)]
+            if not base:
+                raise SuspiciousFileOperation(
+                    f'Storage can not fit the hashed name of "{name}" in {max_length} characters. '
+                    f'Please make sure that the corresponding file field allows sufficient "max_length".'
+                )
+            stem = posixpath.join(directory, base)
+        return f'{stem}{suffix}'
+
+    def get_available_name(self, name, max_length=None):
+        # No "_AbC123" suffix: an existing hashed file has the same content
+        if is_hashed_name(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save_hashed(self, name, content):
+        """Write ``name`` atomically, keeping the file if it exists already."""
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            os.chmod(temp_path, self.file_permissions_mode if self.file_permissions_mode is not None else 0o644)
+            try:
+                # Unlike a rename, fails instead of replacing a file being served
+                os.link(temp_path, path)
+            except FileExistsError:
+                pass
+            except OSError:
+                # No hard links on this filesystem: replacing a file with the
+                # same content is harmless, so fall back to an atomic rename
+                if not os.path.exists(path):
+                    os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return name
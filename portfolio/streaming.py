@@ -0,0 +1,69 @@
+"""
+Streamed rendering of the homepage (settings.HOMEPAGE_STREAMING).
+
+The top-level nodes of a template (index.html includes one partial per part
+of the page) are rendered and sent one at a time, so the <head> and the
+sidebar go out before the queries of the sections below them have run.
+Joined, the parts are exactly what rendering the whole template returns:
+the nodes share one context, as in Template.render().
+
+On WSGI the sections' querysets stay lazy and run while their partial
+renders. On ASGI all queries start at once and each partial waits only for
+the variables it shows (``part_context``); parts showing none are sent
+right away.
+"""
+import contextlib
+
+from asgiref.sync import sync_to_async
+from django.template.context import make_context
+from django.template.loader import get_template
+
+
+def _include_name(node):
+    """The template name an {% include %} node renders, None for other nodes."""
+    name = getattr(getattr(node, 'template', None), 'var', None)
+    return name if isinstance(name, str) else None
+
+
+@contextlib.contextmanager
+def template_parts(template_name, context, request):
+    """
+    Bind ``context`` to the template and yield (context, parts): one
+    (included template name or None, render function) per top-level node.
+    """
+    template = get_template(template_name)
+    context = make_context(context, request, autoescape=template.backend.engine.autoescape)
+    template = template.template
+    with context.render_context.push_state(template), context.bind_template(template):
+        context.template_name = template.name
+        yield context, [
+            (_include_name(node), lambda node=node: node.render_annotated(context))
+            for node in template.nodelist
+        ]
+
+
+def stream_template(template_name, context, request):
+    """Render a template like render_to_string(), yielding it part by part."""
+    with template_parts(template_name, context, request) as (context, parts):
+        for name, render in parts:
+            yield render()
+
+
+async def astream_template(template_name, context, request, pending, part_context):
+    """
+    stream_template() for async views. ``pending`` maps context variables
+    to the tasks fetching them; before rendering an included partial,
+    the variables ``part_context`` lists for it are awaited.
+    """
+    with template_parts(template_name, context, request) as (context, parts):
+        try:
+            for name, render in parts:
+                variables = part_context.get(name, ())
+                values = {variable: await pending.pop(variable) for variable in variables if variable in pending}
+                if values:
+                    context.update(values)
+                # Parts showing no rows don't wait behind the queries on the database thread
+                yield await sync_to_async(render, thread_sensitive=bool(variables))()
+        finally:
+            for task in pending.values():
+                task.cancel()
@@ -0,0 +1,80 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from portfolio import assets
+from portfolio.cache import FRAGMENT_MODELS, fragment_key
+from portfolio.images import build_srcset
+
+register = template.Library()
+
+
+@register.filter
+def srcset(instance, image_format='jpeg'):
+    """
+    Srcset string for the responsive renditions of an object's image.
+    Usage: <img srcset="{{ project|srcset:'webp' }}">
+    """
+    renditions = getattr(instance, 'renditions', None) or {}
+    return build_srcset(renditions, image_format, default_storage.url)
+
+
+@register.simple_tag
+def critical_css(name):
+    """
+    Inline the critical stylesheet ``name`` (settings.CRITICAL_CSS).
+    Usage: {% critical_css 'portfolio/css/critical.css' %}
+    """
+    return format_html('<style>{}</style>', mark_safe(assets.critical_css(name)))
+
+
+@register.simple_tag
+def bundle(name):
+    """
+    Deferred script tag of the JS bundle ``name`` (settings.ASSET_BUNDLES),
+    or of its sources before collectstatic.
+    Usage: {% bundle 'portfolio/js/site.js' %}
+    """
+    return format_html_join('\n', '<script defer src="{}"></script>', ((url,) for url in assets.bundle_urls(name)))
+
+
+class CachedSectionNode(template.Node):
+    def __init__(self, nodelist, section):
+        self.nodelist = nodelist
+        self.section = section
+
+    def render(self, context):
+        if not settings.HOMEPAGE_SECTION_CACHE:
+            return self.nodelist.render(context)
+        section = self.section.resolve(context)
+        if section not in FRAGMENT_MODELS:
+            raise template.TemplateSyntaxError(f'cached_section: unknown section {section!r}')
+        # Views may have fetched the fragments already, and skipped their queries
+        content = context.get('section_fragments', {}).get(section)
+        if content is not None:
+            return content
+        # Keyed before rendering: an edit meanwhile moves to a new key
+        key = fragment_key(section)
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, None)
+        return content
+
+
+@register.tag
+def cached_section(parser, token):
+    """
+    Cache the enclosed markup until a model shown by the homepage section
+    changes (cache.FRAGMENT_MODELS).
+    Usage: {% cached_section 'projects' %} ... {% endcached_section %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f'{bits[0]} takes one argument, the section name')
+    nodelist = parser.parse(('endcached_section',))
+    parser.delete_first_token()
+    return CachedSectionNode(nodelist, parser.compile_filter(bits[1]))
@@ -0,0 +1,1092 @@
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from importlib import import_module
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db.models.query import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.csrf import _does_token_match
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections, router, transaction
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase
+from django.urls import resolve, reverse
+
+from . import async_views, bootstrap, metrics, replicas, snapshots, spool
+from .benchmark import seed_content
+from .cache import (
+    bump_content_version, get_cached_page, get_content_version, get_page_cache_stats, reset_page_cache_stats,
+    set_cached_page, strip_csrf_token,
+)
+from .counters import ViewCountBuffer
+from .export import Exporter
+from .middleware import MetricsMiddleware
+from .querybudget import QueryBudgetExceeded, get_view_budget, query_budget
+from .search import FTS5Backend, PythonBackend, get_backend
+from .storage import HASH_LENGTH, HashedMediaStorage, is_hashed_name
+from .throttling import ContactIPThrottle, claim_message
+from .views import ContactMessageCreateView, PortfolioHomeView, view_counts
+from .urls import router as api_router
+from .models import (
+    BlogPost, BlogPostDailyViews, ContactMessage, HomepageSnapshot, Profile, Project, ProjectCategory, Service,
+    Technology,
+)
+
+REPLICA_ALIAS = 'test_replica'
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routing between the primary and a second SQLite file as read replica."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings[REPLICA_ALIAS] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            'NAME': os.path.join(directory.name, 'replica.sqlite3'),
+            'TEST': {},
+        }
+        self.addCleanup(self.remove_replica)
+        middleware = list(settings.MIDDLEWARE)
+        if 'portfolio.middleware.ReplicaMiddleware' not in middleware:
+            middleware.insert(
+                middleware.index('corsheaders.middleware.CorsMiddleware'), 'portfolio.middleware.ReplicaMiddleware'
+            )
+        overrides = self.settings(
+            REPLICA_DATABASES=[REPLICA_ALIAS],
+            DATABASE_ROUTERS=['portfolio.replicas.ReplicaRouter'],
+            MIDDLEWARE=middleware,
+            THROTTLE_DB=Path(directory.name) / 'throttle.sqlite3',
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        replicas.sync_sqlite_replicas()
+
+    def remove_replica(self):
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+
+    def service_names(self):
+        response = self.client.get('/api/services/')
+        self.assertEqual(response.status_code, 200)
+        return [service['name'] for service in response.json()['results']]
+
+    def test_replica_views_read_the_replica_until_it_is_synced(self):
+        Service.objects.create(name='Design', description='Design work')
+        self.assertEqual(self.service_names(), [])
+        replicas.sync_sqlite_replicas()
+        self.assertEqual(self.service_names(), ['Design'])
+
+    def test_pinned_visitors_read_the_primary(self):
+        Service.objects.create(name='Design', description='Design work')
+        self.client.cookies[replicas.PIN_COOKIE] = '1'
+        self.assertEqual(self.service_names(), ['Design'])
+
+    def test_writes_pin_the_visitor_to_the_primary(self):
+        response = self.client.post(
+            reverse('contact'), {'full_name': 'Sender', 'email': 'sender@example.com', 'message': 'Hello'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        cookie = response.cookies[replicas.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertTrue(cookie['httponly'])
+
+        # The client sends the cookie back, so the new row is read at once
+        Service.objects.create(name='Design', description='Design work')
+        self.assertEqual(self.service_names(), ['Design'])
+        self.assertNotIn(replicas.PIN_COOKIE, self.client.get('/api/services/').cookies)
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        request = RequestFactory().get('/api/services/')
+        request.resolver_match = resolve('/api/services/')
+        token = replicas.start_request(request)
+        try:
+            self.assertEqual(router.db_for_read(Service), REPLICA_ALIAS)
+            Service.objects.create(name='Design', description='Design work')
+            self.assertEqual(router.db_for_read(Service), DEFAULT_DB_ALIAS)
+            self.assertEqual(list(Service.objects.values_list('name', flat=True)), ['Design'])
+        finally:
+            replicas.end_request(token)
+
+    def test_transactions_sessions_and_auth_read_the_primary(self):
+        request = RequestFactory().get('/api/services/')
+        request.resolver_match = resolve('/api/services/')
+        token = replicas.start_request(request)
+        try:
+            self.assertEqual(router.db_for_read(Service), REPLICA_ALIAS)
+            self.assertEqual(router.db_for_read(Session), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_read(get_user_model()), DEFAULT_DB_ALIAS)
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Service), DEFAULT_DB_ALIAS)
+            with replicas.use_primary():
+                self.assertEqual(router.db_for_read(Service), DEFAULT_DB_ALIAS)
+        finally:
+            replicas.end_request(token)
+
+    def test_logged_in_visitors_stay_logged_in_on_replica_views(self):
+        self.client.force_login(get_user_model().objects.create_user('editor'))
+        response = self.client.get('/api/services/')
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+
+    def test_export_renders_from_the_primary(self):
+        Service.objects.create(name='Design', description='Design work')
+        self.assertIn(b'Design', Exporter().get('/api/services/'))
+
+    def test_sync_bumps_the_content_version_only_after_edits(self):
+        _, versions = replicas.sync_sqlite_replicas()
+        version = get_content_version()
+        _, versions = replicas.sync_sqlite_replicas(synced_versions=versions)
+        self.assertEqual(get_content_version(), version)
+
+        edited = bump_content_version()
+        replicas.sync_sqlite_replicas(synced_versions=versions)
+        self.assertNotEqual(get_content_version(), edited)
+
+
+class ContactSpoolTests(TestCase):
+    """Draining the contact spool after crashes and bad records."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spool_dir = Path(directory.name)
+        overrides = self.settings(CONTACT_SPOOL_DIR=self.spool_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # The tests drain themselves
+        patcher = mock.patch.object(spool.drainer, 'ensure_started')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, name, **fields):
+        return json.dumps({'full_name': name, 'email': 'sender@example.com', 'message': 'Hello', **fields}) + '\n'
+
+    def test_drain_recovers_the_files_of_crashed_processes(self):
+        spooled_at = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+        # A worker died after claiming a batch, another in the middle of an append
+        (self.spool_dir / 'batch-1.jsonl').write_text(self.record('Claimed', spooled_at=spooled_at.timestamp()))
+        spool.enqueue({'full_name': 'Before', 'email': 'sender@example.com', 'message': 'Hello'})
+        with open(self.spool_dir / spool.INCOMING, 'a') as incoming:
+            incoming.write('{"full_name": "Tor')
+        spool.enqueue({'full_name': 'After', 'email': 'sender@example.com', 'message': 'Hello'})
+
+        self.assertEqual(spool.drain(), 3)
+        self.assertCountEqual(ContactMessage.objects.values_list('full_name', flat=True), ['Claimed', 'Before', 'After'])
+        self.assertEqual(ContactMessage.objects.get(full_name='Claimed').submitted_date, spooled_at)
+        self.assertEqual(spool.get_spool_stats(), {'pending': 0, 'files': 0, 'failed': 0, 'oldest_age': None})
+
+    def test_unsaveable_records_are_set_aside(self):
+        (self.spool_dir / 'batch-1.jsonl').write_text(
+            self.record('Good') + self.record('No message', message=None) + json.dumps({'full_name': 'No email'}) + '\n'
+        )
+        (self.spool_dir / 'batch-2.jsonl').write_text(self.record('Next'))
+
+        self.assertEqual(spool.drain(), 2)
+        self.assertCountEqual(ContactMessage.objects.values_list('full_name', flat=True), ['Good', 'Next'])
+        self.assertEqual(spool.get_spool_stats()['failed'], 2)
+        self.assertEqual(spool.drain(), 0)
+
+    def test_spooled_submissions_are_accepted_then_saved(self):
+        message = {'full_name': 'Sender', 'email': 'sender@example.com', 'message': 'Hello'}
+        with self.settings(CONTACT_SPOOL=True, THROTTLE_DB=self.spool_dir / 'throttle.sqlite3'):
+            response = self.client.post(reverse('contact'), message, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(ContactMessage.objects.exists())
+        self.assertEqual(spool.drain(), 1)
+        self.assertEqual(ContactMessage.objects.get().full_name, 'Sender')
+
+
+class PageCacheStatsTests(TestCase):
+    """Counting page cache hits and misses without writing to the cache."""
+
+    def test_lookups_are_counted_in_memory(self):
+        reset_page_cache_stats()
+        self.addCleanup(reset_page_cache_stats)
+        request = RequestFactory().get('/')
+        bump_content_version()
+        self.assertIsNone(get_cached_page('home', request))
+        set_cached_page('home', '<p>Home</p>')
+        with mock.patch('portfolio.cache.cache.set') as cache_set, \
+                mock.patch('portfolio.cache.cache.incr') as cache_incr, \
+                mock.patch('portfolio.cache.cache.add') as cache_add:
+            self.assertEqual(get_cached_page('home', request), '<p>Home</p>')
+            self.assertIsNone(get_cached_page('missing', request))
+        cache_set.assert_not_called()
+        cache_incr.assert_not_called()
+        cache_add.assert_not_called()
+        stats = get_page_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 2, 1 / 3))
+
+
+class MediaStorageTests(TestCase):
+    """Content-hashed uploads (HashedMediaStorage) and how portfolio.media serves them."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        self.storage = HashedMediaStorage(location=self.root)
+
+    def test_uploads_are_saved_once_under_their_content_hash(self):
+        first = self.storage.save('projects/shot.png', ContentFile(b'one'))
+        again = self.storage.save('projects/shot.png', ContentFile(b'one'))
+        other = self.storage.save('projects/shot.png', ContentFile(b'two'))
+        self.assertRegex(first, r'^projects/shot\.[0-9a-f]{%d}\.png$' % HASH_LENGTH)
+        self.assertEqual(again, first)
+        self.assertNotEqual(other, first)
+        self.assertEqual(sorted(path.name for path in (self.root / 'projects').iterdir()), sorted([
+            Path(first).name, Path(other).name,
+        ]))
+
+    def test_long_names_are_cut_to_fit_max_length(self):
+        name = self.storage.save(f'projects/{"x" * 120}.jpeg', ContentFile(b'image'), max_length=100)
+        self.assertEqual(len(name), 100)
+        self.assertTrue(is_hashed_name(name))
+        self.assertTrue(name.endswith('.jpeg'))
+        self.assertEqual(self.storage.open(name).read(), b'image')
+
+    def test_filesystems_without_hard_links(self):
+        with mock.patch('portfolio.storage.os.link', side_effect=PermissionError):
+            name = self.storage.save('clients/logo.png', ContentFile(b'logo'))
+            self.assertEqual(self.storage.save('clients/logo.png', ContentFile(b'logo')), name)
+        self.assertEqual([path.name for path in (self.root / 'clients').iterdir()], [Path(name).name])
+        self.assertEqual(self.storage.open(name).read(), b'logo')
+
+    def test_serving(self):
+        hashed = self.storage.save('blog/cover.txt', ContentFile(b'0123456789'))
+        (self.root / 'plain.txt').write_bytes(b'plain')
+        with self.settings(MEDIA_ROOT=self.root):
+            response = self.client.get(f'/media/{hashed}')
+            self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('must-revalidate', self.client.get('/media/plain.txt')['Cache-Control'])
+
+            revalidated = self.client.get(f'/media/{hashed}', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(revalidated.status_code, 304)
+
+            partial = self.client.get(f'/media/{hashed}', HTTP_RANGE='bytes=2-5')
+            self.assertEqual(partial.status_code, 206)
+            self.assertEqual(partial['Content-Range'], 'bytes 2-5/10')
+            self.assertEqual(b''.join(partial.streaming_content), b'2345')
+            suffix = self.client.get(f'/media/{hashed}', HTTP_RANGE='bytes=-3')
+            self.assertEqual(b''.join(suffix.streaming_content), b'789')
+            stale = self.client.get(f'/media/{hashed}', HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+            self.assertEqual(stale.status_code, 200)
+            unsatisfiable = self.client.get(f'/media/{hashed}', HTTP_RANGE='bytes=20-')
+            self.assertEqual(unsatisfiable.status_code, 416)
+            self.assertEqual(unsatisfiable['Content-Range'], 'bytes */10')
+
+
+class ContactThrottleTests(TestCase):
+    """Rate limiting and duplicate suppression of the contact form."""
+
+    message = {'full_name': 'Sender', 'email': 'sender@example.com', 'message': 'Hello'}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = self.settings(THROTTLE_DB=Path(directory.name) / 'throttle.sqlite3')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def post(self, data, **extra):
+        return self.client.post(reverse('contact'), data, content_type='application/json', **extra)
+
+    def test_failed_saves_can_be_resubmitted(self):
+        with mock.patch.object(ContactMessageCreateView, 'perform_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.post(self.message)
+        self.assertEqual(self.post(self.message).status_code, 201)
+        self.assertEqual(self.post(self.message).status_code, 201)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_forwarded_for_does_not_pick_the_ip_bucket(self):
+        rates = {'contact_ip': '1/hour', 'contact_email': '5/hour'}
+        with mock.patch.object(ContactIPThrottle, 'THROTTLE_RATES', rates):
+            first = self.post(self.message, HTTP_X_FORWARDED_FOR='10.0.0.1')
+            second = self.post({**self.message, 'message': 'Hello again'}, HTTP_X_FORWARDED_FOR='10.0.0.2')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 429)
+
+    def test_concurrent_duplicates_are_claimed_once(self):
+        barrier = threading.Barrier(8)
+        claimed = []
+
+        def claim():
+            barrier.wait()
+            claimed.append(claim_message(self.message))
+
+        threads = [threading.Thread(target=claim) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed), [False] * 7 + [True])
+
+    def test_non_object_bodies_are_rejected_by_validation(self):
+        self.assertEqual(self.post([1, 2]).status_code, 400)
+
+
+class MetricsFileTests(TestCase):
+    """Folding the metrics files of exited workers."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.metrics_dir = Path(directory.name)
+        overrides = self.settings(METRICS_DIR=self.metrics_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def exited_pid(self):
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        return process.pid
+
+    def write_worker(self, name, count):
+        registry = metrics.Registry()
+        registry.responses[('home', 'GET', 200)] = count
+        metrics._write_json(self.metrics_dir / name, registry.to_dict())
+
+    def test_exited_workers_are_folded_into_one_file(self):
+        for n in range(3):
+            self.write_worker(f'{self.exited_pid()}-{n}.json', 2)
+        self.write_worker(f'{os.getppid()}-running.json', 5)
+
+        histograms, responses = metrics.collect()
+        self.assertEqual(responses[('home', 'GET', 200)], 11)
+        self.assertCountEqual(
+            [path.name for path in self.metrics_dir.glob('*.json')],
+            [metrics.EXITED_FILE, f'{os.getppid()}-running.json'],
+        )
+
+        self.write_worker(f'{self.exited_pid()}-3.json', 1)
+        histograms, responses = metrics.collect()
+        self.assertEqual(responses[('home', 'GET', 200)], 12)
+
+    def test_labels_are_bounded(self):
+        registry = metrics.Registry()
+        middleware = MetricsMiddleware(lambda request: HttpResponse(status=404))
+        factory = RequestFactory()
+        with mock.patch.object(metrics, 'registry', registry), mock.patch.object(registry, '_ensure_writer'):
+            for n in range(5):
+                middleware(factory.generic(f'VERB{n}', f'/no/such/path/{n}/'))
+                middleware(factory.get(f'/no/such/path/{n}/'))
+        self.assertEqual(registry.responses, {('unmatched', 'other', 404): 5, ('unmatched', 'GET', 404): 5})
+        self.assertCountEqual(registry.histograms, [('unmatched', 'other'), ('unmatched', 'GET')])
+
+
+class ViewCountBufferTests(TransactionTestCase):
+    """Buffered blog post views under concurrent records and flushes."""
+
+    def create_post(self, slug):
+        return BlogPost.objects.create(
+            title=slug, slug=slug, excerpt='Excerpt', content='Content', category='Notes',
+            published_date=datetime.date(2024, 1, 1), is_published=True,
+        )
+
+    def test_concurrent_records_and_flushes_lose_no_views(self):
+        posts = [self.create_post('first'), self.create_post('second')]
+        buffer = ViewCountBuffer()
+        # The background flusher runs flat out alongside the threshold flushes
+        buffer.tick = 0.005
+        self.addCleanup(setattr, buffer, 'tick', 3600)
+        threads, views = 8, 300
+
+        def read_posts():
+            try:
+                for n in range(views):
+                    buffer.record(posts[n % 2].pk)
+            finally:
+                connection.close()
+
+        # Rebuilding the blog snapshot on every flush only adds lock contention;
+        # threshold flushes that find the table locked log it and retry later
+        with self.settings(VIEW_COUNT_FLUSH_THRESHOLD=25, VIEW_COUNT_FLUSH_INTERVAL=0), \
+                mock.patch.object(snapshots, 'refresh'), mock.patch('portfolio.counters.logger'):
+            workers = [threading.Thread(target=read_posts) for _ in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            # The background flusher may still be writing what it took
+            expected = threads * views // 2
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                try:
+                    buffer.flush()
+                except DatabaseError:
+                    pass
+                counts = [
+                    (view_count, BlogPostDailyViews.objects.get(post_id=pk).views)
+                    for pk, view_count in BlogPost.objects.order_by('pk').values_list('pk', 'view_count')
+                ]
+                if counts == [(expected, expected)] * len(posts):
+                    break
+                time.sleep(0.01)
+
+        self.assertEqual(counts, [(expected, expected)] * len(posts))
+
+    def test_failed_threshold_flushes_keep_the_views(self):
+        post = self.create_post('locked')
+        buffer = ViewCountBuffer()
+        # Only the threshold flush runs
+        buffer.tick = 3600
+        with self.settings(VIEW_COUNT_FLUSH_THRESHOLD=1):
+            with mock.patch.object(ViewCountBuffer, '_save', side_effect=DatabaseError('database is locked')):
+                with self.assertLogs('portfolio.counters', 'ERROR'):
+                    self.assertEqual(buffer.record(post.pk), 1)
+            self.assertEqual(buffer.pending(post.pk), 1)
+            self.assertEqual(buffer.flush(), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.view_count, 1)
+
+
+class ConditionalGetTests(TestCase):
+    """ETag / Last-Modified validators and 304 responses of the API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ProjectCategory.objects.create(name='Web', slug='web')
+        cls.project = Project.objects.create(
+            title='Site', description='A site', image='projects/site.jpg', category=cls.category,
+            technologies='Django', created_date=datetime.date(2024, 1, 1),
+        )
+        cls.post = BlogPost.objects.create(
+            title='Post', slug='post', excerpt='Excerpt', content='Content', category='Notes',
+            published_date=datetime.date(2024, 1, 1), is_published=True,
+        )
+
+    def revalidate(self, path, response):
+        return self.client.get(
+            path, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_IF_MODIFIED_SINCE=response.get('Last-Modified', ''),
+        )
+
+    def test_unchanged_lists_and_objects_are_not_modified(self):
+        for path in ('/api/projects/', f'/api/projects/{self.project.pk}/', '/api/blog/'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                revalidated = self.revalidate(path, response)
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated.content, b'')
+                self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_if_modified_since_alone(self):
+        path = f'/api/projects/{self.project.pk}/'
+        response = self.client.get(path)
+        self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        Project.objects.filter(pk=self.project.pk).update(
+            updated_at=self.project.updated_at + datetime.timedelta(seconds=5)
+        )
+        self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200)
+
+    def test_category_renames_change_the_project_validators(self):
+        for path in ('/api/projects/', f'/api/projects/{self.project.pk}/', '/api/projects/?cursor='):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                category = ProjectCategory.objects.get(pk=self.category.pk)
+                category.name = f'Renamed for {path}'
+                category.save()
+                revalidated = self.revalidate(path, response)
+                self.assertEqual(revalidated.status_code, 200)
+                self.assertIn(category.name.encode(), revalidated.content)
+
+    def test_blog_detail_is_not_modified_while_views_are_counted(self):
+        path = f'/api/blog/{self.post.slug}/'
+        with mock.patch.object(view_counts, 'record', return_value=1) as record:
+            response = self.client.get(path)
+            self.assertEqual(self.revalidate(path, response).status_code, 304)
+        self.assertEqual(record.call_count, 2)
+        self.post.title = 'Edited'
+        self.post.save()
+        with mock.patch.object(view_counts, 'record', return_value=0):
+            self.assertEqual(self.revalidate(path, response).status_code, 200)
+
+
+class SearchTests(TestCase):
+    """Both search backends: ranking, snippets, visibility and index updates."""
+
+    @classmethod
+    def setUpTestData(cls):
+        def post(slug, title, content, is_published=True):
+            return BlogPost.objects.create(
+                title=title, slug=slug, excerpt='Excerpt', content=content, category='Notes',
+                published_date=datetime.date(2024, 1, 1), is_published=is_published,
+            )
+
+        cls.in_title = post('caching-django', 'Caching Django pages', 'How the pages are cached <fast>.')
+        cls.in_body = post('notes', 'Weekly notes', 'Some words about caching and then about Django templates.')
+        cls.draft = post('draft', 'Django draft', 'Unpublished Django text.', is_published=False)
+        cls.project = Project.objects.create(
+            title='Shop', description='An online shop.', image='projects/shop.jpg',
+            technologies='Django, React', created_date=datetime.date(2024, 1, 1),
+        )
+        cls.hidden = Project.objects.create(
+            title='Old shop', description='Retired.', image='projects/old.jpg',
+            technologies='Django', created_date=datetime.date(2024, 1, 1), is_active=False,
+        )
+
+    def backends(self):
+        self.assertIsInstance(get_backend(), FTS5Backend)
+        return [FTS5Backend(), PythonBackend()]
+
+    def ids(self, backend, query, kinds=('blog', 'project')):
+        return [(result['type'], result['id']) for result in backend.search(query, list(kinds), 20)]
+
+    def test_title_matches_rank_first(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend.name):
+                self.assertEqual(
+                    self.ids(backend, 'django caching', ['blog']),
+                    [('blog', self.in_title.pk), ('blog', self.in_body.pk)],
+                )
+
+    def test_snippets_highlight_escaped_matches(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend.name):
+                result = backend.search('caching', ['blog'], 20)[0]
+                self.assertEqual(result['title'], '<mark>Caching</mark> Django pages')
+                result = backend.search('fast', ['blog'], 20)[0]
+                self.assertIn('cached &lt;<mark>fast</mark>&gt;', result['snippet'])
+
+    def test_hidden_objects_are_left_out(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend.name):
+                found = self.ids(backend, 'django')
+                self.assertNotIn(('blog', self.draft.pk), found)
+                self.assertNotIn(('project', self.hidden.pk), found)
+                self.assertIn(('project', self.project.pk), found)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.in_body.title = 'Weekly memoization notes'
+        self.in_body.save()
+        self.project.delete()
+        for backend in self.backends():
+            with self.subTest(backend=backend.name):
+                self.assertEqual(self.ids(backend, 'memoization'), [('blog', self.in_body.pk)])
+                self.assertEqual(self.ids(backend, 'shop'), [])
+
+    def test_results_link_to_the_detail_endpoints(self):
+        results = self.client.get('/api/search/', {'q': 'caching django'}).json()['results']
+        self.assertEqual(results[0]['url'], '/api/blog/caching-django/')
+        results = self.client.get('/api/search/', {'q': 'shop', 'type': 'project'}).json()['results']
+        self.assertEqual([result['url'] for result in results], [f'/api/projects/{self.project.pk}/'])
+
+
+class QueryBudgetTests(TestCase):
+    """The list and detail endpoints stay within their declared query_budget."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_content(30)
+        Profile.objects.create(
+            name='Ada', title='Engineer', bio='Bio', email='ada@example.com', phone='123',
+            birthday=datetime.date(1990, 1, 1), location='London',
+        )
+
+    def paths(self):
+        for prefix, viewset, basename in api_router.registry:
+            yield f'/api/{prefix}/'
+        yield '/api/services/?page=2'
+        yield '/api/projects/?page=2'
+        yield '/api/projects/?cursor='
+        yield '/api/blog/?cursor='
+        yield '/api/projects/?tech=django,react'
+        yield f'/api/projects/{Project.objects.filter(is_active=True).latest("pk").pk}/'
+        yield f'/api/blog/{BlogPost.objects.filter(is_published=True).latest("pk").slug}/'
+        yield '/api/bootstrap/'
+        yield '/'
+
+    def test_endpoints_stay_within_budget(self):
+        bump_content_version()
+        with mock.patch.object(view_counts, 'record', return_value=0):
+            for path in self.paths():
+                with self.subTest(path=path):
+                    budget = get_view_budget(resolve(path.split('?')[0]).func)
+                    self.assertIsNotNone(budget)
+                    with query_budget(budget, path):
+                        response = self.client.get(path)
+                        # Streamed pages run their queries while being sent
+                        response.getvalue()
+                    self.assertEqual(response.status_code, 200)
+
+    def test_guard_reports_the_queries(self):
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with query_budget(1, 'services'):
+                list(Service.objects.all())
+                list(Project.objects.all())
+        self.assertEqual(len(raised.exception.queries), 2)
+        self.assertIn('services ran 2 queries, budget is 1', str(raised.exception))
+
+
+class FastSerializerParityTests(TestCase):
+    """Every list endpoint renders the same bytes with FAST_SERIALIZERS on and off."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_content(30)
+        Profile.objects.create(
+            name='Ada', title='Engineer', bio='Bio', email='ada@example.com', phone='123',
+            birthday=datetime.date(1990, 1, 1), location='London',
+        )
+        # Cases the synthetic rows don't cover
+        Project.objects.filter(pk__in=Project.objects.order_by('pk')[:3]).update(category=None)
+        BlogPost.objects.filter(pk__in=BlogPost.objects.order_by('pk')[:3]).update(renditions={
+            'source': 'blog/benchmark.jpg',
+            'webp': {'320': 'blog/benchmark.0.320w.webp'},
+            'jpeg': {'320': 'blog/benchmark.0.320w.jpg'},
+        })
+
+    def paths(self):
+        for prefix, viewset, basename in api_router.registry:
+            yield f'/api/{prefix}/'
+            yield f'/api/{prefix}/?page=2'
+        yield '/api/projects/?category=bench-category-1'
+        yield '/api/projects/?tech=django,react'
+        yield '/api/projects/?tech=django,react&tech_match=any'
+        yield '/api/blog/?featured=true'
+        yield '/api/blog/?category=design'
+        yield '/api/timeline/?type=education'
+
+    def test_list_endpoints_match_drf(self):
+        for path in self.paths():
+            with self.subTest(path=path):
+                responses = {}
+                for fast in (True, False):
+                    with self.settings(FAST_SERIALIZERS=fast):
+                        responses[fast] = self.client.get(path)
+                self.assertEqual(responses[True].status_code, responses[False].status_code)
+                self.assertEqual(responses[True].content, responses[False].content)
+
+
+class StaticExportTests(TestCase):
+    """export_static and the re-export of changed pages (portfolio.export)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(12):
+            BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', excerpt='Excerpt', content='Content', category='Notes',
+                featured_image='blog/post.jpg', is_published=True,
+                published_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i),
+            )
+        cls.project = Project.objects.create(
+            title='Site', description='A site', image='projects/site.jpg',
+            technologies='Django', created_date=datetime.date(2024, 1, 1),
+        )
+        Profile.objects.create(
+            name='Ada', title='Engineer', bio='Bio', email='ada@example.com', phone='123',
+            birthday=datetime.date(1990, 1, 1), location='London',
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.export_dir = Path(directory.name)
+        overrides = self.settings(EXPORT_DIR=self.export_dir, EXPORT_BASE_URL='https://static.example.com')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def read_json(self, relative_path):
+        return json.loads((self.export_dir / relative_path).read_text())
+
+    def test_export_static_writes_the_site(self):
+        call_command('export_static', '--no-assets', stdout=open(os.devnull, 'w'))
+
+        html = (self.export_dir / 'index.html').read_text()
+        self.assertIn('name="csrfmiddlewaretoken" value=""', html)
+        first = self.read_json('api/blog.json')
+        self.assertEqual(first['next'], 'https://static.example.com/api/blog/page-2.json')
+        second = self.read_json('api/blog/page-2.json')
+        self.assertEqual(second['previous'], 'https://static.example.com/api/blog.json')
+        self.assertEqual(len(first['results']) + len(second['results']), 12)
+        self.assertEqual(self.read_json('api/blog/post-3.json')['slug'], 'post-3')
+        self.assertEqual(self.read_json(f'api/projects/{self.project.pk}.json')['title'], 'Site')
+        self.assertIn('blog', self.read_json('api/bootstrap.json'))
+        # Rendering doesn't count views of the exported posts
+        self.assertEqual(view_counts.pending(BlogPost.objects.get(slug='post-3').pk), 0)
+
+    def test_changes_re_export_only_what_shows_them(self):
+        exporter = Exporter()
+        exporter.export_all()
+        BlogPost.objects.filter(slug__in=['post-0', 'post-1']).update(is_published=False)
+        Project.objects.filter(pk=self.project.pk).update(title='Renamed site')
+
+        exporter = Exporter()
+        exporter.export_changed(BlogPost, BlogPost.objects.get(slug='post-0').pk)
+        self.assertFalse((self.export_dir / 'api/blog/post-0.json').exists())
+        self.assertFalse((self.export_dir / 'api/blog/post-1.json').exists())
+        self.assertTrue((self.export_dir / 'api/blog/post-2.json').exists())
+        self.assertFalse((self.export_dir / 'api/blog/page-2.json').exists())
+        self.assertEqual(self.read_json('api/blog.json')['count'], 10)
+        self.assertEqual(self.read_json(f'api/projects/{self.project.pk}.json')['title'], 'Site')
+
+        exporter.export_changed(Project, self.project.pk)
+        self.assertEqual(self.read_json(f'api/projects/{self.project.pk}.json')['title'], 'Renamed site')
+
+
+class DataExportTests(TestCase):
+    """Streamed staff exports (portfolio.bulkexport)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        ContactMessage.objects.bulk_create(
+            ContactMessage(full_name=f'Sender {i}', email=f'sender{i}@example.com', message='Hello')
+            for i in range(25)
+        )
+        cls.staff = get_user_model().objects.create_user('staff', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_exports_stream_in_chunks_without_loading_the_queryset(self):
+        with self.settings(DATA_EXPORT_CHUNK_SIZE=10):
+            response = self.client.get('/api/admin/export/contacts.ndjson')
+            self.assertIsInstance(response, StreamingHttpResponse)
+            # Rows are read while the response is sent, through iterator()
+            with mock.patch.object(QuerySet, '_fetch_all', side_effect=AssertionError('queryset loaded')):
+                chunks = list(response.streaming_content)
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [10, 10, 5])
+        rows = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual([row['full_name'] for row in rows], [f'Sender {i}' for i in range(25)])
+        self.assertEqual(response['X-Export-Cursor'], str(rows[-1]['id']))
+
+    def test_since_exports_only_newer_rows(self):
+        newest = ContactMessage.objects.order_by('id').values_list('id', flat=True)
+        response = self.client.get('/api/admin/export/contacts.csv', {'since': newest[19]})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,full_name,email,message,submitted_date,is_read')
+        self.assertEqual(len(lines), 6)
+
+    def test_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/admin/export/contacts.csv').status_code, 403)
+
+
+class HomepageStreamingTests(TestCase):
+    """HOMEPAGE_STREAMING sends the same page that the rendered response does."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Profile.objects.create(
+            name='Ada', title='Engineer', bio='Bio', email='ada@example.com', phone='123',
+            birthday=datetime.date(1990, 1, 1), location='London',
+        )
+        BlogPost.objects.create(
+            title='Post', slug='post', excerpt='Excerpt', content='Content', category='Notes',
+            featured_image='blog/post.jpg', published_date=datetime.date(2024, 1, 1), is_published=True,
+        )
+
+    def get_home(self, streaming):
+        # Nothing cached, so both settings render the page
+        cache.clear()
+        HomepageSnapshot.objects.filter(key=snapshots.page_key(PortfolioHomeView.cache_name)).delete()
+        with self.settings(HOMEPAGE_STREAMING=streaming):
+            response = self.client.get('/')
+            if streaming:
+                self.assertIsInstance(response, StreamingHttpResponse)
+                content = b''.join(response.streaming_content)
+            else:
+                self.assertNotIsInstance(response, StreamingHttpResponse)
+                content = response.content
+        self.assertEqual(response.status_code, 200)
+        return content.decode()
+
+    def assert_token_matches_cookie(self, content):
+        # The token is masked differently per request, but unmasks to the cookie
+        secret = self.client.cookies[settings.CSRF_COOKIE_NAME].value
+        marker = 'name="csrfmiddlewaretoken" value="'
+        self.assertIn(marker, content)
+        token = content.split(marker, 1)[1].split('"', 1)[0]
+        self.assertTrue(_does_token_match(token, secret))
+
+    def test_streamed_page_matches_the_rendered_page(self):
+        rendered = self.get_home(streaming=False)
+        streamed = self.get_home(streaming=True)
+
+        self.assert_token_matches_cookie(rendered)
+        self.assert_token_matches_cookie(streamed)
+        self.assertEqual(strip_csrf_token(streamed), strip_csrf_token(rendered))
+
+    def test_streamed_page_is_cached_for_the_next_request(self):
+        streamed = self.get_home(streaming=True)
+
+        response = self.client.get('/')
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(strip_csrf_token(response.content.decode()), strip_csrf_token(streamed))
+        self.assert_token_matches_cookie(response.content.decode())
+
+
+class SnapshotTests(TestCase):
+    """Homepage snapshots (portfolio.snapshots) and the check_snapshots command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = BlogPost.objects.create(
+            title='Post', slug='post', excerpt='Excerpt', content='Content', category='Notes',
+            featured_image='blog/post.jpg', published_date=datetime.date(2024, 1, 1), is_published=True,
+        )
+
+    def stored(self, section):
+        return HomepageSnapshot.objects.filter(key=snapshots.section_key(section)).values_list(
+            'content', flat=True
+        ).first()
+
+    def test_bootstrap_without_a_profile_is_valid_json(self):
+        request = RequestFactory().get('/api/bootstrap/')
+
+        data = json.loads(snapshots.get_bootstrap(request, ['profile', 'blog']))
+
+        self.assertIsNone(data['profile'])
+        self.assertEqual(self.stored('profile'), 'null')
+        self.assertEqual([post['slug'] for post in data['blog']], ['post'])
+
+    def test_edit_rebuilds_the_section_on_commit(self):
+        snapshots.rebuild(['blog'])
+        snapshots.save_page(PortfolioHomeView.cache_name, '<html>')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Edited'
+            self.post.save()
+            # Dropped with the edit, rebuilt once it commits
+            self.assertIsNone(self.stored('blog'))
+
+        self.assertEqual(json.loads(self.stored('blog'))[0]['title'], 'Edited')
+        self.assertIsNone(snapshots.get_page(PortfolioHomeView.cache_name))
+
+    def test_check_snapshots_reports_and_fixes_stale_rows(self):
+        snapshots.rebuild(['blog', 'services'])
+        call_command('check_snapshots', stdout=open(os.devnull, 'w'))
+        # Written behind the signals' back, as a failed rebuild would leave it
+        HomepageSnapshot.objects.filter(key=snapshots.section_key('blog')).update(content='[]')
+        self.assertEqual(list(snapshots.check(['blog', 'services'])), ['blog'])
+
+        with self.assertRaises(CommandError):
+            call_command('check_snapshots', stdout=open(os.devnull, 'w'))
+        call_command('check_snapshots', '--fix', stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(snapshots.check(['blog', 'services']), {})
+        self.assertEqual(json.loads(self.stored('blog'))[0]['slug'], 'post')
+
+
+class KeysetPaginationTests(TestCase):
+    """?cursor= pagination (portfolio.pagination.KeysetPagination)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Three dates for 25 posts, so most of the ordering is the pk tiebreaker
+        for i in range(25):
+            BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', excerpt='Excerpt', content='Content', category='Notes',
+                published_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 3), is_published=True,
+            )
+
+    def follow(self, url):
+        slugs = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn('count', data)
+            slugs.extend(post['slug'] for post in data['results'])
+            url = data['next']
+        return slugs
+
+    def test_cursor_pages_cover_every_row_once_in_order(self):
+        expected = list(BlogPost.objects.order_by('-published_date', 'pk').values_list('slug', flat=True))
+
+        self.assertEqual(self.follow('/api/blog/?cursor='), expected)
+        self.assertEqual(self.follow('/api/blog/?cursor='), expected)
+
+    def test_rows_inserted_meanwhile_do_not_shift_later_pages(self):
+        first = self.client.get('/api/blog/?cursor=').json()
+        BlogPost.objects.create(
+            title='Newest', slug='newest', excerpt='Excerpt', content='Content', category='Notes',
+            published_date=datetime.date(2025, 1, 1), is_published=True,
+        )
+
+        rest = self.follow(first['next'])
+
+        slugs = [post['slug'] for post in first['results']] + rest
+        self.assertNotIn('newest', slugs)
+        self.assertEqual(len(slugs), len(set(slugs)))
+        self.assertEqual(len(slugs), 25)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/blog/?cursor=not-a-cursor').status_code, 404)
+
+
+class BootstrapTests(TestCase):
+    """/api/bootstrap/ section filtering and revalidation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = BlogPost.objects.create(
+            title='Post', slug='post', excerpt='Excerpt', content='Content', category='Notes',
+            published_date=datetime.date(2024, 1, 1), is_published=True,
+        )
+        Service.objects.create(name='Consulting', description='Advice')
+
+    def test_include_limits_the_sections(self):
+        response = self.client.get('/api/bootstrap/?include=blog, profile,unknown')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # Canonical order, unknown names ignored
+        self.assertEqual(list(data), ['profile', 'blog'])
+        self.assertIsNone(data['profile'])
+        self.assertEqual([post['slug'] for post in data['blog']], ['post'])
+        self.assertEqual(list(self.client.get('/api/bootstrap/').json()), list(bootstrap.SECTIONS))
+
+    def test_include_without_known_sections_is_rejected(self):
+        self.assertEqual(self.client.get('/api/bootstrap/?include=unknown').status_code, 400)
+
+    def test_etag_revalidates_until_content_changes(self):
+        etag = self.client.get('/api/bootstrap/?include=blog')['ETag']
+        self.assertNotEqual(self.client.get('/api/bootstrap/?include=services')['ETag'], etag)
+
+        response = self.client.get('/api/bootstrap/?include=blog', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Edited'
+            self.post.save()
+
+        response = self.client.get('/api/bootstrap/?include=blog', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['blog'][0]['title'], 'Edited')
+
+
+class AsyncViewParityTests(TestCase):
+    """The async views (portfolio.async_views) respond like the sync ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_content(30)
+        Profile.objects.create(
+            name='Ada', title='Engineer', bio='Bio', email='ada@example.com', phone='123',
+            birthday=datetime.date(1990, 1, 1), location='London',
+        )
+        BlogPost.objects.update(featured_image='blog/post.jpg')
+
+    def async_get(self, view_class, path):
+        view = view_class.as_view()
+        return async_to_sync(view)(AsyncRequestFactory().get(path))
+
+    def assert_same_response(self, sync_response, async_response):
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            self.assertEqual(async_response.get(header), sync_response.get(header), header)
+
+    def test_list_views_match_the_viewsets(self):
+        async_classes = {cls.viewset_class: cls for cls in async_views.AsyncListView.__subclasses__()}
+        for prefix, viewset, basename in api_router.registry:
+            for path in (f'/api/{prefix}/', f'/api/{prefix}/?page=2'):
+                with self.subTest(path=path):
+                    self.assert_same_response(
+                        self.client.get(path), self.async_get(async_classes[viewset], path)
+                    )
+
+    def test_bootstrap_matches(self):
+        for path in ('/api/bootstrap/', '/api/bootstrap/?include=profile,blog', '/api/bootstrap/?include=x'):
+            with self.subTest(path=path):
+                self.assert_same_response(
+                    self.client.get(path), self.async_get(async_views.AsyncBootstrapView, path)
+                )
+
+    def render_home(self, get, streaming=False):
+        # Nothing cached, so every call renders the page
+        cache.clear()
+        HomepageSnapshot.objects.filter(key=snapshots.page_key(PortfolioHomeView.cache_name)).delete()
+        response = get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.streaming, streaming)
+        if response.streaming:
+            async def consume():
+                return b''.join([part async for part in response.streaming_content])
+            return strip_csrf_token(async_to_sync(consume)().decode())
+        return strip_csrf_token(response.content.decode())
+
+    def test_homepage_matches(self):
+        rendered = self.render_home(lambda: self.client.get('/'))
+
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming), self.settings(HOMEPAGE_STREAMING=streaming):
+                content = self.render_home(
+                    lambda: self.async_get(async_views.AsyncPortfolioHomeView, '/'), streaming
+                )
+                self.assertEqual(content, rendered)
+
+
+class TechnologyTagTests(TestCase):
+    """Technology tags of projects and the ?tech= filter."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.projects = {
+            title: Project.objects.create(
+                title=title, description='A project', image='projects/site.jpg',
+                technologies=technologies, created_date=datetime.date(2024, 1, 1),
+            )
+            for title, technologies in [
+                ('Both', 'Django, React'), ('Backend', 'django'), ('Frontend', 'React,Vue'), ('Native', 'C++'),
+            ]
+        }
+
+    def tag_slugs(self, project):
+        return set(project.tags.values_list('slug', flat=True))
+
+    def titles(self, query):
+        response = self.client.get(f'/api/projects/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(project['title'] for project in response.json()['results'])
+
+    def test_saving_a_project_syncs_its_tags(self):
+        project = self.projects['Backend']
+        self.assertEqual(self.tag_slugs(project), {'django'})
+
+        project.technologies = 'Django, Vue, C#'
+        project.save()
+
+        self.assertEqual(self.tag_slugs(project), {'django', 'vue', 'c-sharp'})
+        # Names keep the spelling they were first tagged with
+        self.assertEqual(Technology.objects.get(slug='django').name, 'Django')
+
+    def test_migration_backfill_matches_the_save_handler(self):
+        backfill_tags = import_module('portfolio.migrations.0006_technology_tags').backfill_tags
+        expected = {project.pk: self.tag_slugs(project) for project in self.projects.values()}
+        Project.tags.through.objects.all().delete()
+        Technology.objects.all().delete()
+
+        backfill_tags(django_apps, None)
+
+        self.assertEqual({project.pk: self.tag_slugs(project) for project in self.projects.values()}, expected)
+        self.assertEqual(Technology.objects.get(slug='c-plus-plus').name, 'C++')
+
+    def test_tech_filter_matches_all_or_any(self):
+        self.assertEqual(self.titles('tech=django,react'), ['Both'])
+        self.assertEqual(self.titles('tech=Django'), ['Backend', 'Both'])
+        self.assertEqual(self.titles('tech=c%2B%2B'), ['Native'])
+        self.assertEqual(self.titles('tech=django,react&tech_match=any'), ['Backend', 'Both', 'Frontend'])
+        self.assertEqual(self.titles('tech=django,unknown'), [])
+        self.assertEqual(self.titles('tech=django,unknown&tech_match=any'), ['Backend', 'Both'])
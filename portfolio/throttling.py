@@ -0,0 +1,176 @@
+"""
+Token-bucket rate limiting and duplicate suppression for the contact form.
+
+Buckets live in a small SQLite file of their own (THROTTLE_DB) so that every
+gunicorn worker shares them without Redis and without contending for the
+main database's write lock. Each check is a single UPSERT on the bucket's
+primary key, so the cost per request doesn't grow with the number of
+clients; idle rows are pruned on every PRUNE_EVERY-th check.
+
+Rates use DRF's "<requests>/<period>" format from DEFAULT_THROTTLE_RATES: a
+bucket holds up to <requests> tokens and refills continuously at
+<requests>/<period>, i.e. a sliding window without the per-request history
+DRF's SimpleRateThrottle keeps.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bucket_updated_idx ON bucket (updated);
+CREATE TABLE IF NOT EXISTS message (
+    digest TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS message_expires_idx ON message (expires);
+"""
+
+# Take a token if the refilled bucket has one; no row comes back otherwise
+TAKE_TOKEN = """
+INSERT INTO bucket (key, tokens, updated) VALUES (:key, :capacity - 1, :now)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:capacity, tokens + (:now - updated) * :refill) - 1,
+    updated = :now
+WHERE min(:capacity, tokens + (:now - updated) * :refill) >= 1
+RETURNING tokens
+"""
+
+# Record a message digest unless an unexpired one exists
+CLAIM_MESSAGE = """
+INSERT INTO message (digest, expires) VALUES (:digest, :expires)
+ON CONFLICT (digest) DO UPDATE SET expires = :expires
+WHERE expires < :now
+RETURNING digest
+"""
+
+PRUNE_EVERY = 1000
+
+
+class ThrottleStore:
+    """Per-thread connections to the shared throttle database."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._calls = 0
+
+    def connection(self):
+        path = str(settings.THROTTLE_DB)
+        local = self._local
+        # Connections must not cross a fork or a settings change
+        if getattr(local, 'key', None) != (os.getpid(), path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            db = sqlite3.connect(path, timeout=5, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.executescript(SCHEMA)
+            local.db, local.key = db, (os.getpid(), path)
+        return local.db
+
+    def execute(self, sql, params):
+        db = self.connection()
+        self._calls += 1
+        if self._calls % PRUNE_EVERY == 0:
+            self.prune(db)
+        return db.execute(sql, params).fetchone()
+
+    def prune(self, db):
+        now = time.time()
+        db.execute('DELETE FROM bucket WHERE updated < ?', (now - settings.THROTTLE_IDLE_TIMEOUT,))
+        db.execute('DELETE FROM message WHERE expires < ?', (now,))
+
+    def take(self, key, capacity, refill, now):
+        """Take one token from ``key``'s bucket; return the tokens left or None."""
+        row = self.execute(TAKE_TOKEN, {'key': key, 'capacity': capacity, 'refill': refill, 'now': now})
+        return row[0] if row else None
+
+    def tokens(self, key, capacity, refill, now):
+        row = self.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,))
+        if row is None:
+            return capacity
+        return min(capacity, row[0] + (now - row[1]) * refill)
+
+    def claim(self, digest, timeout, now):
+        """Record ``digest``; return False if it was already recorded within ``timeout``."""
+        row = self.execute(CLAIM_MESSAGE, {'digest': digest, 'expires': now + timeout, 'now': now})
+        return row is not None
+
+    def release(self, digest):
+        self.execute('DELETE FROM message WHERE digest = ?', (digest,))
+
+
+store = ThrottleStore()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle semantics backed by a shared token bucket."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        self.capacity = self.num_requests
+        self.refill = self.num_requests / self.duration
+        return store.take(self.key, self.capacity, self.refill, self.now) is not None
+
+    def wait(self):
+        tokens = store.tokens(self.key, self.capacity, self.refill, self.now)
+        return max(0.0, (1 - tokens) / self.refill)
+
+
+class ContactIPThrottle(TokenBucketThrottle):
+    """
+    Keyed on the client address, which get_ident() only takes from
+    X-Forwarded-For when REST_FRAMEWORK['NUM_PROXIES'] says how many proxies
+    set it; otherwise any client could pick a fresh bucket per request.
+    """
+    scope = 'contact_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class ContactEmailThrottle(TokenBucketThrottle):
+    scope = 'contact_email'
+
+    def get_cache_key(self, request, view):
+        if not isinstance(request.data, dict):
+            return None  # Left to validation
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None  # Left to validation
+        return self.cache_format % {'scope': self.scope, 'ident': email.strip().lower()}
+
+
+def message_digest(data):
+    normalized = '\x00'.join([
+        data['email'].strip().lower(),
+        ' '.join(data['message'].split()),
+    ])
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def claim_message(data):
+    """
+    Record a message; False if the same message from the same address
+    arrived recently. A single INSERT, so of concurrent identical posts only
+    one claims it.
+    """
+    return store.claim(message_digest(data), settings.CONTACT_DUPLICATE_WINDOW, time.time())
+
+
+def release_message(data):
+    """Forget a claimed message whose save failed, so it can be sent again."""
+    store.release(message_digest(data))
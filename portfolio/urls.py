@@ -1,10 +1,11 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     ProfileViewSet, ServiceViewSet, TimelineViewSet, SkillViewSet,
-    ProjectCategoryViewSet, ProjectViewSet, TestimonialViewSet,
+    ProjectCategoryViewSet, ProjectViewSet, TechnologyViewSet, TestimonialViewSet,
     ClientViewSet, BlogPostViewSet, ContactMessageCreateView,
-    PortfolioHomeView
+    PortfolioHomeView, SearchView, BootstrapView, DataExportView
 )
 
 router = DefaultRouter()
@@ -14,6 +15,7 @@ router.register(r'timeline', TimelineViewSet, basename='timeline')
 router.register(r'skills', SkillViewSet, basename='skill')
 router.register(r'categories', ProjectCategoryViewSet, basename='category')
 router.register(r'projects', ProjectViewSet, basename='project')
+router.register(r'technologies', TechnologyViewSet, basename='technology')
 router.register(r'testimonials', TestimonialViewSet, basename='testimonial')
 router.register(r'clients', ClientViewSet, basename='client')
 router.register(r'blog', BlogPostViewSet, basename='blog')
@@ -25,4 +27,27 @@ urlpatterns = [
     # API endpoints
     path('api/', include(router.urls)),
     path('api/contact/', ContactMessageCreateView.as_view(), name='contact'),
+    path('api/search/', SearchView.as_view(), name='search'),
+    path('api/bootstrap/', BootstrapView.as_view(), name='bootstrap'),
+    path('api/admin/export/<slug:dataset>.<slug:export_format>', DataExportView.as_view(), name='data-export'),
 ]
+
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    # Async list endpoints take precedence over the router's sync ones;
+    # detail routes and everything else stay sync
+    urlpatterns = [
+        path('home/', async_views.AsyncPortfolioHomeView.as_view(), name='portfolio_home'),
+        path('api/profile/', async_views.AsyncProfileView.as_view(), name='profile-list'),
+        path('api/services/', async_views.AsyncServiceList.as_view(), name='service-list'),
+        path('api/timeline/', async_views.AsyncTimelineList.as_view(), name='timeline-list'),
+        path('api/skills/', async_views.AsyncSkillList.as_view(), name='skill-list'),
+        path('api/categories/', async_views.AsyncProjectCategoryList.as_view(), name='category-list'),
+        path('api/projects/', async_views.AsyncProjectList.as_view(), name='project-list'),
+        path('api/technologies/', async_views.AsyncTechnologyList.as_view(), name='technology-list'),
+        path('api/testimonials/', async_views.AsyncTestimonialList.as_view(), name='testimonial-list'),
+        path('api/clients/', async_views.AsyncClientList.as_view(), name='client-list'),
+        path('api/blog/', async_views.AsyncBlogPostList.as_view(), name='blog-list'),
+        path('api/bootstrap/', async_views.AsyncBootstrapView.as_view(), name='bootstrap'),
+    ] + urlpatterns
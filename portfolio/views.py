@@ -1,49 +1,80 @@
 from rest_framework import viewsets, generics, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+)
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.views import View
 from django.views.generic import TemplateView
 
+from .bootstrap import get_etag, parse_sections
+from .cache import fill_csrf_token, get_cached_page, set_cached_page, strip_csrf_token
+from .counters import view_counts
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_prometheus
+from .mixins import ConditionalGetMixin, FastListMixin
+from .pagination import KeysetPagination
+from .replicas import use_primary
+from .search import SEARCH_TYPES, search
+from .sqlite import retry_on_locked
+from .streaming import stream_template
+from .throttling import ContactEmailThrottle, ContactIPThrottle, claim_message, release_message
+from . import bulkexport, snapshots, spool
+
 from .models import (
     Profile, Service, TimelineEntry, Skill,
-    ProjectCategory, Project, Testimonial, Client,
-    BlogPost, ContactMessage
+    ProjectCategory, Project, Technology, Testimonial, Client,
+    BlogPost, ContactMessage, technology_slug
 )
 from .serializers import (
     ProfileSerializer, ServiceSerializer, TimelineEntrySerializer,
     SkillSerializer, ProjectCategorySerializer, ProjectSerializer,
-    TestimonialSerializer, ClientSerializer, BlogPostListSerializer,
+    TechnologySerializer, TestimonialSerializer, ClientSerializer, BlogPostListSerializer,
     BlogPostDetailSerializer, ContactMessageSerializer
 )
 
 
-class ProfileViewSet(viewsets.ReadOnlyModelViewSet):
+class ProfileViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for portfolio profile.
     GET /api/profile/ - Get profile information
     """
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
+    query_budget = 1
+    replica_reads = True
 
     def list(self, request, *args, **kwargs):
         # Return the first (and should be only) profile
         profile = self.queryset.first()
         if profile:
-            serializer = self.get_serializer(profile)
-            return Response(serializer.data)
+            validators = self.get_object_validators(profile)
+            response = self.get_not_modified_response(validators)
+            if response is None:
+                serializer = self.get_serializer(profile)
+                response = Response(serializer.data)
+            return self.set_validators(response, validators)
         return Response({"detail": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
+class ServiceViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for services.
     GET /api/services/ - List all active services
     """
     queryset = Service.objects.filter(is_active=True)
     serializer_class = ServiceSerializer
+    query_budget = 3
+    replica_reads = True
 
 
-class TimelineViewSet(viewsets.ReadOnlyModelViewSet):
+class TimelineViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for timeline entries (education & experience).
     GET /api/timeline/ - List all timeline entries
@@ -52,6 +83,8 @@ class TimelineViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = TimelineEntry.objects.filter(is_active=True)
     serializer_class = TimelineEntrySerializer
+    query_budget = 3
+    replica_reads = True
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -61,34 +94,53 @@ class TimelineViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class SkillViewSet(viewsets.ReadOnlyModelViewSet):
+class SkillViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for skills.
     GET /api/skills/ - List all active skills
     """
     queryset = Skill.objects.filter(is_active=True)
     serializer_class = SkillSerializer
+    query_budget = 3
+    replica_reads = True
 
 
-class ProjectCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class ProjectCategoryViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for project categories.
     GET /api/categories/ - List all categories
     """
-    queryset = ProjectCategory.objects.all()
+    queryset = ProjectCategory.objects.annotate(
+        projects_count=Count('projects', filter=Q(projects__is_active=True))
+    ).order_by('name')
     serializer_class = ProjectCategorySerializer
+    query_budget = 4
+    replica_reads = True
 
+    def get_validator_querysets(self):
+        # Project counts change with the projects, not the categories
+        return [ProjectCategory.objects.all(), Project.objects.filter(is_active=True)]
 
-class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
+
+class ProjectViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for projects.
     GET /api/projects/ - List all active projects
     GET /api/projects/?category=web-design - Filter by category slug
     GET /api/projects/?featured=true - Get featured projects only
+    GET /api/projects/?tech=django,react - Projects using all of the technologies
+    GET /api/projects/?tech=django,react&tech_match=any - ... using any of them
+    GET /api/projects/?cursor= - Keyset pagination (follow the "next" link)
     GET /api/projects/{id}/ - Get project detail
     """
-    queryset = Project.objects.filter(is_active=True)
+    queryset = Project.objects.filter(is_active=True).select_related('category')
     serializer_class = ProjectSerializer
+    pagination_class = KeysetPagination
+    # The list validators aggregate the categories too
+    query_budget = 4
+    replica_reads = True
+    # category_name changes when the category is renamed
+    validator_relations = ('category',)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -103,36 +155,80 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
         if featured == 'true':
             queryset = queryset.filter(featured=True)
 
+        # Filter by technology tags (names or slugs)
+        tech = self.request.query_params.get('tech', None)
+        if tech:
+            slugs = {technology_slug(name) for name in tech.split(',')} - {''}
+            tagged = Project.tags.through.objects.filter(technology__slug__in=slugs)
+            if self.request.query_params.get('tech_match', None) != 'any':
+                # Projects carrying every one of the tags
+                tagged = tagged.values('project_id').annotate(
+                    matched=Count('technology_id')
+                ).filter(matched=len(slugs))
+            queryset = queryset.filter(pk__in=tagged.values('project_id'))
+
         return queryset
 
 
-class TestimonialViewSet(viewsets.ReadOnlyModelViewSet):
+class TechnologyViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for project technologies.
+    GET /api/technologies/ - Technologies of active projects, most used first
+    GET /api/technologies/{slug}/ - Get technology detail
+    """
+    queryset = Technology.objects.annotate(
+        projects_count=Count('projects', filter=Q(projects__is_active=True))
+    ).filter(projects_count__gt=0).order_by('-projects_count', 'name')
+    serializer_class = TechnologySerializer
+    lookup_field = 'slug'
+    query_budget = 4
+    replica_reads = True
+
+    def get_validator_querysets(self):
+        # Tags only change when projects are saved
+        return [Technology.objects.all(), Project.objects.filter(is_active=True)]
+
+
+class TestimonialViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for testimonials.
     GET /api/testimonials/ - List all active testimonials
     """
     queryset = Testimonial.objects.filter(is_active=True)
     serializer_class = TestimonialSerializer
+    query_budget = 3
+    replica_reads = True
 
 
-class ClientViewSet(viewsets.ReadOnlyModelViewSet):
+class ClientViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for clients.
     GET /api/clients/ - List all active clients
     """
     queryset = Client.objects.filter(is_active=True)
     serializer_class = ClientSerializer
+    query_budget = 3
+    replica_reads = True
 
 
-class BlogPostViewSet(viewsets.ReadOnlyModelViewSet):
+class BlogPostViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for blog posts.
     GET /api/blog/ - List all published blog posts (paginated)
     GET /api/blog/{slug}/ - Get blog post detail
     GET /api/blog/?featured=true - Get featured posts only
+    GET /api/blog/?cursor= - Keyset pagination (follow the "next" link)
     """
     queryset = BlogPost.objects.filter(is_published=True)
     lookup_field = 'slug'
+    pagination_class = KeysetPagination
+    query_budget = 3
+    replica_reads = True
+    # View counts are saved without touching updated_at
+    validator_fields = ('view_count',)
+    # Every detail read counts a view, so the count can't validate the detail
+    # response: a revalidated copy keeps the count it was fetched with
+    object_validator_fields = ()
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -155,12 +251,84 @@ class BlogPostViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
     def retrieve(self, request, *args, **kwargs):
-        # Increment view count when blog post is viewed
+        # Count the view in the buffer; it is saved in batches later
         instance = self.get_object()
-        instance.view_count += 1
-        instance.save(update_fields=['view_count'])
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        instance.view_count += view_counts.record(instance.pk)
+        validators = self.get_object_validators(instance)
+        response = self.get_not_modified_response(validators)
+        if response is None:
+            serializer = self.get_serializer(instance)
+            response = Response(serializer.data)
+        return self.set_validators(response, validators)
+
+
+class BootstrapView(APIView):
+    """
+    API endpoint returning every homepage section in one response.
+    GET /api/bootstrap/ - All sections
+    GET /api/bootstrap/?include=projects,skills - Only the listed sections
+    Sections: profile, services, timeline, skills, categories, projects,
+    testimonials, clients, blog (first page)
+    """
+    # One query for the snapshots plus one per section when they are missing
+    query_budget = 11
+    replica_reads = True
+
+    def get(self, request, *args, **kwargs):
+        sections = parse_sections(request.query_params.get('include', ''))
+        if not sections:
+            return Response(
+                {"detail": "No known sections in 'include'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        etag = get_etag(request, sections)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                snapshots.get_bootstrap(request, sections), content_type='application/json'
+            )
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+
+
+class SearchView(APIView):
+    """
+    API endpoint for full-text search over blog posts and projects.
+    GET /api/search/?q=django - Ranked results with highlighted snippets
+    GET /api/search/?q=django&type=blog - Only blog posts (or type=project)
+    GET /api/search/?q=django&limit=5 - At most 5 results (default 20, max 50)
+    Each result: type, id, url (its API detail URL), score, title, snippet
+    """
+    default_limit = 20
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {"detail": "Query parameter 'q' is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        kinds = list(SEARCH_TYPES)
+        search_type = request.query_params.get('type', None)
+        if search_type in SEARCH_TYPES:
+            kinds = [search_type]
+
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        results = search(query, kinds, limit)
+        return Response({
+            'query': query,
+            'count': len(results),
+            'results': results,
+        })
 
 
 class ContactMessageCreateView(generics.CreateAPIView):
@@ -170,14 +338,30 @@ class ContactMessageCreateView(generics.CreateAPIView):
     """
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
+    throttle_classes = [ContactIPThrottle, ContactEmailThrottle]
+
+    @retry_on_locked
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        response_status = status.HTTP_202_ACCEPTED if settings.CONTACT_SPOOL else status.HTTP_201_CREATED
+        # A duplicate is dropped, but answered like a success so resubmits learn nothing
+        if claim_message(serializer.validated_data):
+            try:
+                if settings.CONTACT_SPOOL:
+                    # Saved in a batch by the spool drainer shortly after
+                    spool.enqueue(serializer.validated_data)
+                else:
+                    self.perform_create(serializer)
+            except Exception:
+                release_message(serializer.validated_data)
+                raise
         return Response(
             {"message": "Thank you! Your message has been sent successfully."},
-            status=status.HTTP_201_CREATED
+            status=response_status
         )
 
 
@@ -185,8 +369,46 @@ class PortfolioHomeView(TemplateView):
     """
     Frontend portfolio template view.
     Renders the main portfolio HTML page with Django static files.
+    The rendered page is cached until the next content edit, and stored as
+    a homepage snapshot for when the cache is cold. With HOMEPAGE_STREAMING
+    on, a page that has to be rendered is streamed part by part.
     """
     template_name = 'portfolio/index.html'
+    cache_name = 'home'
+    # One query per homepage section when the snapshot is missing too
+    query_budget = 12
+    replica_reads = True
+
+    def get(self, request, *args, **kwargs):
+        content = get_cached_page(self.cache_name, request)
+        if content is not None:
+            return HttpResponse(content)
+
+        content = snapshots.get_page(self.cache_name)
+        if content is None and settings.HOMEPAGE_STREAMING:
+            # The CSRF cookie goes out with the headers, before the form renders
+            get_token(request)
+            return StreamingHttpResponse(self.stream(request, kwargs))
+        if content is None:
+            # From the primary, like the snapshot sections
+            with use_primary():
+                response = super().get(request, *args, **kwargs)
+                response.render()
+            content = strip_csrf_token(response.content.decode(response.charset))
+            snapshots.save_page(self.cache_name, content)
+        set_cached_page(self.cache_name, content, settings.HOMEPAGE_CACHE_TIMEOUT)
+        return HttpResponse(fill_csrf_token(content, request))
+
+    def stream(self, request, kwargs):
+        """Yield the rendered page part by part, then cache it like get() does."""
+        parts = []
+        with use_primary():
+            for part in stream_template(self.template_name, self.get_context_data(**kwargs), request):
+                parts.append(part)
+                yield part
+        content = strip_csrf_token(''.join(parts))
+        snapshots.save_page(self.cache_name, content)
+        set_cached_page(self.cache_name, content, settings.HOMEPAGE_CACHE_TIMEOUT)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -210,7 +432,9 @@ class PortfolioHomeView(TemplateView):
 
         # Get project categories and projects
         context['categories'] = ProjectCategory.objects.all()
-        context['projects'] = Project.objects.filter(is_active=True)
+        context['projects'] = Project.objects.filter(
+            is_active=True
+        ).select_related('category')
 
         # Get testimonials
         context['testimonials'] = Testimonial.objects.filter(is_active=True)
@@ -222,3 +446,58 @@ class PortfolioHomeView(TemplateView):
         context['blog_posts'] = BlogPost.objects.filter(is_published=True)[:6]
 
         return context
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint with the request metrics of every worker.
+    GET /metrics - Needs "Authorization: Bearer <METRICS_TOKEN>" or a staff login
+    """
+
+    def has_access(self, request):
+        if request.user.is_active and request.user.is_staff:
+            return True
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        provided = request.headers.get('Authorization', '')
+        return bool(settings.METRICS_TOKEN) and constant_time_compare(provided, expected)
+
+    def get(self, request, *args, **kwargs):
+        if not self.has_access(request):
+            return HttpResponseForbidden()
+        response = HttpResponse(render_prometheus(), content_type=METRICS_CONTENT_TYPE)
+        patch_cache_control(response, no_store=True)
+        return response
+
+
+class DataExportView(View):
+    """
+    Streamed export of a dataset (see portfolio.bulkexport), staff only.
+    GET /api/admin/export/contacts.ndjson - Every contact message
+    GET /api/admin/export/contacts.csv?since=<cursor> - Only those after the cursor
+    GET /api/admin/export/blog-views.ndjson - Blog post views per day
+    The newest exported row's cursor is in the X-Export-Cursor header.
+    """
+
+    def get(self, request, dataset, export_format):
+        if not (request.user.is_active and request.user.is_staff):
+            return HttpResponseForbidden()
+        if dataset not in bulkexport.DATASETS or export_format not in bulkexport.FORMATS:
+            raise Http404
+        dataset_name, dataset = dataset, bulkexport.DATASETS[dataset]
+        since = request.GET.get('since')
+        if since:
+            try:
+                since = dataset.parse_since(since)
+            except ValueError:
+                return HttpResponseBadRequest('Invalid since cursor')
+        rows, newest = dataset.queryset(since or None)
+        # A sync iterator would be buffered whole under ASGI
+        stream = bulkexport.astream if settings.ASYNC_VIEWS else bulkexport.stream
+        response = StreamingHttpResponse(
+            stream(dataset, export_format, rows), content_type=bulkexport.FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{dataset_name}.{export_format}"'
+        if newest is not None:
+            response['X-Export-Cursor'] = bulkexport.cursor_value(newest)
+        patch_cache_control(response, no_store=True)
+        return response